@@ -0,0 +1 @@
+"""Standalone micro-benchmarks for pipeline hot paths."""
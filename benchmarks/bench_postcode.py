@@ -0,0 +1,63 @@
+"""Benchmark single-value vs batched postcode normalisation.
+
+Usage: python -m benchmarks.bench_postcode [--rows N] [--distinct N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from scripts.common.postcode import PostcodeNormaliser, normalise_postcode
+
+
+def _clean(rng: random.Random) -> str:
+    area = rng.choice(["JE", "GY", "IM"])
+    return f"{area}{rng.randint(1, 9)} {rng.randint(0, 9)}{rng.choice('ABDEFGHJLNPQRSTUWXYZ')}{rng.choice('ABDEFGHJLNPQRSTUWXYZ')}"
+
+
+def _dirty(rng: random.Random) -> str:
+    value = _clean(rng).lower().replace(" ", rng.choice(["", "  ", "-", "/"]))
+    return f" {value} "
+
+
+def _embedded(rng: random.Random) -> str:
+    return f"{rng.randint(1, 200)} Duke Street Douglas Isle Of Man {_clean(rng)}"
+
+
+INPUT_KINDS = {"clean": _clean, "dirty": _dirty, "embedded": _embedded}
+
+
+def _inputs(kind: str, rows: int, distinct: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    vocabulary = [INPUT_KINDS[kind](rng) for _ in range(distinct)]
+    return [rng.choice(vocabulary) for _ in range(rows)]
+
+
+def _time(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--distinct", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    print(f"{'input':<10} {'single_s':>10} {'batch_s':>10} {'warm_s':>10} {'speedup':>8}")
+    for kind in INPUT_KINDS:
+        values = _inputs(kind, args.rows, args.distinct, args.seed)
+        single = _time(lambda: [normalise_postcode(value) for value in values])
+        normaliser = PostcodeNormaliser()
+        batch = _time(lambda: normaliser.normalise_many(values))
+        warm = _time(lambda: normaliser.normalise_many(values))
+        print(f"{kind:<10} {single:>10.3f} {batch:>10.3f} {warm:>10.3f} {single / batch:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+"""Benchmark row dicts vs slotted record types for raw and canonical rows.
+
+Usage: python -m benchmarks.bench_records [--rows N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from scripts.common.models import CanonicalRow, RawRecord
+from scripts.pipeline.normalise_merge import _iter_groups_classic, _priority_lookup
+
+SOURCES = [("arcgis_addresses", "authoritative"), ("osm_overpass", "osm"), ("osm_geofabrik", "osm")]
+
+
+def _raw_lines(rows: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    lines = []
+    for idx in range(rows):
+        source_name, source_class = rng.choice(SOURCES)
+        lines.append(
+            json.dumps(
+                {
+                    "territory": "IM",
+                    "source_name": source_name,
+                    "source_class": source_class,
+                    "source_record_id": f"{source_name}/{idx}",
+                    "raw_postcode": f"IM{rng.randint(1, 9)} {rng.randint(1, 9)}{rng.choice('ABDEFGHJ')}{rng.choice('ABDEFGHJ')}",
+                    "raw_lat": 54.0 + rng.random() / 2,
+                    "raw_lon": -4.8 + rng.random() / 2,
+                    "raw_geometry": None,
+                    "source_wkid": 4326,
+                    "extract_date": "2026-02-17",
+                    "run_id": "run-20260217T000000Z",
+                    "raw_payload_ref": f"raw/{source_name}.json",
+                }
+            )
+        )
+    return lines
+
+
+def _canonical_dict(idx: int) -> dict:
+    return {
+        "territory": "IM",
+        "postcode": f"IM1 {idx}",
+        "normalised_postcode": f"IM1 {idx}",
+        "source_list": "arcgis_addresses;osm_overpass",
+        "source_count": 2,
+        "has_coordinates": True,
+        "lat": 54.15 + idx / 1e7,
+        "lon": -4.48,
+        "coordinate_source": "authoritative",
+        "confidence_score": 75,
+        "first_seen": "",
+        "last_seen": "",
+        "notes": None,
+    }
+
+
+def _group_dicts(rows: list[dict], source_priority: dict[str, int]) -> list:
+    """Previous classic path: copy and enrich each row dict, then rank with .get()."""
+    grouped: dict[str, list[dict]] = {}
+    for raw in rows:
+        enriched = dict(raw)
+        enriched["normalised_postcode"] = raw["raw_postcode"]
+        grouped.setdefault(raw["raw_postcode"], []).append(enriched)
+    groups = []
+    for key in sorted(grouped):
+        records = sorted(
+            grouped[key],
+            key=lambda row: (row.get("territory"), key, row.get("source_name", ""), row.get("source_record_id") or ""),
+        )
+        ranked = sorted(
+            records,
+            key=lambda row: (source_priority.get(row.get("source_name", ""), 9999), row.get("raw_postcode") or ""),
+        )
+        classes = {row.get("source_class", "other") for row in records}
+        groups.append((key, records, ranked[0].get("raw_postcode"), classes))
+    return groups
+
+
+def _retained_bytes(build) -> tuple[object, int]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        value = build()
+        return value, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def _time(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    lines = _raw_lines(args.rows, args.seed)
+    raw_dicts, raw_dict_bytes = _retained_bytes(lambda: [json.loads(line) for line in lines])
+    raw_records, raw_record_bytes = _retained_bytes(lambda: [RawRecord.from_dict(json.loads(line)) for line in lines])
+    del lines
+    canonical_dicts, canonical_dict_bytes = _retained_bytes(lambda: [_canonical_dict(idx) for idx in range(args.rows)])
+    _canonical_rows, canonical_row_bytes = _retained_bytes(
+        lambda: [CanonicalRow(**_canonical_dict(idx)) for idx in range(args.rows)]
+    )
+    del canonical_dicts
+
+    source_priority = _priority_lookup([name for name, _class in SOURCES])
+    merge_times = {
+        "dict": _time(lambda: _group_dicts(raw_dicts, source_priority)),
+        "record": _time(
+            lambda: list(_iter_groups_classic([(row, row.raw_postcode) for row in raw_records], "IM", source_priority))
+        ),
+    }
+
+    print(f"{'rows':<10} {'dict_B/row':>12} {'record_B/row':>13} {'ratio':>7}")
+    for name, dict_bytes, record_bytes in (
+        ("raw", raw_dict_bytes, raw_record_bytes),
+        ("canonical", canonical_dict_bytes, canonical_row_bytes),
+    ):
+        print(f"{name:<10} {dict_bytes / args.rows:>12.0f} {record_bytes / args.rows:>13.0f} {dict_bytes / record_bytes:>6.1f}x")
+    print(
+        f"group+rank {merge_times['dict']:.3f}s (dict) vs {merge_times['record']:.3f}s (record), "
+        f"{merge_times['dict'] / merge_times['record']:.1f}x"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,63 @@
+"""Benchmark batch nearest-postcode queries against the spatial index.
+
+Usage: python -m benchmarks.bench_spatial [--points N] [--queries N] [--k K]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from scripts.pipeline.spatial_index import SpatialIndex
+
+
+def _clustered_points(points: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    # Settlements of varying density over a Jersey-sized extent.
+    centres = rng.uniform([49.17, -2.25], [49.26, -2.01], size=(40, 2))
+    picked = centres[rng.integers(0, len(centres), points)]
+    return picked[:, 0] + rng.normal(0, 0.01, points), picked[:, 1] + rng.normal(0, 0.015, points)
+
+
+def _time(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=46_000)
+    parser.add_argument("--queries", type=int, default=100_000)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    lat, lon = _clustered_points(args.points, rng)
+    postcodes = np.asarray([f"P{idx}" for idx in range(args.points)])
+    workloads = {
+        "near": (
+            lat[rng.integers(0, args.points, args.queries)] + rng.normal(0, 0.0005, args.queries),
+            lon[rng.integers(0, args.points, args.queries)] + rng.normal(0, 0.0005, args.queries),
+        ),
+        "uniform": (
+            rng.uniform(lat.min(), lat.max(), args.queries),
+            rng.uniform(lon.min(), lon.max(), args.queries),
+        ),
+    }
+
+    # "first" includes building candidate lists for the cells it touches; "warm" reuses them.
+    print(f"{'k':>3} {'queries':<8} {'first_q/ms':>11} {'warm_q/ms':>10}")
+    for k in args.k:
+        for name, (query_lat, query_lon) in workloads.items():
+            index = SpatialIndex(postcodes, lat, lon)
+            first = _time(lambda: index.nearest_many(query_lat, query_lon, k))
+            warm = _time(lambda: index.nearest_many(query_lat, query_lon, k))
+            print(f"{k:>3} {name:<8} {args.queries / first / 1000:>11.0f} {args.queries / warm / 1000:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import argparse
 import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
 
 from scripts.common.config_loader import load_all_configs, resolve_territories
@@ -14,17 +15,40 @@ from scripts.common.logging import build_logger, log_event
 from scripts.common.time_utils import parse_run_date
 from scripts.discovery.arcgis_discover import run_discovery
 from scripts.harvest.runner import run_harvest_for_territory
-from scripts.pipeline.export import write_canonical_csv
+from scripts.pipeline.combine_onspd import PREFER_CHOICES, run_combine_onspd
+from scripts.pipeline.deltas import write_canonical_delta
+from scripts.pipeline.context import PipelineContext, TerritoryState
+from scripts.pipeline.export import canonical_records, write_canonical_records
+from scripts.pipeline.lookup_file import write_lookup_file
 from scripts.pipeline.map_to_onspd import run_map_onspd
-from scripts.pipeline.normalise_merge import run_normalise_merge
+from scripts.pipeline.normalise_merge import MERGE_ENGINES, MergeOptions, run_normalise_merge
+from scripts.pipeline.prefix_index import write_prefix_index
 from scripts.pipeline.reports import write_run_summary
+from scripts.pipeline.spatial_index import write_spatial_index
 from scripts.pipeline.temporal import apply_temporal_tracking
 from scripts.pipeline.validate import run_validate
 
 
+COMBINE_COMMAND = "combine-onspd"
+_SIZE_SUFFIXES = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_memory_size(value: str) -> int:
+    text = value.strip().upper().removesuffix("B")
+    suffix = text[-1:] if text[-1:] in _SIZE_SUFFIXES else ""
+    number = text[: len(text) - len(suffix)]
+    try:
+        size = int(float(number) * _SIZE_SUFFIXES[suffix])
+    except (ValueError, OverflowError):
+        raise argparse.ArgumentTypeError(f"Invalid memory size: {value!r} (expected e.g. 512M, 2G)") from None
+    if size <= 0:
+        raise argparse.ArgumentTypeError(f"Memory size must be positive: {value!r}")
+    return size
+
+
 def parse_args(argv: list[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument("command", choices=[*STAGES, "all"])
+    parser.add_argument("command", choices=[*STAGES, "all", COMBINE_COMMAND])
     parser.add_argument("--territory", default="all", choices=["JE", "GY", "IM", "all"])
     parser.add_argument("--run-date", default=None)
     parser.add_argument("--run-id", default=None)
@@ -33,18 +57,50 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
     parser.add_argument("--data-dir", default="./data")
     parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARN", "ERROR"])
     parser.add_argument("--strict", action="store_true")
-    return parser.parse_args(argv)
+    parser.add_argument("--engine", default="classic", choices=list(MERGE_ENGINES))
+    parser.add_argument("--max-memory", default=None, type=parse_memory_size)
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--merge-workers", default=1, type=int)
+    parser.add_argument("--onspd-file", default=None)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--prefer", default="official", choices=list(PREFER_CHOICES))
+    parser.add_argument("--jobs", default=1, type=int)
+    args = parser.parse_args(argv)
+    if args.command == COMBINE_COMMAND and not args.onspd_file:
+        parser.error(f"{COMBINE_COMMAND} requires --onspd-file")
+    if args.jobs < 1:
+        parser.error(f"--jobs must be at least 1, got {args.jobs}")
+    return args
 
 
-def execute_stage(stage: str, territory_code: str, cfg: dict, bundle, data_dir: Path, run_id: str, run_date: str):
+def execute_stage(
+    stage: str,
+    territory_code: str,
+    cfg: dict,
+    bundle,
+    data_dir: Path,
+    run_id: str,
+    run_date: str,
+    merge_options: MergeOptions | None = None,
+    state: TerritoryState | None = None,
+):
+    state = state or TerritoryState()
     if stage == "discover":
         run_discovery(territory_code, cfg, data_dir, run_id)
     elif stage == "harvest":
-        run_harvest_for_territory(territory_code, cfg, data_dir, run_id, run_date)
+        harvested = run_harvest_for_territory(territory_code, cfg, data_dir, run_id, run_date)
+        # A memory-bounded merge streams the raw files instead of holding every payload.
+        if merge_options is None or merge_options.max_memory_bytes is None:
+            state.raw_payloads.update(harvested["results"])
+        state.raw_stats.update(harvested["stats"])
     elif stage == "merge":
-        merged = run_normalise_merge(territory_code, cfg, bundle.scoring_rules, data_dir, run_id)
+        merged = run_normalise_merge(
+            territory_code, cfg, bundle.scoring_rules, data_dir, run_id, merge_options, state.raw_payloads
+        )
+        state.raw_payloads.clear()
+        state.merge_summary = {key: value for key, value in merged.items() if key != "rows"}
         canonical_path = data_dir / "out" / cfg["output"]["canonical_filename"]
-        state_path = data_dir / "state" / "first_last_seen" / f"{territory_code.lower()}.json"
+        state_path = data_dir / "state" / "first_last_seen" / f"{territory_code.lower()}.sqlite"
         rows_with_temporal, _stats = apply_temporal_tracking(
             merged["rows"],
             territory_code=territory_code,
@@ -52,15 +108,187 @@ def execute_stage(stage: str, territory_code: str, cfg: dict, bundle, data_dir:
             state_path=state_path,
             run_date=run_date,
         )
-        write_canonical_csv(cfg, data_dir, rows_with_temporal)
+        write_canonical_delta(cfg, data_dir, rows_with_temporal, run_date)
+        state.canonical_records = canonical_records(rows_with_temporal)
+        write_canonical_records(cfg, data_dir, state.canonical_records)
+        write_spatial_index(cfg, data_dir, rows_with_temporal)
+        write_lookup_file(cfg, data_dir, rows_with_temporal)
+        write_prefix_index(cfg, data_dir, rows_with_temporal)
     elif stage == "map-onspd":
-        run_map_onspd(territory_code, cfg, bundle.onspd_columns, data_dir)
+        state.onspd = run_map_onspd(territory_code, cfg, bundle.onspd_columns, data_dir, state.canonical_records)
     elif stage == "validate":
-        run_validate(territory_code, cfg, bundle.onspd_columns, data_dir, run_id, run_date)
+        run_validate(territory_code, cfg, bundle.onspd_columns, data_dir, run_id, run_date, state)
     else:
         raise ValueError(f"Unknown stage: {stage}")
 
 
+def run_combine(args: argparse.Namespace, bundle, territories: list[str], data_dir: Path, logger, run_id: str) -> int:
+    out_path = Path(args.output) if args.output else data_dir / "out" / "onspd_combined.csv"
+    crown_outputs = [
+        (territory_code, data_dir / "out" / bundle.territories[territory_code]["output"]["onspd_filename"])
+        for territory_code in territories
+    ]
+    log_event(logger, "stage start", run_id=run_id, stage=COMBINE_COMMAND, event="STAGE_START", status="ok")
+    try:
+        result = run_combine_onspd(
+            bundle.onspd_columns,
+            Path(args.onspd_file),
+            crown_outputs,
+            out_path,
+            data_dir / "out" / "reports" / "onspd_combined_conflicts.csv",
+            prefer=args.prefer,
+        )
+    except PipelineError as exc:
+        log_event(
+            logger,
+            "combine failed",
+            run_id=run_id,
+            stage=COMBINE_COMMAND,
+            event="STAGE_FAIL",
+            status="error",
+            error_code=exc.error_code,
+        )
+        return EXIT_HARD_FAIL
+    log_event(
+        logger,
+        f"combined {result['rows']} rows with {result['conflicts']} pcd conflicts",
+        run_id=run_id,
+        stage=COMBINE_COMMAND,
+        event="STAGE_END",
+        status="ok",
+    )
+    return EXIT_SUCCESS
+
+
+def _is_hard_fail(error_code: str, strict: bool) -> bool:
+    return strict or error_code == "CONTRACT_ERROR"
+
+
+def run_territory_stage(
+    stage: str,
+    territory_code: str,
+    bundle,
+    data_dir: Path,
+    run_id: str,
+    run_date: str,
+    merge_options: MergeOptions,
+    state: TerritoryState,
+    logger,
+) -> str | None:
+    """Run one stage for one territory; the error code of a logged failure, or None."""
+    try:
+        execute_stage(
+            stage,
+            territory_code,
+            bundle.territories[territory_code],
+            bundle,
+            data_dir,
+            run_id,
+            run_date,
+            merge_options,
+            state,
+        )
+    except PipelineError as exc:
+        error_code = exc.error_code
+        message = f"stage failed for territory {territory_code}"
+    except Exception:
+        error_code = "UNEXPECTED_ERROR"
+        message = f"unexpected failure for territory {territory_code}"
+    else:
+        return None
+    log_event(
+        logger,
+        message,
+        run_id=run_id,
+        stage=stage,
+        territory=territory_code,
+        event="STAGE_FAIL",
+        status="error",
+        error_code=error_code,
+    )
+    return error_code
+
+
+def run_territory_pipeline(
+    territory_code: str,
+    stages: tuple[str, ...],
+    bundle,
+    data_dir: Path,
+    run_id: str,
+    run_date: str,
+    merge_options: MergeOptions,
+    log_level: str,
+    strict: bool,
+) -> list[str]:
+    """Run ``stages`` in order for one territory in a worker process; the error codes of its failures.
+
+    A failed stage does not stop later stages, as in a serial run, unless the
+    failure is a hard fail. Every log event carries the territory and goes to
+    the territory's own log file, since workers cannot share one handler.
+    """
+    logger = build_logger(run_id, data_dir=data_dir, level=log_level, territory=territory_code)
+    state = TerritoryState()
+    failures = []
+    tags = {"run_id": run_id, "territory": territory_code, "status": "ok"}
+    for stage in stages:
+        log_event(logger, "stage start", stage=stage, event="STAGE_START", **tags)
+        error_code = run_territory_stage(
+            stage, territory_code, bundle, data_dir, run_id, run_date, merge_options, state, logger
+        )
+        if error_code is not None:
+            failures.append(error_code)
+            if _is_hard_fail(error_code, strict):
+                return failures
+        log_event(logger, "stage end", stage=stage, event="STAGE_END", **tags)
+    return failures
+
+
+def run_territories_parallel(
+    args: argparse.Namespace,
+    stages: tuple[str, ...],
+    bundle,
+    territories: list[str],
+    data_dir: Path,
+    run_id: str,
+    run_date: str,
+    merge_options: MergeOptions,
+) -> int | None:
+    """Run each territory's pipeline in its own worker process.
+
+    Returns EXIT_HARD_FAIL as soon as any territory hard-fails, cancelling
+    territories not yet started; otherwise EXIT_PARTIAL if any stage failed,
+    or None when every stage succeeded.
+    """
+    had_partial_failure = False
+    pool = ProcessPoolExecutor(max_workers=min(args.jobs, len(territories)))
+    try:
+        pending = {
+            pool.submit(
+                run_territory_pipeline,
+                territory_code,
+                stages,
+                bundle,
+                data_dir,
+                run_id,
+                run_date,
+                merge_options,
+                args.log_level,
+                args.strict,
+            )
+            for territory_code in territories
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                failures = future.result()
+                had_partial_failure = had_partial_failure or bool(failures)
+                if any(_is_hard_fail(error_code, args.strict) for error_code in failures):
+                    return EXIT_HARD_FAIL
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return EXIT_PARTIAL if had_partial_failure else None
+
+
 def run_command(args: argparse.Namespace) -> int:
     run_id = args.run_id or generate_run_id()
     run_date = parse_run_date(args.run_date)
@@ -71,45 +299,46 @@ def run_command(args: argparse.Namespace) -> int:
     logger = build_logger(run_id, data_dir=data_dir, level=args.log_level)
     bundle = load_all_configs(config_dir, overlay_config_dir=overlay_config_dir)
     territories = resolve_territories(args.territory)
+    if args.command == COMBINE_COMMAND:
+        return run_combine(args, bundle, territories, data_dir, logger, run_id)
     stages = STAGES if args.command == "all" else (args.command,)
+    merge_options = MergeOptions(
+        engine=args.engine,
+        max_memory_bytes=args.max_memory,
+        incremental=args.incremental,
+        workers=args.merge_workers,
+    )
 
+    if args.jobs > 1 and len(territories) > 1:
+        exit_code = run_territories_parallel(
+            args, stages, bundle, territories, data_dir, run_id, run_date, merge_options
+        )
+        if exit_code == EXIT_HARD_FAIL:
+            return exit_code
+        write_run_summary(data_dir, run_id=run_id, run_date=run_date, territories=territories)
+        return exit_code or EXIT_SUCCESS
+
+    # Stages hand their results to later stages of this run through the context.
+    context = PipelineContext()
     had_partial_failure = False
 
     for stage in stages:
         log_event(logger, "stage start", run_id=run_id, stage=stage, event="STAGE_START", status="ok")
         for territory_code in territories:
-            cfg = bundle.territories[territory_code]
-            try:
-                execute_stage(stage, territory_code, cfg, bundle, data_dir, run_id, run_date)
-            except PipelineError as exc:
-                had_partial_failure = True
-                log_event(
-                    logger,
-                    f"stage failed for territory {territory_code}",
-                    run_id=run_id,
-                    stage=stage,
-                    territory=territory_code,
-                    event="STAGE_FAIL",
-                    status="error",
-                    error_code=exc.error_code,
-                )
-                if exc.error_code == "CONTRACT_ERROR":
-                    return EXIT_HARD_FAIL
-                if args.strict:
-                    return EXIT_HARD_FAIL
-            except Exception:
+            error_code = run_territory_stage(
+                stage,
+                territory_code,
+                bundle,
+                data_dir,
+                run_id,
+                run_date,
+                merge_options,
+                context.territory(territory_code),
+                logger,
+            )
+            if error_code is not None:
                 had_partial_failure = True
-                log_event(
-                    logger,
-                    f"unexpected failure for territory {territory_code}",
-                    run_id=run_id,
-                    stage=stage,
-                    territory=territory_code,
-                    event="STAGE_FAIL",
-                    status="error",
-                    error_code="UNEXPECTED_ERROR",
-                )
-                if args.strict:
+                if _is_hard_fail(error_code, args.strict):
                     return EXIT_HARD_FAIL
         log_event(logger, "stage end", run_id=run_id, stage=stage, event="STAGE_END", status="ok")
 
@@ -123,7 +352,8 @@ def main(argv: list[str] | None = None) -> int:
     args = parse_args(argv or sys.argv[1:])
     try:
         return run_command(args)
-    except PipelineError:
+    except PipelineError as exc:
+        print(f"{exc.error_code}: {exc}", file=sys.stderr)
         return EXIT_HARD_FAIL
     except Exception:
         return EXIT_HARD_FAIL
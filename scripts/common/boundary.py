@@ -0,0 +1,130 @@
+"""Territory boundary polygons with a banded grid index for batch point-in-polygon.
+
+A boundary is configured as ``validation.boundary_wgs84``: either an inline
+GeoJSON Polygon/MultiPolygon (``[lon, lat]`` positions) or a path to a GeoJSON
+file holding a geometry, Feature or FeatureCollection. The config loader
+resolves a relative path against the YAML file that declares it. Rings are
+tested with the even-odd rule, so holes and multiple islands need no special
+handling.
+
+The index splits the boundary's latitude range into horizontal bands and
+records which edges cross each band. A batch query buckets points by band and
+runs one vectorised crossing-number test per band against that band's edges.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from scripts.common.errors import ConfigError
+
+DEFAULT_BANDS = 256
+# Points tested against a band's edges at once; bounds the (points x edges) temporaries.
+QUERY_CHUNK = 4096
+
+
+def _polygon_rings(geometry: dict[str, Any]) -> list[list]:
+    kind = geometry.get("type")
+    coordinates = geometry.get("coordinates") or []
+    if kind == "Polygon":
+        return list(coordinates)
+    if kind == "MultiPolygon":
+        return [ring for polygon in coordinates for ring in polygon]
+    if kind == "Feature":
+        return _polygon_rings(geometry.get("geometry") or {})
+    if kind == "FeatureCollection":
+        return [ring for feature in geometry.get("features") or [] for ring in _polygon_rings(feature)]
+    raise ConfigError(f"Boundary must be a GeoJSON Polygon or MultiPolygon, got {kind!r}")
+
+
+def _edges(rings: list[list]) -> np.ndarray:
+    blocks = []
+    for ring in rings:
+        try:
+            vertices = np.asarray(ring, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ConfigError("Boundary ring positions must be numeric [lon, lat] pairs") from None
+        if vertices.ndim != 2 or vertices.shape[1] < 2 or len(vertices) < 3:
+            raise ConfigError("Boundary rings need at least three [lon, lat] positions")
+        vertices = vertices[:, :2]
+        # Columns: x1, y1, x2, y2; closing edge added whether or not the ring repeats its start.
+        blocks.append(np.hstack([vertices, np.roll(vertices, -1, axis=0)]))
+    if not blocks:
+        raise ConfigError("Boundary has no rings")
+    edges = np.concatenate(blocks)
+    # Horizontal edges never cross a horizontal ray.
+    return edges[edges[:, 1] != edges[:, 3]]
+
+
+class BoundaryIndex:
+    def __init__(self, rings: list[list], bands: int = DEFAULT_BANDS) -> None:
+        edges = _edges(rings)
+        self.min_lon = float(min(edges[:, 0].min(), edges[:, 2].min()))
+        self.max_lon = float(max(edges[:, 0].max(), edges[:, 2].max()))
+        self.min_lat = float(min(edges[:, 1].min(), edges[:, 3].min()))
+        self.max_lat = float(max(edges[:, 1].max(), edges[:, 3].max()))
+        self.bands = max(1, int(bands))
+        self._band_height = (self.max_lat - self.min_lat) / self.bands or 1.0
+
+        low = self._band_of(np.minimum(edges[:, 1], edges[:, 3]))
+        high = self._band_of(np.maximum(edges[:, 1], edges[:, 3]))
+        self._band_edges = []
+        for band in range(self.bands):
+            band_edges = edges[(low <= band) & (high >= band)]
+            x1, y1, x2, y2 = band_edges.T
+            # Precompute the inverse slope so a query is a multiply-add per edge.
+            self._band_edges.append((x1, y1, y2, (x2 - x1) / (y2 - y1)))
+
+    def _band_of(self, lat: np.ndarray) -> np.ndarray:
+        return np.clip(((lat - self.min_lat) / self._band_height).astype(np.int64), 0, self.bands - 1)
+
+    def contains_many(self, lats, lons) -> np.ndarray:
+        lat = np.asarray(lats, dtype=np.float64)
+        lon = np.asarray(lons, dtype=np.float64)
+        inside = np.zeros(lat.shape, dtype=bool)
+        candidate = (lat >= self.min_lat) & (lat <= self.max_lat) & (lon >= self.min_lon) & (lon <= self.max_lon)
+        positions = np.flatnonzero(candidate)
+        if not len(positions):
+            return inside
+
+        point_bands = self._band_of(lat[positions])
+        order = np.argsort(point_bands, kind="stable")
+        positions, point_bands = positions[order], point_bands[order]
+        band_ids, starts = np.unique(point_bands, return_index=True)
+        for band, start, end in zip(band_ids, starts, np.r_[starts[1:], len(positions)]):
+            x1, y1, y2, inverse_slope = self._band_edges[band]
+            if not len(x1):
+                continue
+            for chunk_start in range(start, end, QUERY_CHUNK):
+                chunk = positions[chunk_start : min(end, chunk_start + QUERY_CHUNK)]
+                py = lat[chunk, None]
+                px = lon[chunk, None]
+                straddles = (y1 > py) != (y2 > py)
+                crossings = straddles & (px < x1 + (py - y1) * inverse_slope)
+                inside[chunk] = (np.count_nonzero(crossings, axis=1) % 2) == 1
+        return inside
+
+    def contains(self, lat: float, lon: float) -> bool:
+        return bool(self.contains_many([lat], [lon])[0])
+
+
+def load_boundary(territory_config: dict) -> BoundaryIndex | None:
+    value = territory_config.get("validation", {}).get("boundary_wgs84")
+    if value is None:
+        return None
+    if isinstance(value, str):
+        path = Path(value)
+        if not path.exists():
+            raise ConfigError(f"Boundary file not found: {value}")
+        with path.open("r", encoding="utf-8") as f:
+            try:
+                value = json.load(f)
+            except json.JSONDecodeError as exc:
+                raise ConfigError(f"Boundary file {value} is not valid GeoJSON: {exc}") from exc
+    if not isinstance(value, dict):
+        raise ConfigError("validation.boundary_wgs84 must be a GeoJSON mapping or a file path")
+    return BoundaryIndex(_polygon_rings(value))
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from scripts.common.errors import ConfigError
 from scripts.common.fs import read_yaml
@@ -34,10 +34,38 @@ def _deep_merge(base: Any, overlay: Any) -> Any:
     return overlay
 
 
-def _load_yaml_with_overlay(path: Path, overlay_path: Path | None) -> dict:
+# Rewrites relative file paths in one YAML document against that document's directory.
+PathAnchor = Callable[[dict, Path], None]
+
+
+def _anchor_path(value: Any, base_dir: Path) -> Any:
+    if isinstance(value, str) and value and not Path(value).is_absolute():
+        return str(base_dir / value)
+    return value
+
+
+def _anchor_territory_paths(cfg: dict, base_dir: Path) -> None:
+    validation = cfg.get("validation")
+    if isinstance(validation, dict) and "boundary_wgs84" in validation:
+        validation["boundary_wgs84"] = _anchor_path(validation["boundary_wgs84"], base_dir)
+
+
+def _anchor_lookup_paths(cfg: dict, base_dir: Path) -> None:
+    lookups = cfg.get("lookups")
+    if not isinstance(lookups, dict):
+        return
+    for spec in lookups.values():
+        if isinstance(spec, dict) and "path" in spec:
+            spec["path"] = _anchor_path(spec["path"], base_dir)
+
+
+def _load_yaml_with_overlay(path: Path, overlay_path: Path | None, anchor: PathAnchor | None = None) -> dict:
+    """Base YAML deep-merged with its overlay; ``anchor`` resolves each file's relative paths first."""
     base = read_yaml(path)
     if not isinstance(base, dict):
         raise ConfigError(f"YAML at {path} must be a mapping")
+    if anchor is not None:
+        anchor(base, path.parent)
     if overlay_path is None or not overlay_path.exists():
         return base
     overlay = read_yaml(overlay_path)
@@ -45,6 +73,8 @@ def _load_yaml_with_overlay(path: Path, overlay_path: Path | None) -> dict:
         return base
     if not isinstance(overlay, dict):
         raise ConfigError(f"Overlay YAML at {overlay_path} must be a mapping")
+    if anchor is not None:
+        anchor(overlay, overlay_path.parent)
     return _deep_merge(base, overlay)
 
 
@@ -65,13 +95,14 @@ def load_all_configs(
         overlay_path = None
         if overlay_config_dir is not None:
             overlay_path = overlay_config_dir / path.name
-        cfg = _load_yaml_with_overlay(path, overlay_path)
+        cfg = _load_yaml_with_overlay(path, overlay_path, _anchor_territory_paths)
         territories[code] = validate_territory_config(cfg, allow_unknown=allow_unknown)
 
     onspd = validate_onspd_columns_config(
         _load_yaml_with_overlay(
             config_dir / "onspd_columns.yml",
             (overlay_config_dir / "onspd_columns.yml") if overlay_config_dir is not None else None,
+            _anchor_lookup_paths,
         )
     )
     scoring = validate_scoring_config(
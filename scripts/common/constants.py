@@ -14,6 +14,16 @@ STAGES = (
     "map-onspd",
     "validate",
 )
+# Raw harvest payloads under the data dir, by source name.
+RAW_SOURCES = {
+    "arcgis": "raw/arcgis/{territory}_arcgis.json",
+    "overpass": "raw/osm/overpass/{territory}_overpass.json",
+    "geofabrik": "raw/osm/geofabrik/{territory}_geofabrik.json",
+}
+# Default for output.delta_move_threshold_m: smaller coordinate moves are not a delta change.
+DEFAULT_DELTA_MOVE_THRESHOLD_M = 10.0
+# Confidence scores are stored as one unsigned byte in the binary lookup file.
+CONFIDENCE_SCORE_RANGE = (0, 255)
 EXIT_SUCCESS = 0
 EXIT_PARTIAL = 10
 EXIT_HARD_FAIL = 20
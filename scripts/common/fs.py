@@ -5,7 +5,7 @@ from __future__ import annotations
 import csv
 import json
 from pathlib import Path
-from typing import Iterable, Mapping
+from typing import Iterable, Iterator, Mapping
 
 
 def ensure_dir(path: Path) -> None:
@@ -38,3 +38,97 @@ def write_csv(path: Path, headers: list[str], rows: Iterable[Mapping[str, object
         writer.writeheader()
         for row in rows:
             writer.writerow(row)
+
+
+def write_json_lines(path: Path, rows: Iterable[object]) -> None:
+    ensure_dir(path.parent)
+    with path.open("w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+
+
+def iter_json_lines(path: Path) -> Iterator:
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_READ_CHUNK = 1 << 20
+
+
+class _JsonStream:
+    """Incremental reader over a JSON document, decoding one value at a time."""
+
+    def __init__(self, f) -> None:
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(_JSON_READ_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def take(self, expected: str) -> str:
+        char = self.peek()
+        if char not in expected:
+            raise ValueError(f"Malformed JSON stream: expected one of {expected!r}, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _JSON_DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A scalar ending exactly at the buffer edge may be truncated (e.g. 12|3).
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(path: Path, key: str) -> Iterator:
+    """Yield items of the top-level ``key`` array without loading the whole document."""
+    with path.open("r", encoding="utf-8") as f:
+        stream = _JsonStream(f)
+        stream.take("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            name = stream.value()
+            stream.take(":")
+            if name == key:
+                stream.take("[")
+                if stream.peek() == "]":
+                    stream.take("]")
+                else:
+                    while True:
+                        yield stream.value()
+                        if stream.take(",]") == "]":
+                            break
+            else:
+                stream.value()
+            if stream.take(",}") == "}":
+                return
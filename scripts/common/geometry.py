@@ -1,8 +1,37 @@
-"""Geometry helpers."""
+"""Geometry helpers.
+
+Centroids are computed in batches: every geometry in a chunk is flattened into
+one coordinate buffer with per-vertex ring and geometry ids, so area and length
+weighting run as NumPy reductions rather than per-vertex Python loops.
+"""
 
 from __future__ import annotations
 
-from typing import Any
+import math
+from typing import Any, Iterable
+
+import numpy as np
+
+from scripts.common.errors import ConfigError
+
+# Ring kinds inside the flattened buffer.
+_KIND_AREA = 0
+_KIND_LINE = 1
+_KIND_POINT = 2
+
+GEOMETRY_POLICY_KEEP = "keep"
+GEOMETRY_POLICY_CENTROID_ONLY = "centroid_only"
+GEOMETRY_POLICY_SIMPLIFY = "simplify"
+
+# Relative to the squared ring perimeter, so the test is unit independent.
+_AREA_EPSILON = 1e-9
+_KM_PER_DEGREE = 111.32
+
+
+def approx_distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    # Equirectangular approximation; ample at territory scale.
+    x = (lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    return math.hypot(x, lat2 - lat1) * _KM_PER_DEGREE
 
 
 def extract_point_from_geometry(geometry: dict[str, Any] | None) -> tuple[float | None, float | None]:
@@ -13,3 +42,316 @@ def extract_point_from_geometry(geometry: dict[str, Any] | None) -> tuple[float
     if x is None or y is None:
         return None, None
     return float(y), float(x)
+
+
+def _is_position(value: object) -> bool:
+    return (
+        isinstance(value, (list, tuple))
+        and len(value) >= 2
+        and isinstance(value[0], (int, float))
+        and isinstance(value[1], (int, float))
+    )
+
+
+def _geometry_parts(geometry: dict[str, Any] | None) -> list[tuple[int, list]]:
+    """Split ArcGIS JSON or GeoJSON geometry into (kind, vertex list) parts."""
+    if not isinstance(geometry, dict):
+        return []
+
+    # ArcGIS JSON geometries.
+    if "rings" in geometry:
+        return [(_KIND_AREA, ring) for ring in geometry.get("rings") or []]
+    if "paths" in geometry:
+        return [(_KIND_LINE, path) for path in geometry.get("paths") or []]
+    if "points" in geometry:
+        return [(_KIND_POINT, geometry.get("points") or [])]
+    if geometry.get("x") is not None and geometry.get("y") is not None:
+        return [(_KIND_POINT, [[geometry["x"], geometry["y"]]])]
+
+    # GeoJSON geometries.
+    geom_type = geometry.get("type")
+    coordinates = geometry.get("coordinates")
+    if not isinstance(coordinates, list):
+        if geom_type == "GeometryCollection":
+            parts: list[tuple[int, list]] = []
+            for member in geometry.get("geometries") or []:
+                parts.extend(_geometry_parts(member))
+            return parts
+        return []
+    if geom_type == "Point":
+        return [(_KIND_POINT, [coordinates])]
+    if geom_type == "MultiPoint":
+        return [(_KIND_POINT, coordinates)]
+    if geom_type == "LineString":
+        return [(_KIND_LINE, coordinates)]
+    if geom_type == "MultiLineString":
+        return [(_KIND_LINE, line) for line in coordinates]
+    if geom_type == "Polygon":
+        return [(_KIND_AREA, ring) for ring in coordinates]
+    if geom_type == "MultiPolygon":
+        return [(_KIND_AREA, ring) for polygon in coordinates for ring in polygon]
+    return []
+
+
+def _ring_array(vertices: list) -> np.ndarray | None:
+    try:
+        arr = np.asarray(vertices, dtype=np.float64)
+    except (TypeError, ValueError):
+        # Ragged or partly malformed vertex lists: keep the usable positions.
+        arr = np.asarray([v[:2] for v in vertices if _is_position(v)], dtype=np.float64)
+    if arr.ndim != 2 or arr.shape[1] < 2 or arr.shape[0] == 0:
+        return None
+    return arr[:, :2]
+
+
+def _flatten(geometries: list[dict[str, Any] | None]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Return (xy, vertex_ring, ring_geometry, ring_kind) buffers for a batch."""
+    blocks: list[np.ndarray] = []
+    ring_geometry: list[int] = []
+    ring_kind: list[int] = []
+
+    for geom_idx, geometry in enumerate(geometries):
+        for kind, vertices in _geometry_parts(geometry):
+            if not isinstance(vertices, list):
+                continue
+            arr = _ring_array(vertices)
+            if arr is None:
+                continue
+            if kind == _KIND_AREA and not np.array_equal(arr[0], arr[-1]):
+                arr = np.vstack([arr, arr[:1]])
+            blocks.append(arr)
+            ring_kind.append(kind)
+            ring_geometry.append(geom_idx)
+
+    if not blocks:
+        empty = np.empty(0, dtype=np.int64)
+        return np.empty((0, 2), dtype=np.float64), empty, empty, empty
+
+    ring_sizes = np.fromiter((len(block) for block in blocks), dtype=np.int64, count=len(blocks))
+    return (
+        np.concatenate(blocks),
+        np.repeat(np.arange(len(blocks), dtype=np.int64), ring_sizes),
+        np.asarray(ring_geometry, dtype=np.int64),
+        np.asarray(ring_kind, dtype=np.int64),
+    )
+
+
+def batch_centroids(geometries: Iterable[dict[str, Any] | None]) -> list[tuple[float | None, float | None]]:
+    """Compute (y, x) centroids for a batch of ArcGIS JSON or GeoJSON geometries.
+
+    Polygons use the area-weighted (shoelace) centroid with holes subtracted by
+    ring orientation, polylines use the length-weighted segment midpoint, and
+    points use the vertex mean. Degenerate shapes fall back to the next
+    lower-dimensional rule. Geometries without usable vertices yield
+    ``(None, None)``.
+    """
+    geometries = list(geometries)
+    count = len(geometries)
+    if count == 0:
+        return []
+
+    xy, vertex_ring, ring_geometry, ring_kind = _flatten(geometries)
+    if len(xy) == 0:
+        return [(None, None)] * count
+
+    vertex_geometry = ring_geometry[vertex_ring]
+    vertex_kind = ring_kind[vertex_ring]
+
+    # Shift each geometry to its first vertex so projected coordinates
+    # (e.g. OSGB36 eastings) keep full precision in the cross products.
+    present, first_vertex = np.unique(vertex_geometry, return_index=True)
+    origin = np.zeros((count, 2), dtype=np.float64)
+    origin[present] = xy[first_vertex]
+    local = xy - origin[vertex_geometry]
+    x = local[:, 0]
+    y = local[:, 1]
+
+    # Edges join consecutive vertices of the same ring.
+    same_ring = vertex_ring[:-1] == vertex_ring[1:]
+    edge_geometry = vertex_geometry[:-1][same_ring]
+    edge_kind = vertex_kind[:-1][same_ring]
+    x0, x1 = x[:-1][same_ring], x[1:][same_ring]
+    y0, y1 = y[:-1][same_ring], y[1:][same_ring]
+
+    area_edges = edge_kind == _KIND_AREA
+    cross = np.where(area_edges, x0 * y1 - x1 * y0, 0.0)
+    area2 = np.bincount(edge_geometry, weights=cross, minlength=count)
+    area_cx = np.bincount(edge_geometry, weights=(x0 + x1) * cross, minlength=count)
+    area_cy = np.bincount(edge_geometry, weights=(y0 + y1) * cross, minlength=count)
+
+    # Lines (and polygon outlines, used when a polygon has no area).
+    seg_len = np.hypot(x1 - x0, y1 - y0)
+    line_weight = np.where(area_edges, 0.0, seg_len)
+    line_len = np.bincount(edge_geometry, weights=line_weight, minlength=count)
+    line_cx = np.bincount(edge_geometry, weights=(x0 + x1) * 0.5 * line_weight, minlength=count)
+    line_cy = np.bincount(edge_geometry, weights=(y0 + y1) * 0.5 * line_weight, minlength=count)
+    outline_weight = np.where(area_edges, seg_len, 0.0)
+    outline_len = np.bincount(edge_geometry, weights=outline_weight, minlength=count)
+    outline_cx = np.bincount(edge_geometry, weights=(x0 + x1) * 0.5 * outline_weight, minlength=count)
+    outline_cy = np.bincount(edge_geometry, weights=(y0 + y1) * 0.5 * outline_weight, minlength=count)
+
+    vertex_count = np.bincount(vertex_geometry, minlength=count)
+    mean_x = np.bincount(vertex_geometry, weights=x, minlength=count)
+    mean_y = np.bincount(vertex_geometry, weights=y, minlength=count)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cx = np.where(vertex_count > 0, mean_x / vertex_count, np.nan)
+        cy = np.where(vertex_count > 0, mean_y / vertex_count, np.nan)
+
+        has_outline = outline_len > 0
+        cx = np.where(has_outline, outline_cx / outline_len, cx)
+        cy = np.where(has_outline, outline_cy / outline_len, cy)
+
+        has_line = line_len > 0
+        cx = np.where(has_line, line_cx / line_len, cx)
+        cy = np.where(has_line, line_cy / line_len, cy)
+
+        has_area = np.abs(area2) > _AREA_EPSILON * outline_len * outline_len
+        cx = np.where(has_area, area_cx / (3.0 * area2), cx)
+        cy = np.where(has_area, area_cy / (3.0 * area2), cy)
+
+    cx = cx + origin[:, 0]
+    cy = cy + origin[:, 1]
+
+    out: list[tuple[float | None, float | None]] = []
+    for idx in range(count):
+        if vertex_count[idx] == 0 or not (np.isfinite(cx[idx]) and np.isfinite(cy[idx])):
+            out.append((None, None))
+        else:
+            out.append((float(cy[idx]), float(cx[idx])))
+    return out
+
+
+def geometry_centroid(geometry: dict[str, Any] | None) -> tuple[float | None, float | None]:
+    return batch_centroids([geometry])[0]
+
+
+def parse_geometry_policy(value: str | None) -> tuple[str, float | None]:
+    """Parse a per-source geometry policy: ``keep``, ``centroid_only`` or ``simplify:<tolerance>``."""
+    if value is None:
+        return GEOMETRY_POLICY_KEEP, None
+    text = str(value).strip()
+    if text in (GEOMETRY_POLICY_KEEP, GEOMETRY_POLICY_CENTROID_ONLY):
+        return text, None
+    if text.startswith(f"{GEOMETRY_POLICY_SIMPLIFY}:"):
+        try:
+            tolerance = float(text[len(GEOMETRY_POLICY_SIMPLIFY) + 1 :])
+        except ValueError as exc:
+            raise ConfigError(f"Invalid simplify tolerance in geometry_policy={value!r}") from exc
+        if tolerance < 0:
+            raise ConfigError(f"Simplify tolerance must be non-negative in geometry_policy={value!r}")
+        return GEOMETRY_POLICY_SIMPLIFY, tolerance
+    raise ConfigError(f"Unknown geometry_policy={value!r}")
+
+
+def _segment_distances(points: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    direction = end - start
+    length_sq = float(direction @ direction)
+    offsets = points - start
+    if length_sq == 0.0:
+        return np.hypot(offsets[:, 0], offsets[:, 1])
+    t = np.clip((offsets @ direction) / length_sq, 0.0, 1.0)
+    nearest = start + t[:, None] * direction
+    delta = points - nearest
+    return np.hypot(delta[:, 0], delta[:, 1])
+
+
+def _douglas_peucker_mask(points: np.ndarray, tolerance: float) -> np.ndarray:
+    count = len(points)
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = _segment_distances(points[first + 1 : last], points[first], points[last])
+        offset = int(np.argmax(distances))
+        if distances[offset] > tolerance:
+            split = first + 1 + offset
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
+
+
+def _simplify_vertices(vertices: list, tolerance: float, *, closed: bool) -> list:
+    arr = _ring_array(vertices) if isinstance(vertices, list) else None
+    if arr is None or len(arr) != len(vertices) or len(arr) < 3:
+        return vertices
+
+    if closed:
+        # A closed ring has no baseline: split it at the vertex farthest from the start.
+        offsets = arr - arr[0]
+        pivot = int(np.argmax(np.hypot(offsets[:, 0], offsets[:, 1])))
+        if pivot == 0:
+            return vertices
+        keep = np.concatenate(
+            [
+                _douglas_peucker_mask(arr[: pivot + 1], tolerance)[:-1],
+                _douglas_peucker_mask(arr[pivot:], tolerance),
+            ]
+        )
+        if int(keep.sum()) < 4:
+            return vertices
+    else:
+        keep = _douglas_peucker_mask(arr, tolerance)
+
+    return [vertices[idx] for idx in np.flatnonzero(keep)]
+
+
+def simplify_geometry(geometry: dict[str, Any] | None, tolerance: float) -> dict[str, Any] | None:
+    """Douglas-Peucker simplification of ArcGIS or GeoJSON rings and paths.
+
+    ``tolerance`` is in the geometry's own units. Rings that would collapse
+    below four vertices are left as they are.
+    """
+    if not isinstance(geometry, dict):
+        return geometry
+    out = dict(geometry)
+    if "rings" in geometry:
+        out["rings"] = [_simplify_vertices(ring, tolerance, closed=True) for ring in geometry.get("rings") or []]
+    elif "paths" in geometry:
+        out["paths"] = [_simplify_vertices(path, tolerance, closed=False) for path in geometry.get("paths") or []]
+    elif geometry.get("type") == "LineString":
+        out["coordinates"] = _simplify_vertices(geometry.get("coordinates") or [], tolerance, closed=False)
+    elif geometry.get("type") == "MultiLineString":
+        out["coordinates"] = [
+            _simplify_vertices(line, tolerance, closed=False) for line in geometry.get("coordinates") or []
+        ]
+    elif geometry.get("type") == "Polygon":
+        out["coordinates"] = [
+            _simplify_vertices(ring, tolerance, closed=True) for ring in geometry.get("coordinates") or []
+        ]
+    elif geometry.get("type") == "MultiPolygon":
+        out["coordinates"] = [
+            [_simplify_vertices(ring, tolerance, closed=True) for ring in polygon]
+            for polygon in geometry.get("coordinates") or []
+        ]
+    return out
+
+
+def apply_geometry_policy(
+    geometry: dict[str, Any] | None,
+    policy: tuple[str, float | None],
+    centroid: tuple[float | None, float | None],
+) -> dict[str, Any] | None:
+    """Reduce a raw geometry according to a parsed source policy.
+
+    ``centroid_only`` replaces the geometry with its ``(y, x)`` centroid as an
+    ArcGIS point, keeping the spatial reference so the source WKID survives.
+    """
+    if not geometry:
+        return geometry
+    name, tolerance = policy
+    if name == GEOMETRY_POLICY_CENTROID_ONLY:
+        y, x = centroid
+        if x is None or y is None:
+            return None
+        point: dict[str, Any] = {"x": x, "y": y}
+        if "spatialReference" in geometry:
+            point["spatialReference"] = geometry["spatialReference"]
+        return point
+    if name == GEOMETRY_POLICY_SIMPLIFY and tolerance is not None:
+        return simplify_geometry(geometry, tolerance)
+    return geometry
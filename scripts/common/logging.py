@@ -34,8 +34,10 @@ class JsonLineFormatter(logging.Formatter):
         return json.dumps(payload, ensure_ascii=False)
 
 
-def build_logger(run_id: str, data_dir: Path, level: str = "INFO") -> logging.Logger:
-    logger = logging.getLogger(f"crown_postcodes.{run_id}")
+def build_logger(run_id: str, data_dir: Path, level: str = "INFO", territory: str | None = None) -> logging.Logger:
+    """JSON-lines logger for ``run_id``; a ``territory`` worker gets a log file of its own."""
+    name = run_id if territory is None else f"{run_id}.{territory.lower()}"
+    logger = logging.getLogger(f"crown_postcodes.{name}")
     logger.setLevel(level.upper())
     logger.handlers.clear()
 
@@ -43,7 +45,7 @@ def build_logger(run_id: str, data_dir: Path, level: str = "INFO") -> logging.Lo
     stream.setFormatter(JsonLineFormatter())
     logger.addHandler(stream)
 
-    log_path = data_dir / "run_meta" / f"{run_id}.log.jsonl"
+    log_path = data_dir / "run_meta" / f"{name}.log.jsonl"
     ensure_dir(log_path.parent)
     file_handler = logging.FileHandler(log_path, encoding="utf-8")
     file_handler.setFormatter(JsonLineFormatter())
@@ -2,12 +2,48 @@
 
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass
-from typing import Any
+import sys
+from dataclasses import dataclass
+from typing import Any, Iterator
 
 
-@dataclass(frozen=True)
-class RawRecord:
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class _RecordAccess:
+    """Read-only mapping-style access, so records pass through code written for row dicts."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Fields absent from a source payload are stored as None, so treat None as missing.
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def keys(self) -> Iterator[str]:
+        return iter(self.__dataclass_fields__)
+
+    def items(self) -> Iterator[tuple[str, Any]]:
+        return ((name, getattr(self, name)) for name in self.__dataclass_fields__)
+
+    def to_dict(self) -> dict[str, Any]:
+        # Shallow on purpose: asdict() would deep-copy nested payloads such as raw_geometry.
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
+
+    @classmethod
+    def from_dict(cls, payload: dict[str, Any]):
+        return cls(**{name: payload.get(name) for name in cls.__dataclass_fields__})
+
+
+@dataclass(frozen=True, slots=True)
+class RawRecord(_RecordAccess):
     territory: str
     source_name: str
     source_class: str
@@ -21,5 +57,32 @@ class RawRecord:
     run_id: str
     raw_payload_ref: str | None
 
-    def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+    def __post_init__(self) -> None:
+        # A handful of distinct values repeated on every row; share one string each.
+        for name in ("territory", "source_name", "source_class", "extract_date", "run_id"):
+            object.__setattr__(self, name, _intern(getattr(self, name)))
+
+
+@dataclass(slots=True)
+class CanonicalRow(_RecordAccess):
+    territory: str
+    postcode: str
+    normalised_postcode: str
+    source_list: str
+    source_count: int
+    has_coordinates: bool
+    lat: float | None
+    lon: float | None
+    coordinate_source: str | None
+    confidence_score: int
+    first_seen: str
+    last_seen: str
+    notes: str | None
+
+    def __post_init__(self) -> None:
+        self.territory = _intern(self.territory)
+        self.coordinate_source = _intern(self.coordinate_source)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        # Temporal tracking stamps first_seen/last_seen in place.
+        setattr(self, key, value)
@@ -2,7 +2,15 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable
+
+from scripts.common.fs import ensure_dir, read_json
 
 UK_UNIT_POSTCODE_RE = re.compile(r"^([A-Z]{1,2}\d[A-Z\d]?)\s(\d[A-Z]{2})$")
 _EMBEDDED_POSTCODE_RE = re.compile(r"\b([A-Z]{1,2}\d[A-Z\d]?\s*\d[A-Z]{2})\b")
@@ -12,7 +20,17 @@ _WHITESPACE_RE = re.compile(r"\s+")
 
 
 def is_valid_uk_unit_postcode(value: str) -> bool:
-    return bool(UK_UNIT_POSTCODE_RE.match(value))
+    # fullmatch: ``$`` alone would also accept a trailing newline.
+    return bool(UK_UNIT_POSTCODE_RE.fullmatch(value))
+
+
+def fixed_width_postcode(normalised: str, width: int) -> str:
+    """``normalised`` ("<outward> <inward>") with the outward code padded to ``width - 3`` characters.
+
+    Width 7 gives ONSPD's ``pcd`` form ("GY101AA", "JE2 3AB") and width 8 its
+    ``pcd2`` form ("GY10 1AA", "JE2  3AB"). Blank stays blank.
+    """
+    return normalised[:-4].ljust(width - 3) + normalised[-3:] if normalised else ""
 
 
 def normalise_postcode(raw: str | None) -> str | None:
@@ -41,3 +59,93 @@ def normalise_postcode(raw: str | None) -> str | None:
         return None
 
     return cleaned
+
+
+# Already-normalised values (upper case, single ASCII space) need only one scan.
+_CLEAN_POSTCODE_RE = re.compile(r"[A-Z]{1,2}\d[A-Z\d]? \d[A-Z]{2}")
+
+# Bump whenever normalise_postcode's logic changes, not only its patterns.
+NORMALISATION_RULES_VERSION = 2
+
+# Persisted caches are only reused when the normalisation rules are unchanged.
+_RULES_FINGERPRINT = hashlib.sha256(
+    "\n".join(
+        [
+            str(NORMALISATION_RULES_VERSION),
+            *(
+                pattern.pattern
+                for pattern in (UK_UNIT_POSTCODE_RE, _EMBEDDED_POSTCODE_RE, _PUNCTUATION_RE, _WHITESPACE_RE)
+            ),
+        ]
+    ).encode("utf-8")
+).hexdigest()[:16]
+
+DEFAULT_CACHE_SIZE = 200_000
+
+
+class PostcodeNormaliser:
+    """Memoising wrapper around ``normalise_postcode`` with a bounded LRU."""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self.cache: OrderedDict[str, str | None] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, raw: str, value: str | None) -> None:
+        self.cache[raw] = value
+        if len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
+    def normalise(self, raw: str | None) -> str | None:
+        if raw is None:
+            return None
+        try:
+            value = self.cache[raw]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            self.cache.move_to_end(raw)
+            return value
+
+        self.misses += 1
+        value = raw if _CLEAN_POSTCODE_RE.fullmatch(raw) else normalise_postcode(raw)
+        self._remember(raw, value)
+        return value
+
+    def normalise_many(self, values: Iterable[str | None]) -> list[str | None]:
+        values = list(values)
+        resolved = {raw: self.normalise(raw) for raw in dict.fromkeys(values)}
+        return [resolved[raw] for raw in values]
+
+    def load(self, path: Path) -> None:
+        """Reuse a saved cache; a missing, unreadable or stale one is treated as empty."""
+        if not path.exists():
+            return
+        try:
+            payload = read_json(path)
+        except (OSError, ValueError):
+            return
+        if not isinstance(payload, dict) or payload.get("rules_fingerprint") != _RULES_FINGERPRINT:
+            return
+        for raw, value in (payload.get("entries") or {}).items():
+            self._remember(raw, value)
+
+    def save(self, path: Path) -> None:
+        ensure_dir(path.parent)
+        payload = {"rules_fingerprint": _RULES_FINGERPRINT, "entries": dict(self.cache)}
+        # Compact on purpose: the cache can hold hundreds of thousands of entries.
+        # Replace atomically, so an interrupted run leaves the previous cache intact.
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp_path, path)
+
+
+def normalise_many(
+    values: Iterable[str | None],
+    normaliser: PostcodeNormaliser | None = None,
+) -> list[str | None]:
+    return (normaliser or PostcodeNormaliser()).normalise_many(values)
@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
 
+from scripts.common.boundary import load_boundary
+from scripts.common.constants import CONFIDENCE_SCORE_RANGE, DEFAULT_DELTA_MOVE_THRESHOLD_M
 from scripts.common.errors import ConfigError
+from scripts.common.geometry import parse_geometry_policy
+from scripts.common.scoring import compile_scoring_profile
 
 
 @dataclass(frozen=True)
@@ -52,7 +57,10 @@ def validate_territory_config(cfg: dict, *, allow_unknown: bool = False) -> dict
         {"min_lat", "max_lat", "min_lon", "max_lon"},
         "validation.bbox_wgs84",
     )
+    load_boundary(cfg)
     _assert_required_keys(cfg["arcgis"], {"enabled", "services"}, "arcgis")
+    for service in cfg["arcgis"]["services"] or []:
+        parse_geometry_policy(service.get("geometry_policy"))
     _assert_required_keys(
         cfg["overpass"],
         {"enabled", "endpoint", "timeout_seconds", "area_strategy"},
@@ -66,18 +74,65 @@ def validate_territory_config(cfg: dict, *, allow_unknown: bool = False) -> dict
     )
     _assert_required_keys(cfg["crs"], set(), "crs")
     _assert_required_keys(cfg["output"], {"canonical_filename", "onspd_filename"}, "output")
+    move_threshold = cfg["output"].get("delta_move_threshold_m", DEFAULT_DELTA_MOVE_THRESHOLD_M)
+    if isinstance(move_threshold, bool) or not isinstance(move_threshold, (int, float)) or move_threshold < 0:
+        raise ConfigError("output.delta_move_threshold_m must be a non-negative number")
 
     return cfg
 
 
+_MAPPING_KINDS = {"date", "computed", "lookup", "constant"}
+
+
+def _validate_source_mapping(mapping: object, lookups: dict, context: str) -> None:
+    if isinstance(mapping, str):
+        return
+    if not isinstance(mapping, dict):
+        raise ConfigError(f"{context}.source_mapping must be a string or a mapping")
+    kinds = _MAPPING_KINDS & set(mapping)
+    if len(kinds) != 1:
+        raise ConfigError(f"{context}.source_mapping needs exactly one of {sorted(_MAPPING_KINDS)}")
+    if "lookup" in kinds:
+        _assert_required_keys(mapping, {"lookup", "key", "value"}, f"{context}.source_mapping")
+        if mapping["lookup"] not in lookups:
+            raise ConfigError(f"{context}.source_mapping uses undeclared lookup {mapping['lookup']!r}")
+
+
+_COLUMN_TYPES = {"string", "integer", "float", "date"}
+
+
+def _validate_column_contract(col: dict, context: str) -> None:
+    if col["type"] not in _COLUMN_TYPES:
+        raise ConfigError(f"{context}.type must be one of {sorted(_COLUMN_TYPES)}")
+    if not isinstance(col["nullable"], bool):
+        raise ConfigError(f"{context}.nullable must be true or false")
+    if col["type"] == "date" and not isinstance(col.get("format"), str):
+        raise ConfigError(f"{context}.format is required for date columns")
+    if "pattern" in col:
+        try:
+            re.compile(col["pattern"])
+        except (re.error, TypeError) as exc:
+            raise ConfigError(f"{context}.pattern is not a valid regular expression: {exc}") from exc
+
+
 def validate_onspd_columns_config(cfg: dict) -> dict:
     _assert_required_keys(cfg, {"version", "null_policy", "columns"}, "onspd_columns")
     if not isinstance(cfg["columns"], list) or not cfg["columns"]:
         raise ConfigError("onspd_columns.columns must be a non-empty list")
 
+    lookups = cfg.get("lookups") or {}
+    if not isinstance(lookups, dict):
+        raise ConfigError("onspd_columns.lookups must be a mapping")
+    for name, spec in lookups.items():
+        if not isinstance(spec, dict):
+            raise ConfigError(f"onspd_columns.lookups.{name} must be a mapping")
+        _assert_required_keys(spec, {"path", "key"}, f"lookups.{name}")
+
     names: list[str] = []
     for idx, col in enumerate(cfg["columns"]):
         _assert_required_keys(col, {"name", "type", "nullable", "source_mapping"}, f"columns[{idx}]")
+        _validate_column_contract(col, f"columns[{idx}]")
+        _validate_source_mapping(col["source_mapping"], lookups, f"columns[{idx}]")
         names.append(col["name"])
 
     dupes = {name for name in names if names.count(name) > 1}
@@ -91,4 +146,17 @@ def validate_scoring_config(cfg: dict) -> dict:
     _assert_required_keys(cfg, {"profiles"}, "scoring_rules")
     if not isinstance(cfg["profiles"], dict) or not cfg["profiles"]:
         raise ConfigError("scoring_rules.profiles must be a non-empty mapping")
+    for name, profile in cfg["profiles"].items():
+        if not isinstance(profile, dict):
+            raise ConfigError(f"scoring_rules.profiles.{name} must be a mapping")
+        try:
+            compile_scoring_profile(profile)
+        except ConfigError as exc:
+            raise ConfigError(f"scoring_rules.profiles.{name}: {exc}") from exc
+        clamp_cfg = profile.get("clamp", {"min": 0, "max": 100})
+        lowest, highest = CONFIDENCE_SCORE_RANGE
+        if not lowest <= int(clamp_cfg["min"]) <= int(clamp_cfg["max"]) <= highest:
+            raise ConfigError(
+                f"scoring_rules.profiles.{name}.clamp must satisfy {lowest} <= min <= max <= {highest}: {clamp_cfg!r}"
+            )
     return cfg
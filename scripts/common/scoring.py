@@ -2,43 +2,111 @@
 
 from __future__ import annotations
 
+import re
+import sys
+from dataclasses import dataclass
+from itertools import product
+
+from scripts.common.errors import ConfigError
+
+_PREDICATE_RE = re.compile(r"^(has_source|coord_source)\(([^()]+)\)$")
+# Rules referencing more source classes than this would make the table unwieldy.
+MAX_COMPILED_SOURCE_CLASSES = 12
+
 
 def clamp(value: int, *, minimum: int, maximum: int) -> int:
     return max(minimum, min(maximum, value))
 
 
-def _evaluate_condition(condition: str, *, source_classes: set[str], coordinate_source: str | None) -> bool:
-    condition = condition.strip()
-    if condition.startswith("has_source(") and condition.endswith(")"):
-        source = condition[len("has_source(") : -1]
-        return source in source_classes
-    if condition.startswith("coord_source(") and condition.endswith(")"):
-        source = condition[len("coord_source(") : -1]
-        return source == coordinate_source
-    return False
+@dataclass(frozen=True)
+class CompiledScoringProfile:
+    """Scoring profile resolved into a table keyed by (source-class bitmask, coordinate source).
+
+    Only source classes and coordinate sources named by a rule affect the score,
+    so anything else maps to bit 0 / ``None``. Explanations in the table are
+    shared between postcodes and must not be mutated.
+    """
+
+    class_bits: dict[str, int]
+    coordinate_sources: frozenset[str]
+    table: dict[tuple[int, str | None], tuple[int, dict]]
+
+    def score(self, *, source_classes: set[str], coordinate_source: str | None) -> tuple[int, dict]:
+        mask = 0
+        for source_class in source_classes:
+            mask |= self.class_bits.get(source_class, 0)
+        if coordinate_source not in self.coordinate_sources:
+            coordinate_source = None
+        return self.table[(mask, coordinate_source)]
+
+
+def _parse_condition(condition: str, rule_id: str) -> tuple[str, str]:
+    match = _PREDICATE_RE.match(str(condition).strip())
+    if match is None:
+        raise ConfigError(f"Unknown scoring predicate in rule {rule_id!r}: {condition!r}")
+    return match.group(1), match.group(2)
+
+
+def compile_scoring_profile(profile: dict) -> CompiledScoringProfile:
+    rules: list[tuple[str, str, str, int]] = []
+    for rule in profile.get("rules", []):
+        rule_id = sys.intern(str(rule.get("id", "unnamed_rule")))
+        predicate, argument = _parse_condition(rule.get("when", ""), rule_id)
+        try:
+            add = int(rule.get("add", 0))
+        except (TypeError, ValueError):
+            raise ConfigError(f"Scoring rule {rule_id!r} has a non-integer add: {rule.get('add')!r}") from None
+        rules.append((rule_id, predicate, argument, add))
+
+    try:
+        clamp_cfg = profile.get("clamp", {"min": 0, "max": 100})
+        minimum, maximum = int(clamp_cfg["min"]), int(clamp_cfg["max"])
+    except (KeyError, TypeError, ValueError):
+        raise ConfigError(f"Scoring profile clamp must define integer min and max: {profile.get('clamp')!r}") from None
+
+    classes = sorted({argument for _id, predicate, argument, _add in rules if predicate == "has_source"})
+    if len(classes) > MAX_COMPILED_SOURCE_CLASSES:
+        raise ConfigError(f"Scoring profile references too many source classes ({len(classes)})")
+    class_bits = {source_class: 1 << idx for idx, source_class in enumerate(classes)}
+    coordinate_sources = frozenset(
+        argument for _id, predicate, argument, _add in rules if predicate == "coord_source"
+    )
+
+    table: dict[tuple[int, str | None], tuple[int, dict]] = {}
+    # Combinations that apply the same rules share one (score, explanation) entry.
+    interned: dict[tuple, tuple[int, dict]] = {}
+    for mask, coordinate_source in product(range(1 << len(classes)), [None, *sorted(coordinate_sources)]):
+        raw_score = 0
+        applied_rules: list[str] = []
+        for rule_id, predicate, argument, add in rules:
+            if predicate == "has_source":
+                matched = bool(mask & class_bits[argument])
+            else:
+                matched = argument == coordinate_source
+            if matched:
+                raw_score += add
+                applied_rules.append(rule_id)
+
+        signature = tuple(applied_rules)
+        if signature not in interned:
+            clamped_score = clamp(raw_score, minimum=minimum, maximum=maximum)
+            explanation = {
+                "applied_rules": applied_rules,
+                "raw_score": raw_score,
+                "clamped_score": clamped_score,
+            }
+            interned[signature] = (clamped_score, explanation)
+        table[(mask, coordinate_source)] = interned[signature]
+
+    return CompiledScoringProfile(class_bits=class_bits, coordinate_sources=coordinate_sources, table=table)
 
 
 def apply_scoring_profile(
-    profile: dict,
+    profile: dict | CompiledScoringProfile,
     *,
     source_classes: set[str],
     coordinate_source: str | None,
 ) -> tuple[int, dict]:
-    raw_score = 0
-    applied_rules: list[str] = []
-
-    for rule in profile.get("rules", []):
-        condition = rule.get("when", "")
-        if _evaluate_condition(condition, source_classes=source_classes, coordinate_source=coordinate_source):
-            raw_score += int(rule.get("add", 0))
-            applied_rules.append(rule.get("id", "unnamed_rule"))
-
-    clamp_cfg = profile.get("clamp", {"min": 0, "max": 100})
-    clamped_score = clamp(raw_score, minimum=int(clamp_cfg["min"]), maximum=int(clamp_cfg["max"]))
-
-    explanation = {
-        "applied_rules": applied_rules,
-        "raw_score": raw_score,
-        "clamped_score": clamped_score,
-    }
-    return clamped_score, explanation
+    if not isinstance(profile, CompiledScoringProfile):
+        profile = compile_scoring_profile(profile)
+    return profile.score(source_classes=source_classes, coordinate_source=coordinate_source)
@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+import json
 from pathlib import Path
 from urllib.parse import urlparse
 
 from scripts.common.arcgis_hosts import resolve_arcgis_service_url
 from scripts.common.fs import ensure_dir, write_json
+from scripts.common.geometry import apply_geometry_policy, batch_centroids, parse_geometry_policy
 from scripts.common.http import HttpClient, HttpRequestError, TimeoutConfig
 from scripts.common.models import RawRecord
 
@@ -54,6 +56,12 @@ def _safe_float(value: object) -> float | None:
         return None
 
 
+def _geometry_bytes(geometry: dict | None) -> int:
+    if not geometry:
+        return 0
+    return len(json.dumps(geometry, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+
+
 def _fetch_ids(client: HttpClient, layer_url: str, where: str) -> tuple[str | None, list[int]]:
     payload = client.get_json(
         f"{layer_url}/query",
@@ -154,6 +162,7 @@ def run_arcgis_harvest(
     lon_candidates = territory_config["fields"]["lon_candidates"]
 
     rows: list[RawRecord] = []
+    geometry_stats: dict[str, dict] = {}
 
     owns_client = http_client is None
     client = http_client or HttpClient()
@@ -168,6 +177,17 @@ def run_arcgis_harvest(
             id_chunk_size = int(service.get("id_chunk_size", 500))
             out_fields = service.get("out_fields", "*")
             return_geometry = bool(service.get("return_geometry", True))
+            geometry_policy = parse_geometry_policy(service.get("geometry_policy"))
+            source_stats = geometry_stats.setdefault(
+                source_name,
+                {
+                    "policy": service.get("geometry_policy") or "keep",
+                    "features": 0,
+                    "bytes_before": 0,
+                    "bytes_after": 0,
+                    "bytes_saved": 0,
+                },
+            )
 
             for layer_id in layer_ids:
                 layer_url = _layer_url(service_url, int(layer_id))
@@ -184,10 +204,12 @@ def run_arcgis_harvest(
                         return_geometry=return_geometry,
                     )
                     features = chunk_payload.get("features") or []
+                    centroids = batch_centroids(feature.get("geometry") or None for feature in features)
 
-                    for feature in features:
+                    for feature, centroid in zip(features, centroids):
                         attributes = feature.get("attributes") or {}
                         geometry = feature.get("geometry") or None
+                        centroid_y, centroid_x = centroid
                         source_id = None
                         if object_id_field_name and object_id_field_name in attributes:
                             source_id = str(attributes[object_id_field_name])
@@ -195,12 +217,18 @@ def run_arcgis_harvest(
                         raw_lat = _safe_float(_lookup_first(attributes, lat_candidates))
                         raw_lon = _safe_float(_lookup_first(attributes, lon_candidates))
 
-                        if (raw_lat is None or raw_lon is None) and geometry:
-                            geom_x = geometry.get("x")
-                            geom_y = geometry.get("y")
-                            if geom_x is not None and geom_y is not None:
-                                raw_lat = _safe_float(geom_y)
-                                raw_lon = _safe_float(geom_x)
+                        if (raw_lat is None or raw_lon is None) and centroid_y is not None:
+                            raw_lat = centroid_y
+                            raw_lon = centroid_x
+
+                        source_wkid = _parse_wkid(geometry)
+                        kept_geometry = apply_geometry_policy(geometry, geometry_policy, centroid)
+                        before = _geometry_bytes(geometry)
+                        after = before if kept_geometry is geometry else _geometry_bytes(kept_geometry)
+                        source_stats["features"] += 1
+                        source_stats["bytes_before"] += before
+                        source_stats["bytes_after"] += after
+                        source_stats["bytes_saved"] += before - after
 
                         record = RawRecord(
                             territory=territory_code,
@@ -210,8 +238,8 @@ def run_arcgis_harvest(
                             raw_postcode=str(raw_postcode) if raw_postcode is not None else None,
                             raw_lat=raw_lat,
                             raw_lon=raw_lon,
-                            raw_geometry=geometry,
-                            source_wkid=_parse_wkid(geometry),
+                            raw_geometry=kept_geometry,
+                            source_wkid=source_wkid,
                             extract_date=run_date,
                             run_id=run_id,
                             raw_payload_ref=f"raw/arcgis/{territory_code.lower()}_arcgis.json",
@@ -227,6 +255,7 @@ def run_arcgis_harvest(
         "source": "arcgis",
         "enabled": True,
         "row_count": len(rows),
+        "geometry_policy": geometry_stats,
         "rows": [row.to_dict() for row in rows],
     }
     write_json(out_dir / f"{territory_code.lower()}_arcgis.json", payload)
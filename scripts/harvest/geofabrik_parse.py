@@ -4,9 +4,10 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Iterable, Iterator
+from typing import Iterable
 
 from scripts.common.fs import ensure_dir, write_json
+from scripts.common.geometry import batch_centroids
 from scripts.common.models import RawRecord
 
 
@@ -21,6 +22,9 @@ DEFAULT_POSTCODE_KEYS = (
     "postalcode",
 )
 
+# Elements without a point are resolved from their geometry in batches of this size.
+GEOMETRY_BATCH_SIZE = 5000
+
 
 def _iter_elements_from_json(path: Path) -> Iterable[dict]:
     with path.open("r", encoding="utf-8") as f:
@@ -42,28 +46,6 @@ def _lookup_first(mapping: dict, candidates: list[str]) -> object | None:
     return None
 
 
-def _iter_geojson_points(coordinates: object) -> Iterator[tuple[float, float]]:
-    if not isinstance(coordinates, list):
-        return
-    if len(coordinates) >= 2 and all(isinstance(v, (int, float)) for v in coordinates[:2]):
-        yield float(coordinates[0]), float(coordinates[1])
-        return
-    for item in coordinates:
-        yield from _iter_geojson_points(item)
-
-
-def _geojson_lat_lon(geometry: dict | None) -> tuple[float | None, float | None]:
-    if not geometry:
-        return None, None
-    coordinates = geometry.get("coordinates")
-    points = list(_iter_geojson_points(coordinates))
-    if not points:
-        return None, None
-    lon = sum(point[0] for point in points) / len(points)
-    lat = sum(point[1] for point in points) / len(points)
-    return lat, lon
-
-
 def run_geofabrik_parse(
     territory_code: str,
     territory_config: dict,
@@ -103,6 +85,7 @@ def run_geofabrik_parse(
         elif input_path.suffix.lower() not in {".json", ".geojson"}:
             warnings.append("GEOFABRIK_PARSE_REQUIRES_PRECONVERTED_JSON")
         else:
+            pending: list[tuple[dict, object, object, object]] = []
             for element in _iter_elements_from_json(input_path):
                 tags = element.get("tags") or {}
                 properties = element.get("properties") or {}
@@ -117,29 +100,36 @@ def run_geofabrik_parse(
                     lat = center.get("lat")
                 if lon is None:
                     lon = center.get("lon")
-                if lat is None or lon is None:
-                    geojson_lat, geojson_lon = _geojson_lat_lon(element.get("geometry"))
+                pending.append((element, raw_postcode, lat, lon))
+
+            for start in range(0, len(pending), GEOMETRY_BATCH_SIZE):
+                batch = pending[start : start + GEOMETRY_BATCH_SIZE]
+                centroids = batch_centroids(
+                    element.get("geometry") if lat is None or lon is None else None
+                    for element, _postcode, lat, lon in batch
+                )
+                for (element, raw_postcode, lat, lon), (geojson_lat, geojson_lon) in zip(batch, centroids):
                     if lat is None:
                         lat = geojson_lat
                     if lon is None:
                         lon = geojson_lon
 
-                rows.append(
-                    RawRecord(
-                        territory=territory_code,
-                        source_name="osm_geofabrik",
-                        source_class="osm",
-                        source_record_id=f"{element.get('type')}/{element.get('id')}",
-                        raw_postcode=str(raw_postcode),
-                        raw_lat=float(lat) if lat is not None else None,
-                        raw_lon=float(lon) if lon is not None else None,
-                        raw_geometry=None,
-                        source_wkid=4326,
-                        extract_date=run_date,
-                        run_id=run_id,
-                        raw_payload_ref=f"raw/osm/geofabrik/{territory_code.lower()}_geofabrik.json",
+                    rows.append(
+                        RawRecord(
+                            territory=territory_code,
+                            source_name="osm_geofabrik",
+                            source_class="osm",
+                            source_record_id=f"{element.get('type')}/{element.get('id')}",
+                            raw_postcode=str(raw_postcode),
+                            raw_lat=float(lat) if lat is not None else None,
+                            raw_lon=float(lon) if lon is not None else None,
+                            raw_geometry=None,
+                            source_wkid=4326,
+                            extract_date=run_date,
+                            run_id=run_id,
+                            raw_payload_ref=f"raw/osm/geofabrik/{territory_code.lower()}_geofabrik.json",
+                        )
                     )
-                )
 
     payload = {
         "territory": territory_code,
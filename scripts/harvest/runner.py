@@ -4,10 +4,12 @@ from __future__ import annotations
 
 from pathlib import Path
 
+from scripts.common.constants import RAW_SOURCES
 from scripts.common.errors import StageError
 from scripts.harvest.arcgis_harvest import run_arcgis_harvest
 from scripts.harvest.geofabrik_parse import run_geofabrik_parse
 from scripts.harvest.overpass_harvest import run_overpass_harvest
+from scripts.harvest.stats import write_raw_stats
 
 
 def run_harvest_for_territory(
@@ -64,9 +66,15 @@ def run_harvest_for_territory(
     if enabled_sources and len(failures) >= len(enabled_sources):
         raise StageError(f"All enabled sources failed for territory {territory_code}")
 
+    stats = {
+        source: write_raw_stats(data_dir / RAW_SOURCES[source].format(territory=territory_code.lower()), payload)
+        for source, payload in results.items()
+    }
+
     return {
         "territory": territory_code,
         "run_id": run_id,
         "results": results,
+        "stats": stats,
         "failed_sources": failures,
     }
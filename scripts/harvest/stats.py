@@ -0,0 +1,52 @@
+"""Statistics sidecars for raw harvest payloads.
+
+Validation needs a few counts from each raw payload, not its rows. Harvest
+writes them to ``<payload>.stats.json`` next to the payload. Each sidecar
+records the payload file's size and mtime, so it is ignored once the payload
+has been replaced by anything else.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+
+from scripts.common.fs import read_json, write_json
+
+
+def raw_source_stats(payload: dict) -> dict:
+    """Row count, rows by source_class and geometry policy stats for one raw payload."""
+    rows = payload.get("rows", [])
+    return {
+        "rows": len(rows),
+        "source_classes": dict(sorted(Counter(row.get("source_class", "other") for row in rows).items())),
+        "geometry_policy": payload.get("geometry_policy") or {},
+    }
+
+
+def stats_path(raw_path: Path) -> Path:
+    return raw_path.with_suffix(".stats.json")
+
+
+def _stamp(raw_path: Path) -> dict:
+    stat = raw_path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def write_raw_stats(raw_path: Path, payload: dict) -> dict:
+    """Write the sidecar for a payload already written to ``raw_path``; no payload file, no sidecar."""
+    stats = raw_source_stats(payload)
+    if raw_path.exists():
+        write_json(stats_path(raw_path), {**stats, "payload": _stamp(raw_path)})
+    return stats
+
+
+def read_raw_stats(raw_path: Path) -> dict | None:
+    """The sidecar's stats, or None when it is missing or no longer matches the payload."""
+    path = stats_path(raw_path)
+    if not path.exists() or not raw_path.exists():
+        return None
+    stats = read_json(path)
+    if stats.pop("payload", None) != _stamp(raw_path):
+        return None
+    return stats
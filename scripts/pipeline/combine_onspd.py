@@ -0,0 +1,150 @@
+"""Stream crown dependency ONSPD outputs into an official ONSPD file.
+
+Every input must be sorted by its ``pcd`` column, as the official file and
+our ``*_onspd.csv`` outputs are. The inputs are k-way merged on the
+normalised postcode: the 7-character ``pcd`` form and the single-space form
+sort identically, because a space sorts before every postcode character.
+Official rows are projected onto the configured header by column name, so
+only the current row of each input and the current key group are ever held
+in memory.
+
+Our ``pcd`` and ``pcd2`` values follow whatever the contract maps them to,
+such as "GY10 1AA" and "GY101AA" under the default contract. Crown rows are
+rewritten to ONSPD's fixed-width forms ("GY101AA" and "GY10 1AA"), so every
+row of the combined file means the same thing by those columns.
+
+Rows sharing a key are conflicts. The row from the preferred input is
+written and every other row is listed in the conflict report, which compares
+postcode columns by key.
+"""
+
+from __future__ import annotations
+
+import csv
+import heapq
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Iterator
+
+from scripts.common.errors import ContractError
+from scripts.common.fs import ensure_dir
+from scripts.common.postcode import fixed_width_postcode
+
+OFFICIAL_SOURCE = "official"
+PREFER_CHOICES = ("official", "crown")
+CONFLICT_HEADERS = ["pcd", "kept_source", "dropped_source", "differing_columns"]
+# Official ONSPD postcode columns and their fixed widths.
+OFFICIAL_POSTCODE_WIDTHS = {"pcd": 7, "pcd2": 8}
+
+# (merge key, input rank, source label, projected values)
+_Entry = tuple[str, int, str, tuple[str, ...]]
+
+
+def merge_key(pcd: str) -> str:
+    compact = pcd.replace(" ", "").upper()
+    return f"{compact[:-3]} {compact[-3:]}" if compact else ""
+
+
+def _iter_projected(
+    path: Path,
+    source: str,
+    rank: int,
+    header: list[str],
+    strict_header: bool,
+    rewrite_postcodes: bool = False,
+) -> Iterator[_Entry]:
+    if not path.exists():
+        raise ContractError(f"ONSPD input missing: {path}")
+    with path.open("r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        file_header = next(reader, [])
+        if strict_header and file_header != header:
+            raise ContractError(f"ONSPD header/order mismatch in {path}: {file_header} != {header}")
+        missing = [column for column in header if column not in file_header]
+        if missing:
+            raise ContractError(f"{path} lacks contract columns: {', '.join(missing)}")
+        positions = [file_header.index(column) for column in header]
+        project = itemgetter(*positions) if len(positions) > 1 else (lambda row: (row[positions[0]],))
+        pcd_idx = file_header.index("pcd")
+        width = len(file_header)
+        postcode_widths = [
+            (header.index(name), postcode_width)
+            for name, postcode_width in OFFICIAL_POSTCODE_WIDTHS.items()
+            if rewrite_postcodes and name in header
+        ]
+
+        previous = None
+        for row in reader:
+            if len(row) < width:
+                row += [""] * (width - len(row))
+            key = merge_key(row[pcd_idx])
+            if previous is not None and key < previous:
+                raise ContractError(f"{path} is not sorted by pcd: {key!r} follows {previous!r}")
+            previous = key
+            values = project(row)
+            if postcode_widths:
+                values = list(values)
+                for idx, postcode_width in postcode_widths:
+                    values[idx] = fixed_width_postcode(key, postcode_width)
+                values = tuple(values)
+            yield key, rank, source, values
+
+
+def run_combine_onspd(
+    onspd_columns: dict,
+    official_path: Path,
+    crown_outputs: list[tuple[str, Path]],
+    out_path: Path,
+    conflict_report_path: Path,
+    prefer: str = "official",
+) -> dict:
+    """Merge ``official_path`` with ``(territory, path)`` outputs into ``out_path``."""
+    if prefer not in PREFER_CHOICES:
+        raise ContractError(f"prefer must be one of {PREFER_CHOICES}, got {prefer!r}")
+    header = [column["name"] for column in onspd_columns.get("columns", [])]
+    if "pcd" not in header:
+        raise ContractError("Combining ONSPD files needs a pcd column in onspd_columns")
+
+    # Entries merge on (key, rank), so the lowest-ranked input leads each key group.
+    official_rank = 0 if prefer == "official" else len(crown_outputs)
+    streams = [_iter_projected(official_path, OFFICIAL_SOURCE, official_rank, header, strict_header=False)]
+    for offset, (territory, path) in enumerate(crown_outputs):
+        rank = offset + 1 if prefer == "official" else offset
+        streams.append(_iter_projected(path, territory, rank, header, strict_header=True, rewrite_postcodes=True))
+    pcd_idx = header.index("pcd")
+    postcode_columns = [name in OFFICIAL_POSTCODE_WIDTHS for name in header]
+
+    rows_by_source: dict[str, int] = {}
+    conflicts = 0
+    total = 0
+    ensure_dir(out_path.parent)
+    ensure_dir(conflict_report_path.parent)
+    with out_path.open("w", encoding="utf-8", newline="") as out, conflict_report_path.open(
+        "w", encoding="utf-8", newline=""
+    ) as report:
+        writer = csv.writer(out)
+        writer.writerow(header)
+        report_writer = csv.writer(report)
+        report_writer.writerow(CONFLICT_HEADERS)
+        for _key, group in groupby(heapq.merge(*streams, key=itemgetter(0, 1)), key=itemgetter(0)):
+            _kept_key, _rank, kept_source, kept = next(group)
+            writer.writerow(kept)
+            total += 1
+            rows_by_source[kept_source] = rows_by_source.get(kept_source, 0) + 1
+            for _dup_key, _dup_rank, dropped_source, dropped in group:
+                conflicts += 1
+                differing = [
+                    name
+                    for name, is_postcode, left, right in zip(header, postcode_columns, kept, dropped)
+                    if (merge_key(left) != merge_key(right) if is_postcode else left != right)
+                ]
+                report_writer.writerow([kept[pcd_idx], kept_source, dropped_source, ";".join(differing)])
+
+    return {
+        "path": str(out_path),
+        "conflict_report": str(conflict_report_path),
+        "rows": total,
+        "rows_by_source": dict(sorted(rows_by_source.items())),
+        "conflicts": conflicts,
+    }
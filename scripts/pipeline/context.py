@@ -0,0 +1,34 @@
+"""In-process hand-off between stages of one CLI run.
+
+Each stage still writes its artefacts to disk, but it also leaves what the
+next stage needs on the territory's ``TerritoryState``. Later stages in the
+same run read the state instead of parsing those artefacts back. A stage
+that did not run in this process leaves its field unset, and the consumer
+falls back to disk.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+
+@dataclass
+class TerritoryState:
+    # Harvest payloads by source name ("arcgis", "overpass", "geofabrik"); released once merge has read them.
+    raw_payloads: dict[str, dict] = field(default_factory=dict)
+    # Per-source source_class counts and geometry policy stats, kept for validate after the payloads are released.
+    raw_stats: dict[str, dict] = field(default_factory=dict)
+    # Merge intermediate summary, as written to data/intermediate.
+    merge_summary: dict | None = None
+    # Canonical rows as written to the canonical CSV: sorted, every value a string.
+    canonical_records: list[dict[str, str]] | None = None
+    # run_map_onspd result: path, rows, header and fill_rates.
+    onspd: dict | None = None
+
+
+@dataclass
+class PipelineContext:
+    territories: dict[str, TerritoryState] = field(default_factory=dict)
+
+    def territory(self, territory_code: str) -> TerritoryState:
+        return self.territories.setdefault(territory_code, TerritoryState())
@@ -6,6 +6,8 @@ from typing import Any
 
 from pyproj import CRS, Transformer
 
+from scripts.common.boundary import BoundaryIndex
+
 SOURCE_CLASS_PRECEDENCE = {
     "authoritative": 3,
     "digimap": 2,
@@ -47,11 +49,10 @@ def _transform_to_wgs84(lat: float, lon: float, source_epsg: int) -> tuple[float
         return None
 
 
-def resolve_best_coordinate(records: list[dict], territory_config: dict) -> dict:
+def _collect_candidates(records: list[dict], territory_config: dict) -> tuple[list[dict], bool, bool]:
     bbox = territory_config["validation"]["bbox_wgs84"]
     default_epsg = territory_config.get("crs", {}).get("default_epsg")
     hint_epsg = territory_config.get("crs", {}).get("authoritative_epsg_hint_by_source", {})
-    source_priority = {name: idx for idx, name in enumerate(territory_config.get("source_priority", []))}
 
     candidates: list[dict] = []
     unknown_crs = False
@@ -94,6 +95,17 @@ def resolve_best_coordinate(records: list[dict], territory_config: dict) -> dict
             }
         )
 
+    return candidates, unknown_crs, had_outlier
+
+
+def _choose_coordinate(
+    candidates: list[dict],
+    unknown_crs: bool,
+    had_outlier: bool,
+    territory_config: dict,
+) -> dict:
+    source_priority = {name: idx for idx, name in enumerate(territory_config.get("source_priority", []))}
+
     if not candidates:
         notes = []
         if had_outlier:
@@ -122,3 +134,35 @@ def resolve_best_coordinate(records: list[dict], territory_config: dict) -> dict
         "coordinate_source": chosen["source_class"],
         "notes": [],
     }
+
+
+def resolve_best_coordinates(
+    record_groups: list[list[dict]],
+    territory_config: dict,
+    boundary: BoundaryIndex | None = None,
+) -> list[dict]:
+    """Resolve one coordinate per group; every bbox-passing candidate is boundary-tested in one batch."""
+    collected = [_collect_candidates(records, territory_config) for records in record_groups]
+
+    if boundary is not None:
+        flat = [candidate for candidates, _unknown, _outlier in collected for candidate in candidates]
+        if flat:
+            inside = iter(boundary.contains_many([c["lat"] for c in flat], [c["lon"] for c in flat]).tolist())
+            filtered = []
+            for candidates, unknown_crs, had_outlier in collected:
+                kept = [candidate for candidate in candidates if next(inside)]
+                filtered.append((kept, unknown_crs, had_outlier or len(kept) < len(candidates)))
+            collected = filtered
+
+    return [
+        _choose_coordinate(candidates, unknown_crs, had_outlier, territory_config)
+        for candidates, unknown_crs, had_outlier in collected
+    ]
+
+
+def resolve_best_coordinate(
+    records: list[dict],
+    territory_config: dict,
+    boundary: BoundaryIndex | None = None,
+) -> dict:
+    return resolve_best_coordinates([records], territory_config, boundary)[0]
@@ -0,0 +1,144 @@
+"""Run-to-run delta of the canonical output.
+
+Before the canonical CSV is overwritten, the previous file is streamed
+against the new rows, both sorted by ``normalised_postcode``. Only postcodes
+that were added, were removed or changed materially are written to
+``data/out/deltas/<name>_<run_date>.csv``. A change means the coordinates
+moved more than ``output.delta_move_threshold_m`` metres, the coordinates were
+gained or lost, or the confidence score changed.
+
+The first merge on a run date keeps the canonical CSV it is about to replace
+as that date's baseline under ``data/state/delta_baseline``. Later merges on
+the same date diff against the baseline, so the day's delta always covers the
+whole day rather than the last rerun.
+"""
+
+from __future__ import annotations
+
+import csv
+import shutil
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from scripts.common.constants import DEFAULT_DELTA_MOVE_THRESHOLD_M
+from scripts.common.fs import ensure_dir, write_csv
+from scripts.common.geometry import approx_distance_km
+from scripts.pipeline.export import CANONICAL_HEADERS, serialize_row
+
+BASELINE_DIR = "state/delta_baseline"
+DELTA_HEADERS = [
+    "change",
+    *CANONICAL_HEADERS,
+    "changed_fields",
+    "moved_m",
+    "previous_lat",
+    "previous_lon",
+    "previous_confidence_score",
+]
+
+
+def delta_path(territory_config: dict, data_dir: Path, run_date: str) -> Path:
+    stem = Path(territory_config["output"]["canonical_filename"]).stem
+    return data_dir / "out" / "deltas" / f"{stem}_{run_date}.csv"
+
+
+def _baseline(canonical_path: Path, data_dir: Path, run_date: str) -> Path:
+    """The canonical CSV as it stood before the first merge on ``run_date``."""
+    baseline_dir = data_dir / BASELINE_DIR
+    path = baseline_dir / f"{canonical_path.stem}_{run_date}.csv"
+    if path.exists():
+        return path
+    ensure_dir(baseline_dir)
+    for stale in baseline_dir.glob(f"{canonical_path.stem}_*.csv"):
+        stale.unlink()
+    tmp_path = path.with_name(path.name + ".tmp")
+    if canonical_path.exists():
+        shutil.copyfile(canonical_path, tmp_path)
+    else:
+        tmp_path.write_text("", encoding="utf-8")
+    tmp_path.replace(path)
+    return path
+
+
+def _iter_previous(path: Path) -> Iterator[dict[str, str]]:
+    if not path.exists():
+        return
+    with path.open("r", encoding="utf-8", newline="") as f:
+        yield from csv.DictReader(f)
+
+
+def _located(row: dict) -> bool:
+    return str(row["has_coordinates"]) == "true"
+
+
+def _compare(previous: dict, current: dict, move_threshold_m: float) -> dict | None:
+    changed = []
+    moved_m = ""
+    if _located(previous) != _located(current):
+        changed.append("coordinates")
+    elif _located(current):
+        distance_m = 1000 * approx_distance_km(
+            float(previous["lat"]), float(previous["lon"]), float(current["lat"]), float(current["lon"])
+        )
+        if distance_m > move_threshold_m:
+            changed.append("coordinates")
+            moved_m = round(distance_m, 1)
+    if str(previous["confidence_score"]) != str(current["confidence_score"]):
+        changed.append("confidence_score")
+    if not changed:
+        return None
+    return {
+        "change": "changed",
+        **current,
+        "changed_fields": ";".join(changed),
+        "moved_m": moved_m,
+        "previous_lat": previous["lat"],
+        "previous_lon": previous["lon"],
+        "previous_confidence_score": previous["confidence_score"],
+    }
+
+
+def iter_delta(
+    previous: Iterable[dict],
+    current: Iterable[dict],
+    move_threshold_m: float = DEFAULT_DELTA_MOVE_THRESHOLD_M,
+) -> Iterator[dict]:
+    """Two-pointer diff of serialised canonical rows, both sorted by ``normalised_postcode``."""
+    previous = iter(previous)
+    prior = next(previous, None)
+    for row in current:
+        key = row["normalised_postcode"]
+        while prior is not None and prior["normalised_postcode"] < key:
+            yield {"change": "removed", **prior}
+            prior = next(previous, None)
+        if prior is not None and prior["normalised_postcode"] == key:
+            delta = _compare(prior, row, move_threshold_m)
+            if delta is not None:
+                yield delta
+            prior = next(previous, None)
+        else:
+            yield {"change": "added", **row}
+    while prior is not None:
+        yield {"change": "removed", **prior}
+        prior = next(previous, None)
+
+
+def write_canonical_delta(territory_config: dict, data_dir: Path, rows: list, run_date: str) -> tuple[Path, dict]:
+    """Diff ``rows`` against the day's baseline; call before overwriting the canonical CSV."""
+    canonical_path = data_dir / "out" / territory_config["output"]["canonical_filename"]
+    previous_path = _baseline(canonical_path, data_dir, run_date)
+    move_threshold_m = float(
+        territory_config["output"].get("delta_move_threshold_m", DEFAULT_DELTA_MOVE_THRESHOLD_M)
+    )
+    current = (serialize_row(row) for row in sorted(rows, key=lambda row: row["normalised_postcode"]))
+
+    counts = {"added": 0, "removed": 0, "changed": 0}
+
+    def counted(deltas: Iterator[dict]) -> Iterator[dict]:
+        for delta in deltas:
+            counts[delta["change"]] += 1
+            yield delta
+
+    path = delta_path(territory_config, data_dir, run_date)
+    write_csv(path, DELTA_HEADERS, counted(iter_delta(_iter_previous(previous_path), current, move_threshold_m)))
+    return path, counts
@@ -24,7 +24,8 @@ CANONICAL_HEADERS = [
 ]
 
 
-def _serialize_row(row: dict) -> dict:
+def serialize_row(row: dict) -> dict:
+    """One canonical row as written to the CSV: blanks for None, "true"/"false" for booleans."""
     out = {}
     for key in CANONICAL_HEADERS:
         value = row.get(key)
@@ -37,10 +38,17 @@ def _serialize_row(row: dict) -> dict:
     return out
 
 
-def write_canonical_csv(territory_config: dict, data_dir: Path, rows: list[dict]) -> Path:
-    output_name = territory_config["output"]["canonical_filename"]
-    out_path = data_dir / "out" / output_name
+def canonical_records(rows: list[dict]) -> list[dict[str, str]]:
+    """Rows exactly as the canonical CSV reads back: sorted, every value a string."""
     sorted_rows = sorted(rows, key=lambda row: row["normalised_postcode"])
-    serialized_rows = [_serialize_row(row) for row in sorted_rows]
-    write_csv(out_path, CANONICAL_HEADERS, serialized_rows)
+    return [{key: str(value) for key, value in serialize_row(row).items()} for row in sorted_rows]
+
+
+def write_canonical_records(territory_config: dict, data_dir: Path, records: list[dict[str, str]]) -> Path:
+    out_path = data_dir / "out" / territory_config["output"]["canonical_filename"]
+    write_csv(out_path, CANONICAL_HEADERS, records)
     return out_path
+
+
+def write_canonical_csv(territory_config: dict, data_dir: Path, rows: list[dict]) -> Path:
+    return write_canonical_records(territory_config, data_dir, canonical_records(rows))
@@ -0,0 +1,110 @@
+"""Bounded-memory merge: external sort of normalised rows by postcode key.
+
+Rows are buffered until the estimated buffer size reaches the memory budget,
+then sorted by ``(normalised_postcode, input position)`` and spilled to a
+temporary run file as JSON lines. Runs are k-way merged with ``heapq.merge``
+and grouped by key, so only one postcode group is materialised at a time.
+Ranking is delegated to ``rank_postcode_group``, keeping output identical to
+the classic engine.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from scripts.common.models import RawRecord
+from scripts.pipeline.normalise_merge import PostcodeGroup, rank_postcode_group
+
+# Rough per-entry cost of the in-memory buffer on top of the serialised row:
+# the entry tuple, its dict and the line string object.
+ENTRY_OVERHEAD_BYTES = 160
+# Runs merged at once; more runs are merged in passes to bound open files.
+MAX_FAN_IN = 64
+
+_Entry = tuple  # (key, seq, line)
+_sort_key = itemgetter(0, 1)
+
+
+def _write_run(entries: list[_Entry], run_dir: Path, index: int) -> Path:
+    entries.sort(key=_sort_key)
+    path = run_dir / f"run_{index:05d}.jsonl"
+    with path.open("w", encoding="utf-8") as handle:
+        for _key, _seq, line in entries:
+            handle.write(line)
+            handle.write("\n")
+    return path
+
+
+def _read_run(path: Path) -> Iterator[_Entry]:
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            key, seq, _row = json.loads(line)
+            yield key, seq, line.rstrip("\n")
+
+
+def _merge_runs(runs: list[Path], run_dir: Path, next_index: int) -> tuple[list[Path], int]:
+    """Collapse runs in batches of MAX_FAN_IN until a single merge pass can read them all."""
+    while len(runs) > MAX_FAN_IN:
+        merged: list[Path] = []
+        for start in range(0, len(runs), MAX_FAN_IN):
+            batch = runs[start : start + MAX_FAN_IN]
+            path = run_dir / f"run_{next_index:05d}.jsonl"
+            next_index += 1
+            with path.open("w", encoding="utf-8") as handle:
+                for _key, _seq, line in heapq.merge(*(_read_run(run) for run in batch), key=_sort_key):
+                    handle.write(line)
+                    handle.write("\n")
+            for run in batch:
+                run.unlink()
+            merged.append(path)
+        runs = merged
+    return runs, next_index
+
+
+def _iter_sorted_entries(
+    valid_rows: Iterable[tuple[RawRecord, str]],
+    max_memory_bytes: int,
+    run_dir: Path,
+) -> Iterator[_Entry]:
+    buffer: list[_Entry] = []
+    buffered_bytes = 0
+    runs: list[Path] = []
+
+    for seq, (raw, normalised) in enumerate(valid_rows):
+        line = json.dumps([normalised, seq, raw.to_dict()], ensure_ascii=False, separators=(",", ":"))
+        buffer.append((normalised, seq, line))
+        buffered_bytes += len(line) + ENTRY_OVERHEAD_BYTES
+        if buffered_bytes >= max_memory_bytes:
+            runs.append(_write_run(buffer, run_dir, len(runs)))
+            buffer = []
+            buffered_bytes = 0
+
+    if not runs:
+        buffer.sort(key=_sort_key)
+        yield from buffer
+        return
+
+    if buffer:
+        runs.append(_write_run(buffer, run_dir, len(runs)))
+        buffer = []
+    runs, _ = _merge_runs(runs, run_dir, len(runs))
+    yield from heapq.merge(*(_read_run(run) for run in runs), key=_sort_key)
+
+
+def iter_groups_external(
+    valid_rows: Iterable[tuple[RawRecord, str]],
+    territory_code: str,
+    source_priority: dict[str, int],
+    max_memory_bytes: int,
+) -> Iterator[PostcodeGroup]:
+    with tempfile.TemporaryDirectory(prefix="onspd_merge_") as tmp:
+        entries = _iter_sorted_entries(valid_rows, max_memory_bytes, Path(tmp))
+        for key, group_entries in groupby(entries, key=itemgetter(0)):
+            records = [RawRecord.from_dict(json.loads(line)[2]) for _key, _seq, line in group_entries]
+            yield rank_postcode_group(key, records, territory_code, source_priority)
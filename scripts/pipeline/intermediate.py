@@ -0,0 +1,76 @@
+"""Layout of the canonical merge intermediate under ``data/intermediate``.
+
+``<territory>_canonical.json`` holds run counters and each distinct score
+explanation once, keyed by a signature ID. Canonical rows live in the compact
+line-delimited sidecar ``<territory>_canonical_rows.jsonl``; each line is a
+row plus the ``score_explanation_id`` it was scored with.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Iterator
+
+from scripts.common.fs import iter_json_lines, read_json, write_json, write_json_lines
+
+EXPLANATION_ID_FIELD = "score_explanation_id"
+
+
+def summary_path(data_dir: Path, territory_code: str) -> Path:
+    return data_dir / "intermediate" / f"{territory_code.lower()}_canonical.json"
+
+
+def rows_path(data_dir: Path, territory_code: str) -> Path:
+    return data_dir / "intermediate" / f"{territory_code.lower()}_canonical_rows.jsonl"
+
+
+def explanation_signature(explanation: dict) -> str:
+    encoded = json.dumps(explanation, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def write_canonical_intermediate(
+    data_dir: Path,
+    territory_code: str,
+    summary: dict,
+    rows: list[dict],
+    explanations: list[dict],
+) -> dict:
+    """Write summary + rows sidecar; ``explanations`` is parallel to ``rows``."""
+    signatures: dict[int, str] = {}
+    by_signature: dict[str, dict] = {}
+    row_lines = []
+    for row, explanation in zip(rows, explanations):
+        # Compiled scoring profiles share explanation objects, so most lookups hit by identity.
+        signature = signatures.get(id(explanation))
+        if signature is None:
+            signature = explanation_signature(explanation)
+            signatures[id(explanation)] = signature
+            by_signature.setdefault(signature, explanation)
+        row_lines.append({**row, EXPLANATION_ID_FIELD: signature})
+
+    payload = {
+        **summary,
+        "rows_path": rows_path(data_dir, territory_code).name,
+        "score_explanations": dict(sorted(by_signature.items())),
+    }
+    write_json(summary_path(data_dir, territory_code), payload)
+    write_json_lines(rows_path(data_dir, territory_code), row_lines)
+    return payload
+
+
+def read_canonical_summary(data_dir: Path, territory_code: str) -> dict:
+    path = summary_path(data_dir, territory_code)
+    return read_json(path) if path.exists() else {}
+
+
+def iter_canonical_rows(data_dir: Path, territory_code: str) -> Iterator[tuple[dict, str]]:
+    """Yield ``(row, score_explanation_id)`` pairs from the rows sidecar."""
+    path = rows_path(data_dir, territory_code)
+    if not path.exists():
+        return
+    for line in iter_json_lines(path):
+        explanation_id = line.pop(EXPLANATION_ID_FIELD, None)
+        yield line, explanation_id
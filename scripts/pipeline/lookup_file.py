@@ -0,0 +1,177 @@
+"""Fixed-width sorted binary lookup file and its memory-mapped reader.
+
+Layout: a 16-byte header (magic, version, record size, record count) followed
+by one 64-byte record per postcode, sorted by the space-padded normalised
+postcode. A reader maps the file and binary-searches the key column in place,
+so opening costs one header read regardless of size and the pages are shared
+by every process that maps the same file.
+
+Only the fixed-width columns are stored; ``source_list`` and ``notes`` stay in
+the canonical CSV.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import mmap
+import os
+import struct
+from pathlib import Path
+
+from scripts.common.constants import CONFIDENCE_SCORE_RANGE
+from scripts.common.errors import ContractError
+from scripts.common.fs import ensure_dir
+from scripts.common.postcode import normalise_postcode
+
+MAGIC = b"PCLK"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHI4x")
+# postcode, lat, lon, has_coordinates, source_count, confidence_score,
+# coordinate_source, first_seen, last_seen; NaN lat/lon when unlocated.
+_RECORD = struct.Struct("<8sddBBB16s10s10sx")
+KEY_WIDTH = 8
+
+
+def lookup_path(territory_config: dict, data_dir: Path) -> Path:
+    stem = Path(territory_config["output"]["canonical_filename"]).stem
+    return data_dir / "out" / f"{stem}.lookup"
+
+
+def _key(postcode: str) -> bytes:
+    return postcode.encode("ascii").ljust(KEY_WIDTH)
+
+
+def _fixed(value, width: int, field: str) -> bytes:
+    encoded = (value or "").encode("ascii")
+    if len(encoded) > width:
+        raise ContractError(f"Lookup field {field} exceeds {width} bytes: {value!r}")
+    return encoded
+
+
+def _score(value) -> int:
+    score = int(value or 0)
+    if not CONFIDENCE_SCORE_RANGE[0] <= score <= CONFIDENCE_SCORE_RANGE[1]:
+        raise ContractError(f"Lookup confidence_score outside {CONFIDENCE_SCORE_RANGE}: {score}")
+    return score
+
+
+def _pack(row) -> bytes:
+    located = bool(row["has_coordinates"])
+    return _RECORD.pack(
+        _key(row["normalised_postcode"]),
+        row["lat"] if located else math.nan,
+        row["lon"] if located else math.nan,
+        located,
+        min(int(row["source_count"] or 0), 255),
+        _score(row["confidence_score"]),
+        _fixed(row["coordinate_source"], 16, "coordinate_source"),
+        _fixed(row["first_seen"], 10, "first_seen"),
+        _fixed(row["last_seen"], 10, "last_seen"),
+    )
+
+
+def write_lookup_file(territory_config: dict, data_dir: Path, rows) -> Path:
+    path = lookup_path(territory_config, data_dir)
+    ensure_dir(path.parent)
+    records = sorted(_pack(row) for row in rows)
+    # Replace atomically: truncating a file under a live mapping faults its readers.
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, _RECORD.size, len(records)))
+        f.writelines(records)
+    os.replace(tmp_path, path)
+    return path
+
+
+class _Keys:
+    """Sequence view of the key column for ``bisect``."""
+
+    __slots__ = ("_buffer", "_count")
+
+    def __init__(self, buffer: mmap.mmap, count: int) -> None:
+        self._buffer = buffer
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, idx: int) -> bytes:
+        start = _HEADER.size + idx * _RECORD.size
+        return self._buffer[start : start + KEY_WIDTH]
+
+
+class PostcodeLookup:
+    def __init__(self, path: Path) -> None:
+        with Path(path).open("rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, count = _HEADER.unpack_from(self._buffer)
+        if magic != MAGIC or version != VERSION or record_size != _RECORD.size:
+            self._buffer.close()
+            raise ContractError(f"Unsupported lookup file: {path}")
+        if len(self._buffer) != _HEADER.size + count * record_size:
+            self._buffer.close()
+            raise ContractError(f"Truncated lookup file: {path}")
+        self._keys = _Keys(self._buffer, count)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __enter__(self) -> PostcodeLookup:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._buffer.close()
+
+    def _find(self, postcode: str) -> int | None:
+        normalised = normalise_postcode(postcode)
+        if normalised is None:
+            return None
+        key = _key(normalised)
+        idx = bisect.bisect_left(self._keys, key)
+        if idx < len(self._keys) and self._keys[idx] == key:
+            return idx
+        return None
+
+    def __contains__(self, postcode: str) -> bool:
+        return self._find(postcode) is not None
+
+    def _prefix_range(self, prefix: str) -> tuple[int, int]:
+        # Non-ASCII input cannot match; "?" sorts between digits and letters, so the range is empty.
+        key = prefix.encode("ascii", "replace")
+        return bisect.bisect_left(self._keys, key), bisect.bisect_left(self._keys, key + b"\xff")
+
+    def count_prefix(self, prefix: str) -> int:
+        """Postcodes whose normalised form starts with ``prefix`` (upper case, single space)."""
+        lo, hi = self._prefix_range(prefix)
+        return hi - lo
+
+    def iter_prefix(self, prefix: str, limit: int | None = None):
+        lo, hi = self._prefix_range(prefix)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        for idx in range(lo, hi):
+            yield self._record(idx)
+
+    def _record(self, idx: int) -> dict:
+        (key, lat, lon, located, source_count, score, coordinate_source, first_seen, last_seen) = (
+            _RECORD.unpack_from(self._buffer, _HEADER.size + idx * _RECORD.size)
+        )
+        return {
+            "normalised_postcode": key.decode("ascii").rstrip(),
+            "has_coordinates": bool(located),
+            "lat": lat if located else None,
+            "lon": lon if located else None,
+            "source_count": source_count,
+            "confidence_score": score,
+            "coordinate_source": coordinate_source.rstrip(b"\0").decode("ascii") or None,
+            "first_seen": first_seen.rstrip(b"\0").decode("ascii"),
+            "last_seen": last_seen.rstrip(b"\0").decode("ascii"),
+        }
+
+    def lookup(self, postcode: str) -> dict | None:
+        idx = self._find(postcode)
+        return None if idx is None else self._record(idx)
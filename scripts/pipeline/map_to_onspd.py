@@ -1,59 +1,227 @@
-"""Map canonical rows to strict ONSPD-compatible CSV contract."""
+"""Map canonical rows to strict ONSPD-compatible CSV contract.
+
+Each column's ``source_mapping`` is resolved once, against the canonical
+header, into a column function. Rows stream from the canonical CSV in chunks
+of ``CHUNK_ROWS``. Every chunk is projected column by column, so batched work
+such as the OSGB36 transform runs once per chunk. Fill rates and the typed
+contract check (see ``contract_check``) run on the chunk's columns. The chunk
+is then written. That is one read and one write in total.
+
+A ``source_mapping`` is either a name or a mapping:
+
+- a canonical column, or one of ``normalised_postcode_no_space``,
+  ``postcode_7char``, ``postcode_8char``, ``country_code_or_blank``, ``blank``
+- ``{date: <column>, format: "%Y%m"}`` reformats an ISO date column
+- ``{computed: osgb36_easting | osgb36_northing}`` gives OSGB36 (EPSG:27700)
+  metres from lat/lon, blank outside the National Grid
+- ``{lookup: <table>, key: <column | outcode | sector>, value: <field>, default: ""}``
+  joins a CSV table declared under the config's top-level ``lookups``
+- ``{constant: <value>}``
+"""
 
 from __future__ import annotations
 
 import csv
+from contextlib import contextmanager
+from datetime import date
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
+from typing import Callable, Iterator
 
-from scripts.common.errors import ContractError
-from scripts.common.fs import write_csv
+import numpy as np
 
+from scripts.common.errors import ConfigError, ContractError
+from scripts.common.fs import ensure_dir
+from scripts.common.postcode import fixed_width_postcode
+from scripts.pipeline.contract_check import ContractCheck
+from scripts.pipeline.export import CANONICAL_HEADERS
 
-def _read_canonical_rows(path: Path) -> list[dict]:
-    if not path.exists():
-        raise ContractError(f"Canonical input missing: {path}")
-    with path.open("r", encoding="utf-8", newline="") as f:
-        return list(csv.DictReader(f))
+CHUNK_ROWS = 4096
+OSGB36_EPSG = 27700
+# National Grid extent in metres; projected points outside it are left blank.
+OSGB36_MAX_EASTING = 700_000
+OSGB36_MAX_NORTHING = 1_300_000
+MAPPING_KINDS = ("date", "computed", "lookup", "constant")
+COMPUTED_MAPPINGS = ("osgb36_easting", "osgb36_northing")
+DERIVED_KEYS = ("outcode", "sector")
 
+Row = list[str]
+# (chunk rows, per-chunk feature cache) -> one value per row
+ColumnFn = Callable[[list[Row], dict], list[str]]
+LookupTables = dict[str, dict[str, dict[str, str]]]
 
-def _value_for_mapping(mapping: str, canonical_row: dict, territory_code: str) -> str:
-    if mapping == "normalised_postcode":
-        return canonical_row.get("normalised_postcode", "")
-    if mapping == "normalised_postcode_no_space":
-        return canonical_row.get("normalised_postcode", "").replace(" ", "")
-    if mapping == "country_code_or_blank":
-        return territory_code
-    if mapping in canonical_row:
-        return canonical_row.get(mapping, "")
-    if mapping == "blank":
+
+def load_lookup_tables(specs: dict | None) -> LookupTables:
+    """Read every declared lookup CSV once into ``{table: {key: row}}``.
+
+    The config loader has already resolved relative paths against the contract file.
+    """
+    tables: LookupTables = {}
+    for name, spec in (specs or {}).items():
+        path = Path(spec["path"])
+        if not path.exists():
+            raise ConfigError(f"ONSPD lookup table {name} not found: {path}")
+        with path.open("r", encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            if spec["key"] not in (reader.fieldnames or []):
+                raise ConfigError(f"ONSPD lookup table {name} has no key column {spec['key']!r}")
+            tables[name] = {row[spec["key"]]: row for row in reader}
+    return tables
+
+
+@lru_cache(maxsize=1)
+def _osgb36_transformer():
+    from pyproj import Transformer
+
+    return Transformer.from_crs(4326, OSGB36_EPSG, always_xy=True)
+
+
+def _osgb36_grid(rows: list[Row], lat_idx: int, lon_idx: int) -> tuple[list[str], list[str]]:
+    lat = np.asarray([row[lat_idx] or "nan" for row in rows], dtype=np.float64)
+    lon = np.asarray([row[lon_idx] or "nan" for row in rows], dtype=np.float64)
+    easting, northing = _osgb36_transformer().transform(lon, lat)
+    easting, northing = np.asarray(easting), np.asarray(northing)
+    valid = np.isfinite(easting) & np.isfinite(northing)
+    valid &= (easting >= 0) & (easting < OSGB36_MAX_EASTING) & (northing >= 0) & (northing < OSGB36_MAX_NORTHING)
+
+    def formatted(values: np.ndarray) -> list[str]:
+        metres = np.rint(np.where(valid, values, 0)).astype(np.int64).astype(str)
+        return np.where(valid, metres, "").tolist()
+
+    return formatted(easting), formatted(northing)
+
+
+@lru_cache(maxsize=4096)
+def _format_date(value: str, fmt: str) -> str:
+    if not value:
+        return ""
+    try:
+        return date.fromisoformat(value).strftime(fmt)
+    except ValueError:
         return ""
+
+
+def _per_row(get: Callable[[Row], str]) -> ColumnFn:
+    return lambda rows, _features: [get(row) for row in rows]
+
+
+def _constant(value: str) -> ColumnFn:
+    return lambda rows, _features: [value] * len(rows)
+
+
+def _key_getter(key: str, positions: dict[str, int]) -> Callable[[Row], str]:
+    if key in positions:
+        idx = positions[key]
+        return lambda row: row[idx]
+    if key in DERIVED_KEYS and "normalised_postcode" in positions:
+        postcode_idx = positions["normalised_postcode"]
+        if key == "outcode":
+            return lambda row: row[postcode_idx].partition(" ")[0]
+        return lambda row: row[postcode_idx][:-2]
+    raise ContractError(f"ONSPD lookup key {key!r} is not a canonical column or one of {DERIVED_KEYS}")
+
+
+def _compile_structured(mapping: dict, positions: dict[str, int], lookups: LookupTables) -> ColumnFn:
+    if "constant" in mapping:
+        return _constant(str(mapping["constant"]))
+
+    if "date" in mapping:
+        column = mapping["date"]
+        if column not in positions:
+            raise ContractError(f"Date mapping source {column!r} is not a canonical column")
+        idx, fmt = positions[column], mapping.get("format", "%Y%m")
+        return _per_row(lambda row: _format_date(row[idx], fmt))
+
+    if "computed" in mapping:
+        computed = mapping["computed"]
+        if computed not in COMPUTED_MAPPINGS:
+            raise ContractError(f"Unknown computed mapping {computed!r}")
+        if "lat" not in positions or "lon" not in positions:
+            raise ContractError(f"Computed mapping {computed} needs lat and lon canonical columns")
+        lat_idx, lon_idx = positions["lat"], positions["lon"]
+        axis = COMPUTED_MAPPINGS.index(computed)
+
+        def grid_column(rows: list[Row], features: dict) -> list[str]:
+            if "osgb36" not in features:
+                features["osgb36"] = _osgb36_grid(rows, lat_idx, lon_idx)
+            return features["osgb36"][axis]
+
+        return grid_column
+
+    if "lookup" in mapping:
+        table = lookups.get(mapping["lookup"])
+        if table is None:
+            raise ContractError(f"Lookup table {mapping['lookup']!r} is not declared under lookups")
+        key_name, key_of = mapping["key"], _key_getter(mapping["key"], positions)
+        field, default = mapping["value"], str(mapping.get("default", ""))
+
+        def join_column(rows: list[Row], features: dict) -> list[str]:
+            # Key columns are shared by every join on the same key; each distinct key resolves once.
+            keys = features.get(("key", key_name))
+            if keys is None:
+                keys = features[("key", key_name)] = [key_of(row) for row in rows]
+            resolved = {}
+            for key in set(keys):
+                match = table.get(key)
+                resolved[key] = default if match is None else match.get(field) or default
+            return list(map(resolved.__getitem__, keys))
+
+        return join_column
+
+    raise ContractError(f"source_mapping needs one of {MAPPING_KINDS}: {mapping}")
+
+
+def _compile_mapping(mapping, canonical_header: list[str], territory_code: str, lookups: LookupTables) -> ColumnFn:
+    positions = {name: idx for idx, name in enumerate(canonical_header)}
+    if isinstance(mapping, dict):
+        return _compile_structured(mapping, positions, lookups)
+
+    postcode_idx = positions.get("normalised_postcode")
+    if mapping == "normalised_postcode_no_space" and postcode_idx is not None:
+        return _per_row(lambda row: row[postcode_idx].replace(" ", ""))
+    if mapping in ("postcode_7char", "postcode_8char") and postcode_idx is not None:
+        width = 7 if mapping == "postcode_7char" else 8
+        return lambda rows, _features: [fixed_width_postcode(row[postcode_idx], width) for row in rows]
+    if mapping == "country_code_or_blank":
+        return _constant(territory_code)
+    if mapping in positions:
+        idx = positions[mapping]
+        return lambda rows, _features: [row[idx] for row in rows]
+    if mapping in ("blank", "normalised_postcode", "normalised_postcode_no_space", "postcode_7char", "postcode_8char"):
+        return _constant("")
     raise ContractError(f"Missing mapped column definition for source_mapping={mapping}")
 
 
-def _verify_header(path: Path, expected_header: list[str]) -> None:
-    with path.open("r", encoding="utf-8", newline="") as f:
-        reader = csv.reader(f)
-        actual = next(reader)
-    if actual != expected_header:
-        raise ContractError(f"ONSPD header/order mismatch: {actual} != {expected_header}")
-
-
-def _compute_fill_rates(rows: list[dict], header: list[str]) -> list[dict]:
-    stats = []
-    total = len(rows)
-    for column in header:
-        filled_count = sum(1 for row in rows if row.get(column, "") not in ("", None))
-        null_count = total - filled_count
-        fill_percent = 0.0 if total == 0 else round((filled_count / total) * 100, 2)
-        stats.append(
-            {
-                "column": column,
-                "filled": filled_count,
-                "null": null_count,
-                "fill_percent": fill_percent,
-            }
-        )
-    return stats
+def compile_projection(
+    columns: list[dict],
+    canonical_header: list[str],
+    territory_code: str,
+    lookups: LookupTables | None = None,
+) -> Callable[[list[Row]], list[list[str]]]:
+    """Build a function from a chunk of canonical CSV rows to ONSPD values, column by column."""
+    column_fns = [
+        _compile_mapping(column["source_mapping"], canonical_header, territory_code, lookups or {})
+        for column in columns
+    ]
+
+    def project(rows: list[Row]) -> list[list[str]]:
+        features: dict = {}
+        return [column_fn(rows, features) for column_fn in column_fns]
+
+    return project
+
+
+@contextmanager
+def _canonical_source(path: Path, records: list[dict[str, str]] | None) -> Iterator[tuple[list[str], Iterator[Row]]]:
+    if records is not None:
+        yield list(CANONICAL_HEADERS), (list(record.values()) for record in records)
+        return
+    if not path.exists():
+        raise ContractError(f"Canonical input missing: {path}")
+    with path.open("r", encoding="utf-8", newline="") as src:
+        reader = csv.reader(src)
+        yield next(reader, []), reader
 
 
 def run_map_onspd(
@@ -61,7 +229,9 @@ def run_map_onspd(
     territory_config: dict,
     onspd_columns: dict,
     data_dir: Path,
+    canonical_records: list[dict[str, str]] | None = None,
 ) -> dict:
+    """Project the canonical CSV, or this run's ``canonical_records`` when given, onto the ONSPD contract."""
     columns = onspd_columns.get("columns", [])
     header = [column["name"] for column in columns]
 
@@ -69,25 +239,29 @@ def run_map_onspd(
         raise ContractError("Duplicate header names in onspd_columns config")
 
     canonical_path = data_dir / "out" / territory_config["output"]["canonical_filename"]
-    canonical_rows = _read_canonical_rows(canonical_path)
-
-    out_rows: list[dict] = []
-    for canonical_row in canonical_rows:
-        out_row = {}
-        for column in columns:
-            name = column["name"]
-            mapping = column["source_mapping"]
-            value = _value_for_mapping(mapping, canonical_row, territory_code)
-            out_row[name] = "" if value is None else value
-        out_rows.append(out_row)
-
     out_path = data_dir / "out" / territory_config["output"]["onspd_filename"]
-    write_csv(out_path, header, out_rows)
-    _verify_header(out_path, header)
+    contract = ContractCheck(columns)
+    with _canonical_source(canonical_path, canonical_records) as (canonical_header, reader):
+        lookups = load_lookup_tables(onspd_columns.get("lookups"))
+        width = len(canonical_header)
+        # Compiled before the output is opened, so a bad mapping leaves it untouched.
+        project = compile_projection(columns, canonical_header, territory_code, lookups)
+        ensure_dir(out_path.parent)
+        with out_path.open("w", encoding="utf-8", newline="") as dst:
+            writer = csv.writer(dst)
+            writer.writerow(header)
+            while chunk := list(islice(reader, CHUNK_ROWS)):
+                for row in chunk:
+                    if len(row) < width:
+                        row += [""] * (width - len(row))
+                values = project(chunk)
+                writer.writerows(zip(*values))
+                contract.add_columns(values)
 
     return {
         "path": str(out_path),
-        "rows": len(out_rows),
-        "fill_rates": _compute_fill_rates(out_rows, header),
+        "rows": contract.rows,
+        "fill_rates": contract.fill_rates(),
+        "contract": contract.report(),
         "header": header,
     }
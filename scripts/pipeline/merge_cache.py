@@ -0,0 +1,105 @@
+"""Persistent per-postcode merge cache for incremental merges.
+
+Each canonical row is stored with a content hash of the raw records that
+produced it. A cached row is reused only when its group hash matches and the
+whole cache was written under the same config fingerprint (source priority,
+scoring profile, CRS hints, validation settings and boundary), so an
+incremental merge is byte-identical to a full one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from scripts.common.fs import ensure_dir, read_json
+from scripts.common.models import RawRecord
+
+# Bump when canonical row construction changes in a way config cannot capture.
+MERGE_CACHE_VERSION = 2
+# Provenance stamped afresh by every harvest; canonical rows never read these.
+_UNHASHED_FIELDS = frozenset({"extract_date", "run_id", "raw_payload_ref"})
+
+
+def _digest(value) -> str:
+    encoded = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _boundary_digest(territory_config: dict) -> str | None:
+    # A boundary given as a file path can change without the config changing.
+    value = territory_config.get("validation", {}).get("boundary_wgs84")
+    if isinstance(value, str) and Path(value).exists():
+        return hashlib.blake2b(Path(value).read_bytes(), digest_size=16).hexdigest()
+    return None
+
+
+def config_fingerprint(territory_code: str, territory_config: dict, profile: dict) -> str:
+    return _digest(
+        {
+            "version": MERGE_CACHE_VERSION,
+            "territory": territory_code,
+            "source_priority": territory_config.get("source_priority", []),
+            "scoring_profile": profile,
+            "crs": territory_config.get("crs", {}),
+            "validation": territory_config.get("validation", {}),
+            "boundary_file": _boundary_digest(territory_config),
+        }
+    )
+
+
+def group_hash(key: str, records: list[RawRecord]) -> str:
+    return _digest(
+        [
+            key,
+            [
+                {name: value for name, value in record.to_dict().items() if name not in _UNHASHED_FIELDS}
+                for record in records
+            ],
+        ]
+    )
+
+
+class MergeCache:
+    def __init__(self, fingerprint: str) -> None:
+        self.fingerprint = fingerprint
+        self.previous: dict[str, dict] = {}
+        self.current: dict[str, dict] = {}
+        self.reused = 0
+        self.recomputed = 0
+
+    def load(self, path: Path) -> None:
+        if not path.exists():
+            return
+        try:
+            payload = read_json(path)
+        except (OSError, ValueError):
+            # A cache cut short by an interrupted run only costs a full rebuild.
+            return
+        if not isinstance(payload, dict) or payload.get("config_fingerprint") != self.fingerprint:
+            return
+        self.previous = payload.get("groups") or {}
+
+    def lookup(self, key: str, content_hash: str) -> tuple[dict, dict] | None:
+        entry = self.previous.get(key)
+        if entry is None or entry.get("hash") != content_hash:
+            self.recomputed += 1
+            return None
+        self.reused += 1
+        self.current[key] = entry
+        return entry["row"], entry["explanation"]
+
+    def store(self, key: str, content_hash: str, row: dict, explanation: dict) -> None:
+        self.current[key] = {"hash": content_hash, "row": row, "explanation": explanation}
+
+    def save(self, path: Path) -> None:
+        ensure_dir(path.parent)
+        # Only groups seen in this run are kept; rows keep their field order.
+        payload = {"config_fingerprint": self.fingerprint, "groups": self.current}
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+            f.write("\n")
+        os.replace(tmp_path, path)
@@ -3,148 +3,372 @@
 from __future__ import annotations
 
 from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import groupby, islice
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
-from scripts.common.fs import read_json, write_json
-from scripts.common.postcode import normalise_postcode
-from scripts.common.scoring import apply_scoring_profile
-from scripts.pipeline.coordinates import resolve_best_coordinate
+from scripts.common.boundary import BoundaryIndex, load_boundary
+from scripts.common.constants import RAW_SOURCES
+from scripts.common.errors import ConfigError
+from scripts.common.fs import iter_json_array
+from scripts.common.models import CanonicalRow, RawRecord
+from scripts.common.postcode import PostcodeNormaliser
+from scripts.common.scoring import CompiledScoringProfile, compile_scoring_profile
+from scripts.pipeline.coordinates import resolve_best_coordinates
+from scripts.pipeline.intermediate import write_canonical_intermediate
+from scripts.pipeline.merge_cache import MergeCache, config_fingerprint, group_hash
+from scripts.pipeline.qa import apply_coordinate_qa
 
-RAW_SOURCES = {
-    "arcgis": "raw/arcgis/{territory}_arcgis.json",
-    "overpass": "raw/osm/overpass/{territory}_overpass.json",
-    "geofabrik": "raw/osm/geofabrik/{territory}_geofabrik.json",
-}
+POSTCODE_CACHE_PATH = "state/postcode_cache/{territory}.json"
+MERGE_CACHE_PATH = "state/merge_cache/{territory}.json"
+MERGE_ENGINES = ("classic", "columnar")
+NORMALISE_BATCH_SIZE = 10_000
+INVALID_SAMPLE_LIMIT = 50
+# Raw records in the postcode groups resolved per round trip to the cache and the worker pool.
+BUILD_BATCH_RECORDS = 200_000
+# Rough in-memory cost of one raw record in a build batch, used to fit batches to max_memory_bytes.
+BUILD_RECORD_BYTES = 1024
 
 
-def _load_source_rows(data_dir: Path, territory_code: str) -> list[dict]:
-    rows: list[dict] = []
+@dataclass(frozen=True)
+class MergeOptions:
+    engine: str = "classic"
+    # When set, merge runs as a bounded-memory external sort (see external_merge).
+    max_memory_bytes: int | None = None
+    # Reuse cached canonical rows for postcode groups whose inputs are unchanged.
+    incremental: bool = False
+    # Worker processes for coordinate resolution and scoring, sharded by outward code.
+    workers: int = 1
+
+
+@dataclass
+class NormaliseStats:
+    raw_rows: int = 0
+    valid_rows: int = 0
+    invalid_by_source: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    invalid_samples: list[dict] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class PostcodeGroup:
+    """Raw records for one normalised postcode, ranked for canonical selection."""
+
+    key: str
+    records: list[RawRecord]
+    representative_postcode: str | None
+    unique_sources: list[str]
+    source_classes: set[str]
+
+
+def _iter_source_rows(
+    data_dir: Path, territory_code: str, raw_payloads: dict[str, dict] | None = None
+) -> Iterator[RawRecord]:
     territory = territory_code.lower()
-    for template in RAW_SOURCES.values():
+    for source, template in RAW_SOURCES.items():
+        if raw_payloads and source in raw_payloads:
+            for row in raw_payloads[source].get("rows", []):
+                yield RawRecord.from_dict(row)
+            continue
         path = data_dir / template.format(territory=territory)
         if not path.exists():
             continue
-        payload = read_json(path)
-        rows.extend(payload.get("rows", []))
-    return rows
+        for row in iter_json_array(path, "rows"):
+            yield RawRecord.from_dict(row)
+
+
+def _iter_normalised_rows(
+    raw_rows: Iterable[RawRecord],
+    normaliser: PostcodeNormaliser,
+    stats: NormaliseStats,
+) -> Iterator[tuple[RawRecord, str]]:
+    """Normalise raw rows in batches, counting invalid postcodes as they stream past."""
+    raw_iter = iter(raw_rows)
+    while True:
+        batch = list(islice(raw_iter, NORMALISE_BATCH_SIZE))
+        if not batch:
+            return
+        stats.raw_rows += len(batch)
+        normalised_values = normaliser.normalise_many(raw.get("raw_postcode") for raw in batch)
+        for raw, normalised in zip(batch, normalised_values):
+            if normalised is None:
+                source_name = raw.get("source_name", "unknown")
+                stats.invalid_by_source[source_name] += 1
+                if len(stats.invalid_samples) < INVALID_SAMPLE_LIMIT:
+                    stats.invalid_samples.append(
+                        {
+                            "source_name": source_name,
+                            "raw_postcode": raw.get("raw_postcode"),
+                        }
+                    )
+                continue
+            stats.valid_rows += 1
+            yield raw, normalised
 
 
 def _priority_lookup(source_priority: list[str]) -> dict[str, int]:
     return {name: idx for idx, name in enumerate(source_priority)}
 
 
+def rank_postcode_group(
+    key: str,
+    group_records: list[RawRecord],
+    territory_code: str,
+    source_priority: dict[str, int],
+) -> PostcodeGroup:
+    # Attribute access rather than .get(): this runs for every raw row.
+    records = sorted(
+        group_records,
+        key=lambda row: (
+            row.territory or territory_code,
+            key,
+            row.source_name or "",
+            row.source_record_id or "",
+        ),
+    )
+
+    ranked_records = sorted(
+        records,
+        key=lambda row: (
+            source_priority.get(row.source_name or "", 9999),
+            row.raw_postcode or "",
+        ),
+    )
+
+    return PostcodeGroup(
+        key=key,
+        records=records,
+        representative_postcode=ranked_records[0].raw_postcode,
+        unique_sources=sorted(
+            {row.source_name or "" for row in records},
+            key=lambda src: (source_priority.get(src, 9999), src),
+        ),
+        source_classes={row.source_class or "other" for row in records},
+    )
+
+
+def _iter_groups_classic(
+    valid_rows: list[tuple[RawRecord, str]],
+    territory_code: str,
+    source_priority: dict[str, int],
+) -> Iterator[PostcodeGroup]:
+    grouped: dict[str, list[RawRecord]] = defaultdict(list)
+    for raw, normalised in valid_rows:
+        grouped[normalised].append(raw)
+
+    for key in sorted(grouped):
+        yield rank_postcode_group(key, grouped[key], territory_code, source_priority)
+
+
+def _build_canonical_row(
+    group: PostcodeGroup,
+    coordinate: dict,
+    territory_code: str,
+    territory_config: dict,
+    profile: CompiledScoringProfile,
+) -> tuple[CanonicalRow, dict]:
+    key = group.key
+    notes = list(coordinate.get("notes", []))
+
+    if "authoritative" not in group.source_classes:
+        notes.append("OSM_BASELINE_ONLY")
+    if not coordinate["has_coordinates"]:
+        notes.append("COORDINATES_MISSING")
+    if territory_code == "IM" and territory_config.get("validation", {}).get("permission_needed_possible_for_iom"):
+        notes.append("PERMISSION_NEEDED_POSSIBLE")
+
+    confidence_score, explanation = profile.score(
+        source_classes=group.source_classes,
+        coordinate_source=coordinate.get("coordinate_source"),
+    )
+
+    row = CanonicalRow(
+        territory=territory_code,
+        postcode=group.representative_postcode or key,
+        normalised_postcode=key,
+        source_list=";".join(group.unique_sources),
+        source_count=len(group.unique_sources),
+        has_coordinates=bool(coordinate["has_coordinates"]),
+        lat=coordinate.get("lat"),
+        lon=coordinate.get("lon"),
+        coordinate_source=coordinate.get("coordinate_source"),
+        confidence_score=confidence_score,
+        first_seen="",
+        last_seen="",
+        notes=";".join(sorted(set(notes))) if notes else None,
+    )
+    return row, explanation
+
+
+def _build_shard(
+    groups: list[PostcodeGroup],
+    territory_code: str,
+    territory_config: dict,
+    profile: CompiledScoringProfile,
+    boundary: BoundaryIndex | None = None,
+) -> list[tuple[CanonicalRow, dict]]:
+    coordinates = resolve_best_coordinates([group.records for group in groups], territory_config, boundary)
+    return [
+        _build_canonical_row(group, coordinate, territory_code, territory_config, profile)
+        for group, coordinate in zip(groups, coordinates)
+    ]
+
+
+def _outward_code(group: PostcodeGroup) -> str:
+    return group.key.split(" ", 1)[0]
+
+
+def _build_sharded(
+    pool: Executor,
+    groups: list[PostcodeGroup],
+    territory_code: str,
+    territory_config: dict,
+    profile: CompiledScoringProfile,
+    boundary: BoundaryIndex | None = None,
+) -> list[tuple[CanonicalRow, dict]]:
+    # Groups arrive sorted by key, so each outward code is one contiguous shard
+    # and concatenating shard results in submission order keeps the row order.
+    futures = [
+        pool.submit(_build_shard, list(shard), territory_code, territory_config, profile, boundary)
+        for _outward, shard in groupby(groups, key=_outward_code)
+    ]
+    return [built for future in futures for built in future.result()]
+
+
+def _build_batch_records(max_memory_bytes: int | None) -> int:
+    """Raw records per build batch; a memory budget caps the batch to fit within it."""
+    if max_memory_bytes is None:
+        return BUILD_BATCH_RECORDS
+    return max(1, min(BUILD_BATCH_RECORDS, max_memory_bytes // BUILD_RECORD_BYTES))
+
+
+def _iter_batches(groups: Iterable[PostcodeGroup], max_records: int) -> Iterator[list[PostcodeGroup]]:
+    """Consecutive groups holding at most ``max_records`` raw records; a larger group goes alone."""
+    batch: list[PostcodeGroup] = []
+    batch_records = 0
+    for group in groups:
+        if batch and batch_records + len(group.records) > max_records:
+            yield batch
+            batch, batch_records = [], 0
+        batch.append(group)
+        batch_records += len(group.records)
+    if batch:
+        yield batch
+
+
+def _iter_canonical_rows(
+    groups: Iterable[PostcodeGroup],
+    build_many: Callable[[list[PostcodeGroup]], list[tuple[CanonicalRow, dict]]],
+    merge_cache: MergeCache | None,
+    max_records: int = BUILD_BATCH_RECORDS,
+) -> Iterator[tuple[str, CanonicalRow, dict]]:
+    for batch in _iter_batches(groups, max_records):
+        if merge_cache is None:
+            hashes = [None] * len(batch)
+            cached = [None] * len(batch)
+        else:
+            hashes = [group_hash(group.key, group.records) for group in batch]
+            cached = [merge_cache.lookup(group.key, content_hash) for group, content_hash in zip(batch, hashes)]
+
+        fresh = iter(build_many([group for group, hit in zip(batch, cached) if hit is None]))
+        for group, content_hash, hit in zip(batch, hashes, cached):
+            if hit is None:
+                row, explanation = next(fresh)
+                if merge_cache is not None:
+                    merge_cache.store(group.key, content_hash, row.to_dict(), explanation)
+            else:
+                row, explanation = CanonicalRow.from_dict(hit[0]), hit[1]
+            yield group.key, row, explanation
+
+
 def run_normalise_merge(
     territory_code: str,
     territory_config: dict,
     scoring_rules: dict,
     data_dir: Path,
     run_id: str,
+    options: MergeOptions | None = None,
+    raw_payloads: dict[str, dict] | None = None,
 ) -> dict:
-    raw_rows = _load_source_rows(data_dir, territory_code)
+    """Merge raw rows into canonical rows; ``raw_payloads`` are this run's harvest payloads by source."""
+    options = options or MergeOptions()
+    if options.engine not in MERGE_ENGINES:
+        raise ConfigError(f"Unknown merge engine: {options.engine}")
+
+    if options.workers < 1:
+        raise ConfigError(f"Merge workers must be at least 1, got {options.workers}")
+    if options.max_memory_bytes is not None and options.engine != "classic":
+        raise ConfigError("Bounded-memory merge (max_memory_bytes) only supports the classic engine")
+
     source_priority = _priority_lookup(territory_config["source_priority"])
 
-    invalid_count_by_source: dict[str, int] = defaultdict(int)
-    invalid_samples: list[dict] = []
-    grouped: dict[str, list[dict]] = defaultdict(list)
-
-    for raw in raw_rows:
-        normalised = normalise_postcode(raw.get("raw_postcode"))
-        if normalised is None:
-            source_name = raw.get("source_name", "unknown")
-            invalid_count_by_source[source_name] += 1
-            if len(invalid_samples) < 50:
-                invalid_samples.append(
-                    {
-                        "source_name": source_name,
-                        "raw_postcode": raw.get("raw_postcode"),
-                    }
-                )
-            continue
+    normaliser = PostcodeNormaliser()
+    cache_path = data_dir / POSTCODE_CACHE_PATH.format(territory=territory_code.lower())
+    normaliser.load(cache_path)
+    stats = NormaliseStats()
+    normalised_rows = _iter_normalised_rows(
+        _iter_source_rows(data_dir, territory_code, raw_payloads), normaliser, stats
+    )
+
+    if options.max_memory_bytes is not None:
+        from scripts.pipeline.external_merge import iter_groups_external
+
+        groups = iter_groups_external(normalised_rows, territory_code, source_priority, options.max_memory_bytes)
+    elif options.engine == "columnar":
+        # Imported lazily so the default engine does not pay for pandas.
+        from scripts.pipeline.columnar_merge import iter_groups_columnar
 
-        enriched = dict(raw)
-        enriched["normalised_postcode"] = normalised
-        grouped[normalised].append(enriched)
+        groups = iter_groups_columnar(list(normalised_rows), territory_code, source_priority)
+    else:
+        groups = _iter_groups_classic(list(normalised_rows), territory_code, source_priority)
 
-    sorted_keys = sorted(grouped)
     profile_name = territory_config.get("scoring_profile", "default")
     profile = scoring_rules["profiles"][profile_name]
+    compiled_profile = compile_scoring_profile(profile)
 
-    canonical_rows: list[dict] = []
-    score_explanations: dict[str, dict] = {}
-
-    for key in sorted_keys:
-        records = sorted(
-            grouped[key],
-            key=lambda row: (
-                row.get("territory", territory_code),
-                key,
-                row.get("source_name", ""),
-                row.get("source_record_id") or "",
-            ),
-        )
-
-        ranked_records = sorted(
-            records,
-            key=lambda row: (
-                source_priority.get(row.get("source_name", ""), 9999),
-                row.get("raw_postcode") or "",
-            ),
-        )
-        representative = ranked_records[0]
-
-        unique_sources = sorted(
-            {row.get("source_name", "") for row in records},
-            key=lambda src: (source_priority.get(src, 9999), src),
-        )
-        source_classes = {row.get("source_class", "other") for row in records}
-
-        coordinate = resolve_best_coordinate(records, territory_config)
-        notes = list(coordinate.get("notes", []))
-
-        if "authoritative" not in source_classes:
-            notes.append("OSM_BASELINE_ONLY")
-        if not coordinate["has_coordinates"]:
-            notes.append("COORDINATES_MISSING")
-        if territory_code == "IM" and territory_config.get("validation", {}).get("permission_needed_possible_for_iom"):
-            notes.append("PERMISSION_NEEDED_POSSIBLE")
-
-        confidence_score, explanation = apply_scoring_profile(
-            profile,
-            source_classes=source_classes,
-            coordinate_source=coordinate.get("coordinate_source"),
-        )
-        score_explanations[key] = explanation
-
-        canonical_rows.append(
-            {
-                "territory": territory_code,
-                "postcode": representative.get("raw_postcode") or key,
-                "normalised_postcode": key,
-                "source_list": ";".join(unique_sources),
-                "source_count": len(unique_sources),
-                "has_coordinates": bool(coordinate["has_coordinates"]),
-                "lat": coordinate.get("lat"),
-                "lon": coordinate.get("lon"),
-                "coordinate_source": coordinate.get("coordinate_source"),
-                "confidence_score": confidence_score,
-                "first_seen": "",
-                "last_seen": "",
-                "notes": ";".join(sorted(set(notes))) if notes else None,
-            }
-        )
-
-    payload = {
+    merge_cache = None
+    merge_cache_path = data_dir / MERGE_CACHE_PATH.format(territory=territory_code.lower())
+    if options.incremental:
+        merge_cache = MergeCache(config_fingerprint(territory_code, territory_config, profile))
+        merge_cache.load(merge_cache_path)
+
+    canonical_rows: list[CanonicalRow] = []
+    score_explanations: list[dict] = []
+
+    build_args = {
+        "territory_code": territory_code,
+        "territory_config": territory_config,
+        "profile": compiled_profile,
+        "boundary": load_boundary(territory_config),
+    }
+    pool_context = ProcessPoolExecutor(max_workers=options.workers) if options.workers > 1 else nullcontext()
+    with pool_context as pool:
+        if pool is None:
+            build_many = partial(_build_shard, **build_args)
+        else:
+            build_many = partial(_build_sharded, pool, **build_args)
+
+        max_records = _build_batch_records(options.max_memory_bytes)
+        for _key, row, explanation in _iter_canonical_rows(groups, build_many, merge_cache, max_records):
+            score_explanations.append(explanation)
+            canonical_rows.append(row)
+    normaliser.save(cache_path)
+    if merge_cache is not None:
+        merge_cache.save(merge_cache_path)
+    coordinate_qa = apply_coordinate_qa(canonical_rows, territory_config)
+
+    summary = {
         "territory": territory_code,
         "run_id": run_id,
-        "raw_row_count": len(raw_rows),
-        "valid_postcodes": sum(len(v) for v in grouped.values()),
+        "raw_row_count": stats.raw_rows,
+        "valid_postcodes": stats.valid_rows,
         "unique_postcodes": len(canonical_rows),
-        "invalid_postcodes": dict(sorted(invalid_count_by_source.items())),
-        "invalid_samples": invalid_samples,
-        "score_explanations": score_explanations,
-        "rows": canonical_rows,
+        "invalid_postcodes": dict(sorted(stats.invalid_by_source.items())),
+        "invalid_samples": stats.invalid_samples,
+        "coordinate_qa": coordinate_qa,
     }
-
-    out_path = data_dir / "intermediate" / f"{territory_code.lower()}_canonical.json"
-    write_json(out_path, payload)
-    return payload
+    payload = write_canonical_intermediate(data_dir, territory_code, summary, canonical_rows, score_explanations)
+    return {**payload, "rows": canonical_rows}
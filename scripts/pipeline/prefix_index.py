@@ -0,0 +1,147 @@
+"""Outcode -> sector -> unit prefix index for autocomplete.
+
+Export writes ``data/out/<name>_prefix.json`` with a count and bounding box
+for every outcode and sector. Units are not repeated there: the sorted
+``.lookup`` file already holds them, and any text prefix is one contiguous key
+range in it. ``PrefixIndex`` reads the sidecar and maps the lookup file on
+first use, then answers queries by bisecting sorted name lists.
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+from pathlib import Path
+
+from scripts.common.fs import read_json, write_json
+from scripts.pipeline.lookup_file import PostcodeLookup, lookup_path
+
+DEFAULT_COMPLETION_LIMIT = 10
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def prefix_index_path(territory_config: dict, data_dir: Path) -> Path:
+    stem = Path(territory_config["output"]["canonical_filename"]).stem
+    return data_dir / "out" / f"{stem}_prefix.json"
+
+
+def _extend(stats: dict, row) -> None:
+    stats["count"] += 1
+    if not row["has_coordinates"]:
+        return
+    lat, lon = row["lat"], row["lon"]
+    bbox = stats["bbox"]
+    if bbox is None:
+        stats["bbox"] = [lon, lat, lon, lat]
+    else:
+        bbox[0], bbox[1] = min(bbox[0], lon), min(bbox[1], lat)
+        bbox[2], bbox[3] = max(bbox[2], lon), max(bbox[3], lat)
+
+
+def write_prefix_index(territory_config: dict, data_dir: Path, rows) -> Path:
+    outcodes: dict[str, dict] = {}
+    sectors: dict[str, dict] = {}
+    for row in rows:
+        postcode = row["normalised_postcode"]
+        outcode = postcode.split(" ", 1)[0]
+        for table, name in ((outcodes, outcode), (sectors, postcode[:-2])):
+            _extend(table.setdefault(name, {"count": 0, "bbox": None}), row)
+    path = prefix_index_path(territory_config, data_dir)
+    write_json(path, {"outcodes": outcodes, "sectors": sectors})
+    return path
+
+
+def _clean(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text.upper().lstrip())
+
+
+class PrefixIndex:
+    def __init__(self, path: Path, lookup_file: Path | None = None) -> None:
+        self.path = Path(path)
+        self.lookup_file = lookup_file or self.path.with_name(self.path.name.removesuffix("_prefix.json") + ".lookup")
+        self._stats: dict[str, dict[str, dict]] | None = None
+        self._names: dict[str, list[str]] = {}
+        self._lookup: PostcodeLookup | None = None
+
+    @classmethod
+    def for_territory(cls, territory_config: dict, data_dir: Path) -> PrefixIndex:
+        return cls(prefix_index_path(territory_config, data_dir), lookup_path(territory_config, data_dir))
+
+    def _level_stats(self, level: str) -> dict[str, dict]:
+        if self._stats is None:
+            payload = read_json(self.path)
+            self._stats = {"outcode": payload["outcodes"], "sector": payload["sectors"]}
+            self._names = {name: sorted(table) for name, table in self._stats.items()}
+        return self._stats[level]
+
+    @property
+    def lookup(self) -> PostcodeLookup:
+        if self._lookup is None:
+            self._lookup = PostcodeLookup(self.lookup_file)
+        return self._lookup
+
+    def close(self) -> None:
+        if self._lookup is not None:
+            self._lookup.close()
+            self._lookup = None
+
+    def _matching(self, level: str, prefix: str, limit: int | None) -> list[dict]:
+        stats = self._level_stats(level)
+        names = self._names[level]
+        lo = bisect.bisect_left(names, prefix)
+        hi = bisect.bisect_left(names, prefix + "\uffff")
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return [{"prefix": name, "level": level, **stats[name]} for name in names[lo:hi]]
+
+    def summary(self, prefix: str) -> dict | None:
+        """Count and bounding box (``[min_lon, min_lat, max_lon, max_lat]``) for an exact outcode, sector or unit prefix."""
+        prefix = _clean(prefix).rstrip()
+        if not prefix:
+            return None
+        outward, _, inward = prefix.partition(" ")
+        if not inward:
+            stats = self._level_stats("outcode").get(outward)
+            return stats and {"prefix": outward, "level": "outcode", **stats}
+        if len(inward) == 1:
+            stats = self._level_stats("sector").get(prefix)
+            return stats and {"prefix": prefix, "level": "sector", **stats}
+
+        units = list(self.lookup.iter_prefix(prefix))
+        if not units:
+            return None
+        stats = {"count": 0, "bbox": None}
+        for unit in units:
+            _extend(stats, unit)
+        return {"prefix": prefix, "level": "unit", **stats}
+
+    def complete(self, text: str, limit: int | None = DEFAULT_COMPLETION_LIMIT) -> list[dict]:
+        """Completions one level below what ``text`` has pinned down.
+
+        No space yet completes outcodes; an outcode plus up to one inward
+        character completes sectors; anything longer completes units.
+        """
+        text = _clean(text)
+        if not text:
+            return self._matching("outcode", "", limit)
+        outward, space, inward = text.partition(" ")
+        if not space:
+            return self._matching("outcode", outward, limit)
+        if len(inward) <= 1:
+            return self._matching("sector", f"{outward} {inward}", limit)
+        return [
+            {
+                "prefix": unit["normalised_postcode"],
+                "level": "unit",
+                "count": 1,
+                "bbox": [unit["lon"], unit["lat"], unit["lon"], unit["lat"]] if unit["has_coordinates"] else None,
+            }
+            for unit in self.lookup.iter_prefix(f"{outward} {inward}", limit)
+        ]
+
+    def units(self, prefix: str, limit: int | None = None) -> list[str]:
+        """Unit postcodes under a prefix; an outcode alone does not match longer outcodes."""
+        prefix = _clean(prefix)
+        if prefix and " " not in prefix:
+            prefix += " "
+        return [unit["normalised_postcode"] for unit in self.lookup.iter_prefix(prefix, limit)]
@@ -0,0 +1,74 @@
+"""Coordinate QA over canonical rows: shared placeholder points and sector outliers.
+
+Both checks are a single pass over the rows plus per-bucket work: coordinates
+are hashed into a fixed grid (cells of ``DUPLICATE_GRID_DEGREES``) to find
+points shared by many postcodes, and postcodes are bucketed by sector (the
+postcode minus its last two characters) to find rows far from their sector's
+median position.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from statistics import median
+
+from scripts.common.geometry import approx_distance_km
+
+DUPLICATE_GRID_DEGREES = 1e-6
+DEFAULT_QA = {
+    # Postcodes sharing one grid cell before all of them are flagged.
+    "duplicate_coordinate_min_postcodes": 10,
+    # Distance from the sector median position beyond which a postcode is flagged.
+    "sector_outlier_km": 5.0,
+    # Sectors smaller than this have no meaningful median.
+    "sector_min_postcodes": 3,
+}
+NOTE_DUPLICATE = "COORDINATE_SHARED_PLACEHOLDER"
+NOTE_SECTOR_OUTLIER = "SECTOR_DISTANCE_OUTLIER"
+
+
+def _add_note(row, note: str) -> None:
+    notes = set(row["notes"].split(";")) if row["notes"] else set()
+    notes.add(note)
+    row["notes"] = ";".join(sorted(notes))
+
+
+def apply_coordinate_qa(rows: list, territory_config: dict) -> dict[str, int]:
+    """Add QA notes to ``rows`` in place and return counters."""
+    qa = {**DEFAULT_QA, **(territory_config.get("validation", {}).get("qa") or {})}
+
+    cells: dict[tuple[int, int], list[int]] = defaultdict(list)
+    sectors: dict[str, list[int]] = defaultdict(list)
+    for idx, row in enumerate(rows):
+        if not row["has_coordinates"]:
+            continue
+        lat, lon = row["lat"], row["lon"]
+        cells[(round(lat / DUPLICATE_GRID_DEGREES), round(lon / DUPLICATE_GRID_DEGREES))].append(idx)
+        sectors[row["normalised_postcode"][:-2]].append(idx)
+
+    duplicate_cells = 0
+    duplicate_rows = 0
+    for members in cells.values():
+        if len(members) >= qa["duplicate_coordinate_min_postcodes"]:
+            duplicate_cells += 1
+            duplicate_rows += len(members)
+            for idx in members:
+                _add_note(rows[idx], NOTE_DUPLICATE)
+
+    sector_outliers = 0
+    for members in sectors.values():
+        if len(members) < qa["sector_min_postcodes"]:
+            continue
+        centre_lat = median(rows[idx]["lat"] for idx in members)
+        centre_lon = median(rows[idx]["lon"] for idx in members)
+        for idx in members:
+            row = rows[idx]
+            if approx_distance_km(centre_lat, centre_lon, row["lat"], row["lon"]) > qa["sector_outlier_km"]:
+                sector_outliers += 1
+                _add_note(row, NOTE_SECTOR_OUTLIER)
+
+    return {
+        "shared_coordinate_points": duplicate_cells,
+        "shared_coordinate_postcodes": duplicate_rows,
+        "sector_distance_outliers": sector_outliers,
+    }
@@ -0,0 +1,414 @@
+"""Uniform-grid spatial index over canonical coordinates for reverse lookups.
+
+Coordinates are projected to local metres (equirectangular about the mean
+latitude, accurate to well under 1% at territory scale) and bucketed into
+square cells sized for a few postcodes each. Points are stored sorted by cell
+with a CSR-style ``cell_start`` array, so the points of any cell are one slice.
+
+Nearest-neighbour queries inside the grid read a per-cell candidate list,
+every point that can be among the k nearest to anywhere in the cell, built the
+first time a cell is queried for that k. Queries off the grid, and radius
+queries, scan a square of cells around every query at once and widen it only
+for queries whose answer could still lie outside it. The index is persisted as
+``data/out/<name>_spatial.npz`` next to the canonical CSV.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from scripts.common.fs import ensure_dir
+
+EARTH_RADIUS_M = 6_371_008.8
+POINTS_PER_CELL = 2
+MIN_CELL_SIZE_M = 1.0
+# Upper bound on (query x neighbour cell) pairs materialised by one scan step.
+MAX_SCAN_CELLS = 4_000_000
+# Candidate lists are padded to a multiple of this so queries batch by list length.
+CANDIDATE_WIDTH_STEP = 8
+_STATE_FIELDS = ("postcodes", "lat", "lon", "_x", "_y", "_cell_start")
+_SCALAR_FIELDS = ("_lat0", "_cos_lat0", "_origin_x", "_origin_y", "cell_size_m", "_nx", "_ny")
+
+
+def _segment_smallest(queries: np.ndarray, dist: np.ndarray, k: int):
+    """Yield (query ids, positions) of the 1st..kth smallest distance per query.
+
+    ``queries`` is non-decreasing, so each query's candidates are one segment;
+    k passes of a segmented min beat a full sort for the small k used here.
+    """
+    if not len(queries):
+        return
+    starts = np.flatnonzero(np.r_[True, queries[1:] != queries[:-1]])
+    segment_of = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(queries)]))
+    work = dist.copy()
+    for _rank in range(k):
+        minima = np.minimum.reduceat(work, starts)
+        found = np.isfinite(minima)
+        if not found.any():
+            return
+        hits = np.flatnonzero(work == minima[segment_of])
+        # First hit per segment keeps ties in gather order.
+        segments, first = np.unique(segment_of[hits], return_index=True)
+        positions = hits[first]
+        keep = found[segments]
+        positions = positions[keep]
+        work[positions] = np.inf
+        yield queries[positions], positions
+
+
+def _segment_kth(values: np.ndarray, starts: np.ndarray, counts: np.ndarray, k: int) -> np.ndarray:
+    """The kth smallest value of each non-empty contiguous segment; inf where a segment is shorter.
+
+    Each pass removes every copy of the segment minimum, so at most k passes
+    are needed and no sort is.
+    """
+    segment_of = np.repeat(np.arange(len(starts)), counts)
+    work = values.copy()
+    taken = np.zeros(len(starts), dtype=np.int64)
+    kth = np.full(len(starts), np.inf)
+    for _pass in range(k):
+        minima = np.minimum.reduceat(work, starts)
+        hits = work == minima[segment_of]
+        removed = np.bincount(segment_of[hits], minlength=len(starts))
+        reached = (taken < k) & (taken + removed >= k) & np.isfinite(minima)
+        kth[reached] = minima[reached]
+        taken += removed
+        work[hits] = np.inf
+    return kth
+
+
+@dataclass
+class _CandidateLists:
+    """Per-cell candidate points, each list a slice ``[start, start + count)`` of the flat arrays.
+
+    ``start`` is -1 for cells not built yet. Entry 0 is padding at infinity.
+    """
+
+    start: np.ndarray
+    count: np.ndarray
+    points: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+
+    @classmethod
+    def empty(cls, n_cells: int) -> _CandidateLists:
+        return cls(
+            np.full(n_cells, -1, dtype=np.int64),
+            np.zeros(n_cells, dtype=np.int64),
+            np.array([-1], dtype=np.int64),
+            np.array([np.inf]),
+            np.array([np.inf]),
+        )
+
+    def extend(self, owners: np.ndarray, points: np.ndarray, x: np.ndarray, y: np.ndarray) -> None:
+        """Append the lists of newly built cells, given as (owner cell, point) pairs."""
+        order = np.lexsort((points, owners))
+        owners, points = owners[order], points[order]
+        cells, first, counts = np.unique(owners, return_index=True, return_counts=True)
+        self.start[cells] = len(self.points) + first
+        self.count[cells] = counts
+        self.points = np.concatenate([self.points, points])
+        self.x = np.concatenate([self.x, x[points]])
+        self.y = np.concatenate([self.y, y[points]])
+
+
+def spatial_index_path(territory_config: dict, data_dir: Path) -> Path:
+    stem = Path(territory_config["output"]["canonical_filename"]).stem
+    return data_dir / "out" / f"{stem}_spatial.npz"
+
+
+class SpatialIndex:
+    def __init__(
+        self,
+        postcodes: np.ndarray,
+        lat: np.ndarray,
+        lon: np.ndarray,
+        *,
+        cell_size_m: float | None = None,
+    ) -> None:
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        self._lat0 = float(lat.mean()) if len(lat) else 0.0
+        self._cos_lat0 = float(np.cos(np.radians(self._lat0)))
+        x, y = self._project(lat, lon)
+
+        self._origin_x = float(x.min()) if len(x) else 0.0
+        self._origin_y = float(y.min()) if len(y) else 0.0
+        width = float(x.max() - self._origin_x) if len(x) else 0.0
+        height = float(y.max() - self._origin_y) if len(y) else 0.0
+        if cell_size_m is None:
+            cell_size_m = float(np.sqrt(max(width * height, 1.0) * POINTS_PER_CELL / max(len(x), 1)))
+        self.cell_size_m = max(float(cell_size_m), MIN_CELL_SIZE_M)
+        self._nx = int(width // self.cell_size_m) + 1
+        self._ny = int(height // self.cell_size_m) + 1
+
+        cx, cy = self._cells(x, y)
+        cell_ids = cy * self._nx + cx
+        order = np.argsort(cell_ids, kind="stable")
+        self.postcodes = np.asarray(postcodes, dtype=str)[order]
+        self.lat, self.lon = lat[order], lon[order]
+        self._x, self._y = x[order], y[order]
+        counts = np.bincount(cell_ids, minlength=self._nx * self._ny)
+        self._cell_start = np.concatenate([[0], np.cumsum(counts)])
+        self._candidates: dict[int, _CandidateLists] = {}
+
+    def __len__(self) -> int:
+        return len(self.postcodes)
+
+    @classmethod
+    def from_rows(cls, rows) -> SpatialIndex:
+        located = [row for row in rows if row["has_coordinates"]]
+        return cls(
+            np.asarray([row["normalised_postcode"] for row in located], dtype=str),
+            np.asarray([row["lat"] for row in located], dtype=np.float64),
+            np.asarray([row["lon"] for row in located], dtype=np.float64),
+        )
+
+    def _project(self, lat, lon) -> tuple[np.ndarray, np.ndarray]:
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        x = np.radians(lon) * self._cos_lat0 * EARTH_RADIUS_M
+        y = np.radians(lat) * EARTH_RADIUS_M
+        return x, y
+
+    def _cells(self, x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # Queries outside the grid are clamped to its edge cells. A point outside the
+        # scanned square is still at least radius_cells * cell_size from the query.
+        cx = np.clip(np.floor((x - self._origin_x) / self.cell_size_m), 0, self._nx - 1).astype(np.int64)
+        cy = np.clip(np.floor((y - self._origin_y) / self.cell_size_m), 0, self._ny - 1).astype(np.int64)
+        return cx, cy
+
+    def _gather(
+        self, qx: np.ndarray, qy: np.ndarray, radius_cells: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """All (query, point, distance) pairs within ``radius_cells`` cells of each query's cell."""
+        side = 2 * radius_cells + 1
+        chunk = max(1, MAX_SCAN_CELLS // (side * side))
+        parts = [
+            self._gather_chunk(qx, qy, start, min(len(qx), start + chunk), radius_cells)
+            for start in range(0, len(qx), chunk)
+        ]
+        if not parts:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0, dtype=np.float64)
+        return tuple(np.concatenate(columns) for columns in zip(*parts))
+
+    def _gather_chunk(
+        self, qx: np.ndarray, qy: np.ndarray, start: int, end: int, radius_cells: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        cx, cy = self._cells(qx[start:end], qy[start:end])
+        queries, points = self._cell_pairs(cx, cy, radius_cells)
+        queries += start
+        distances = np.hypot(self._x[points] - qx[queries], self._y[points] - qy[queries])
+        return queries, points, distances
+
+    def _cell_pairs(self, cx: np.ndarray, cy: np.ndarray, radius_cells: int) -> tuple[np.ndarray, np.ndarray]:
+        """(owner, point) pairs for every point within ``radius_cells`` cells of each owner's cell.
+
+        Each owner's points come out in ascending index order, which is the tie order.
+        """
+        offsets = np.arange(-radius_cells, radius_cells + 1)
+        ncx = (cx[:, None, None] + offsets[None, None, :]).repeat(len(offsets), axis=1).reshape(len(cx), -1)
+        ncy = (cy[:, None, None] + offsets[None, :, None]).repeat(len(offsets), axis=2).reshape(len(cy), -1)
+        valid = (ncx >= 0) & (ncx < self._nx) & (ncy >= 0) & (ncy < self._ny)
+
+        owner_of_cell = np.broadcast_to(np.arange(len(cx))[:, None], ncx.shape)[valid]
+        cell_ids = (ncy * self._nx + ncx)[valid]
+        starts = self._cell_start[cell_ids]
+        counts = self._cell_start[cell_ids + 1] - starts
+        total = int(counts.sum())
+
+        owners = np.repeat(owner_of_cell, counts)
+        run_starts = np.cumsum(counts) - counts
+        points = np.arange(total) - np.repeat(run_starts, counts) + np.repeat(starts, counts)
+        return owners, points
+
+    def _candidate_lists(self, k: int, cells: np.ndarray) -> _CandidateLists:
+        """Candidate lists for k, extended to cover ``cells``.
+
+        For a query in cell C the kth nearest distance is at most R, the kth
+        smallest farthest-distance from C to a point, so only points whose
+        nearest distance from C is within R can be among its k nearest. Lists
+        are built on first use of a cell and kept, so a few queries cost a few
+        cells and a large batch builds each cell once.
+        """
+        lists = self._candidates.get(k)
+        if lists is None:
+            lists = self._candidates[k] = _CandidateLists.empty(self._nx * self._ny)
+        todo = np.unique(cells[lists.start[cells] < 0])
+        if not len(todo):
+            return lists
+
+        owner_parts, point_parts = [], []
+        # One ring settles about half the cells for k=1 but almost none for larger k.
+        max_radius = max(self._nx, self._ny)
+        radius_cells = min(1 if k == 1 else 2, max_radius)
+        while len(todo):
+            side = 2 * radius_cells + 1
+            chunk = max(1, MAX_SCAN_CELLS // (side * side))
+            unsettled = []
+            for start in range(0, len(todo), chunk):
+                batch = todo[start : start + chunk]
+                owners, points, kth, near = self._cell_bounds(batch, radius_cells, k)
+                # Points outside the scanned square are at least radius_cells * cell_size from the cell.
+                settled = (kth < radius_cells * self.cell_size_m) | (radius_cells >= max_radius)
+                keep = settled[owners] & (near <= kth[owners])
+                owner_parts.append(batch[owners[keep]])
+                point_parts.append(points[keep])
+                unsettled.append(batch[~settled])
+            todo = np.concatenate(unsettled)
+            radius_cells = min(radius_cells * 2, max_radius)
+        lists.extend(np.concatenate(owner_parts), np.concatenate(point_parts), self._x, self._y)
+        return lists
+
+    def _cell_bounds(
+        self, cells: np.ndarray, radius_cells: int, k: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Pairs around ``cells`` with each cell's kth smallest farthest-distance and each pair's nearest-distance."""
+        cx, cy = cells % self._nx, cells // self._nx
+        owners, points = self._cell_pairs(cx, cy, radius_cells)
+        x0 = self._origin_x + cx[owners] * self.cell_size_m
+        y0 = self._origin_y + cy[owners] * self.cell_size_m
+        dx0, dx1 = self._x[points] - x0, self._x[points] - (x0 + self.cell_size_m)
+        dy0, dy1 = self._y[points] - y0, self._y[points] - (y0 + self.cell_size_m)
+        far = np.hypot(np.maximum(dx0, -dx1), np.maximum(dy0, -dy1))
+        near = np.hypot(np.maximum(np.maximum(-dx0, dx1), 0.0), np.maximum(np.maximum(-dy0, dy1), 0.0))
+
+        # Owners come out in ascending order, so each cell's pairs are one segment.
+        kth = np.full(len(cells), np.inf)
+        counts = np.bincount(owners, minlength=len(cells))
+        present = np.flatnonzero(counts)
+        if len(present):
+            kth[present] = _segment_kth(far, np.cumsum(counts[present]) - counts[present], counts[present], k)
+        # Slack for rounding: a query can sit a hair outside its cell's rectangle.
+        kth = kth * (1 + 1e-9) + 1e-6
+        return owners, points, kth, near
+
+    def nearest_many(self, lats, lons, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """Indices into ``postcodes`` and distances in metres, shape (n, k); -1/inf where fewer exist.
+
+        Queries inside the grid are answered from their cell's candidate list,
+        batched by list length. The rest scan widening squares of cells.
+        """
+        qx, qy = self._project(lats, lons)
+        qx, qy = np.atleast_1d(qx), np.atleast_1d(qy)
+        indices = np.full((len(qx), k), -1, dtype=np.int64)
+        distances = np.full((len(qx), k), np.inf)
+        if not len(self) or k < 1:
+            return indices, distances
+
+        cx, cy = self._cells(qx, qy)
+        inside = np.flatnonzero(
+            (qx >= self._origin_x)
+            & (qx < self._origin_x + self._nx * self.cell_size_m)
+            & (qy >= self._origin_y)
+            & (qy < self._origin_y + self._ny * self.cell_size_m)
+        )
+        self._nearest_listed(qx, qy, cy * self._nx + cx, inside, k, indices, distances)
+
+        # Queries clamped onto the grid's edge cells scan instead.
+        pending = np.setdiff1d(np.arange(len(qx)), inside, assume_unique=True)
+        radius_cells = 1
+        max_radius = max(self._nx, self._ny)
+        while len(pending):
+            queries, points, dist = self._gather(qx[pending], qy[pending], radius_cells)
+            for rank, (hit_queries, hit_positions) in enumerate(_segment_smallest(queries, dist, k)):
+                indices[pending[hit_queries], rank] = points[hit_positions]
+                distances[pending[hit_queries], rank] = dist[hit_positions]
+
+            # Anything outside the scanned square is at least radius_cells * cell_size away.
+            settled = distances[pending, k - 1] <= radius_cells * self.cell_size_m
+            if radius_cells >= max_radius:
+                break
+            pending = pending[~settled]
+            radius_cells = min(radius_cells * 2, max_radius)
+        return indices, distances
+
+    def _nearest_listed(
+        self,
+        qx: np.ndarray,
+        qy: np.ndarray,
+        cells: np.ndarray,
+        queries: np.ndarray,
+        k: int,
+        indices: np.ndarray,
+        distances: np.ndarray,
+    ) -> None:
+        """Fill the k nearest for ``queries`` from their cells' candidate lists."""
+        lists = self._candidate_lists(k, cells[queries])
+        starts, counts = lists.start[cells[queries]], lists.count[cells[queries]]
+        points, x, y = lists.points, lists.x, lists.y
+        widths = np.maximum(-(-counts // CANDIDATE_WIDTH_STEP), 1) * CANDIDATE_WIDTH_STEP
+        order = np.argsort(widths, kind="stable")
+        bounds = np.flatnonzero(np.diff(widths[order])) + 1
+        for group in np.split(order, bounds):
+            if not len(group):
+                continue
+            columns = np.arange(widths[group[0]])
+            slots = starts[group, None] + columns
+            slots[columns >= counts[group, None]] = 0
+            group_queries = queries[group]
+            dx = x[slots] - qx[group_queries, None]
+            dy = y[slots] - qy[group_queries, None]
+            # Rank on squared distance; the first minimum per row keeps ascending point order on ties.
+            squared = dx * dx + dy * dy
+            rows = np.arange(len(group))
+            for rank in range(min(k, len(columns))):
+                best = np.argmin(squared, axis=1)
+                hit = np.isfinite(squared[rows, best])
+                best_slots = slots[rows[hit], best[hit]]
+                indices[group_queries[hit], rank] = points[best_slots]
+                distances[group_queries[hit], rank] = np.hypot(
+                    x[best_slots] - qx[group_queries[hit]], y[best_slots] - qy[group_queries[hit]]
+                )
+                squared[rows, best] = np.inf
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> list[tuple[str, float]]:
+        indices, distances = self.nearest_many([lat], [lon], k)
+        return [(str(self.postcodes[idx]), float(dist)) for idx, dist in zip(indices[0], distances[0]) if idx >= 0]
+
+    def within_many(self, lats, lons, radius_m: float) -> list[list[tuple[str, float]]]:
+        """Postcodes within ``radius_m`` metres of each query, nearest first."""
+        qx, qy = self._project(lats, lons)
+        qx, qy = np.atleast_1d(qx), np.atleast_1d(qy)
+        if not len(self):
+            return [[] for _ in range(len(qx))]
+        radius_cells = min(int(np.ceil(radius_m / self.cell_size_m)), max(self._nx, self._ny))
+        queries, points, dist = self._gather(qx, qy, radius_cells)
+        keep = dist <= radius_m
+        queries, points, dist = queries[keep], points[keep], dist[keep]
+        order = np.lexsort((points, dist, queries))
+        postcodes = self.postcodes[points[order]].tolist()
+        dist = dist[order].tolist()
+        bounds = np.searchsorted(queries[order], np.arange(len(qx) + 1)).tolist()
+        return [list(zip(postcodes[lo:hi], dist[lo:hi])) for lo, hi in zip(bounds, bounds[1:])]
+
+    def within(self, lat: float, lon: float, radius_m: float) -> list[tuple[str, float]]:
+        return self.within_many([lat], [lon], radius_m)[0]
+
+    def save(self, path: Path) -> None:
+        ensure_dir(path.parent)
+        state = {name.lstrip("_"): getattr(self, name) for name in _STATE_FIELDS + _SCALAR_FIELDS}
+        with path.open("wb") as f:
+            np.savez(f, **state)
+
+    @classmethod
+    def load(cls, path: Path) -> SpatialIndex:
+        """Restore a saved index as-is; no re-projection or re-sorting."""
+        index = cls.__new__(cls)
+        with np.load(path, allow_pickle=False) as payload:
+            for name in _STATE_FIELDS:
+                setattr(index, name, payload[name.lstrip("_")])
+            for name in _SCALAR_FIELDS:
+                setattr(index, name, payload[name.lstrip("_")].item())
+        index._candidates = {}
+        return index
+
+
+def write_spatial_index(territory_config: dict, data_dir: Path, rows) -> Path:
+    path = spatial_index_path(territory_config, data_dir)
+    SpatialIndex.from_rows(rows).save(path)
+    return path
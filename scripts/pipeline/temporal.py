@@ -1,35 +1,75 @@
-"""Temporal tracking for first_seen / last_seen fields."""
+"""Temporal tracking for first_seen / last_seen fields.
+
+Current rows arrive sorted by ``normalised_postcode`` (every merge engine
+emits groups in key order; other callers are sorted first) and the store
+streams its state in the same order, so a run is a two-pointer merge join.
+Memory use does not grow with the number of known postcodes.
+"""
 
 from __future__ import annotations
 
 import csv
+from itertools import pairwise
 from pathlib import Path
+from typing import Iterable, Iterator
 
-from scripts.common.fs import ensure_dir, read_json, write_json
+from scripts.common.errors import StageError
+from scripts.common.fs import read_json
+from scripts.pipeline.temporal_store import RunWriter, TemporalStore
 
 
-def _load_previous_from_csv(path: Path) -> dict[str, dict[str, str]]:
-    if not path.exists():
-        return {}
+def _iter_previous_from_csv(path: Path) -> Iterator[tuple[str, str, str]]:
     with path.open("r", encoding="utf-8", newline="") as f:
-        rows = list(csv.DictReader(f))
-    out: dict[str, dict[str, str]] = {}
-    for row in rows:
-        key = row.get("normalised_postcode")
-        if not key:
-            continue
-        out[key] = {
-            "first_seen": row.get("first_seen", ""),
-            "last_seen": row.get("last_seen", ""),
-        }
-    return out
+        for row in csv.DictReader(f):
+            key = row.get("normalised_postcode")
+            if key:
+                yield key, row.get("first_seen", ""), row.get("last_seen", "")
 
 
-def _load_previous_from_state(path: Path) -> dict[str, dict[str, str]]:
+def _iter_previous_from_state(path: Path) -> Iterator[tuple[str, str, str]]:
     if not path.exists():
-        return {}
-    payload = read_json(path)
-    return payload.get("postcodes", {})
+        return
+    for key, entry in read_json(path).get("postcodes", {}).items():
+        yield key, entry.get("first_seen", ""), entry.get("last_seen", "")
+
+
+def _merge_join(
+    rows: Iterable[dict],
+    known: Iterator[tuple[str, str, bool]],
+    run: RunWriter,
+    stats: dict[str, int],
+) -> None:
+    def drop_until(key: str | None):
+        """Advance ``known`` past keys before ``key`` (all if None), closing present ones."""
+        nonlocal prior
+        while prior is not None and (key is None or prior[0] < key):
+            if prior[2]:
+                run.disappeared(prior[0])
+                stats["disappeared_count"] += 1
+            prior = next(known, None)
+
+    prior = next(known, None)
+    previous_key = None
+    for row in rows:
+        key = row["normalised_postcode"]
+        if previous_key is not None and key <= previous_key:
+            raise StageError(f"Temporal tracking needs rows sorted by normalised_postcode; {key!r} follows {previous_key!r}")
+        previous_key = key
+
+        drop_until(key)
+        if prior is not None and prior[0] == key:
+            _key, first_seen, present = prior
+            if not present:
+                run.reappeared(key)
+                stats["reappeared_count"] += 1
+            row["first_seen"] = first_seen or run.run_date
+            prior = next(known, None)
+        else:
+            run.appeared(key)
+            stats["appeared_count"] += 1
+            row["first_seen"] = run.run_date
+        row["last_seen"] = run.run_date
+    drop_until(None)
 
 
 def apply_temporal_tracking(
@@ -40,36 +80,23 @@ def apply_temporal_tracking(
     state_path: Path,
     run_date: str,
 ) -> tuple[list[dict], dict]:
-    previous = _load_previous_from_csv(canonical_output_path)
-    if not previous:
-        previous = _load_previous_from_state(state_path)
+    """Set first/last seen on ``rows`` and record the run in the SQLite store at ``state_path``.
 
-    current_keys = {row["normalised_postcode"] for row in rows}
-    previous_keys = set(previous)
+    A new store is seeded from the previous canonical CSV, or failing that from
+    the legacy JSON state beside it.
+    """
+    stats = {"disappeared_count": 0, "appeared_count": 0, "reappeared_count": 0}
+    ordered = rows
+    if any(left["normalised_postcode"] > right["normalised_postcode"] for left, right in pairwise(rows)):
+        ordered = sorted(rows, key=lambda row: row["normalised_postcode"])
+    with TemporalStore(state_path) as store:
+        if store.last_run_date is None:
+            if canonical_output_path.exists():
+                previous = _iter_previous_from_csv(canonical_output_path)
+            else:
+                previous = _iter_previous_from_state(state_path.with_suffix(".json"))
+            store.seed(territory_code, previous)
 
-    for row in rows:
-        key = row["normalised_postcode"]
-        prior = previous.get(key)
-        if prior and prior.get("first_seen"):
-            row["first_seen"] = prior["first_seen"]
-        else:
-            row["first_seen"] = run_date
-        row["last_seen"] = run_date
-
-    ensure_dir(state_path.parent)
-    state_payload = {
-        "territory": territory_code,
-        "postcodes": {
-            row["normalised_postcode"]: {
-                "first_seen": row["first_seen"],
-                "last_seen": row["last_seen"],
-            }
-            for row in rows
-        },
-    }
-    write_json(state_path, state_payload)
-
-    stats = {
-        "disappeared_count": len(previous_keys - current_keys),
-    }
+        with store.run(run_date) as run:
+            _merge_join(ordered, store.iter_known(), run, stats)
     return rows, stats
@@ -0,0 +1,170 @@
+"""SQLite store of postcode presence intervals for temporal tracking.
+
+One database per territory. ``postcodes`` holds each postcode's first_seen
+and, while it is present, the date its current interval began. ``intervals``
+holds every appearance with the date it was last seen and the first run date
+it was missing. Open intervals leave last_seen NULL because it is implicitly
+the store's last run date, so a run only writes the postcodes that appear,
+reappear or disappear.
+
+The database runs in WAL mode so a run can stream the previous state in key
+order from a snapshot reader while a second connection writes the run's
+changes in one transaction.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from scripts.common.errors import ContractError
+from scripts.common.fs import ensure_dir
+
+SCHEMA_VERSION = 1
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postcodes (
+    postcode TEXT PRIMARY KEY,
+    first_seen TEXT NOT NULL,
+    present_since TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS intervals (
+    postcode TEXT NOT NULL,
+    appeared TEXT NOT NULL,
+    last_seen TEXT,
+    disappeared TEXT,
+    PRIMARY KEY (postcode, appeared)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS intervals_disappeared ON intervals (disappeared) WHERE disappeared IS NOT NULL;
+"""
+_OPEN_INTERVAL = """
+INSERT INTO intervals (postcode, appeared, last_seen, disappeared) VALUES (?, ?, NULL, NULL)
+ON CONFLICT (postcode, appeared) DO UPDATE SET last_seen = NULL, disappeared = NULL
+"""
+
+
+class TemporalStore:
+    def __init__(self, path: Path) -> None:
+        ensure_dir(path.parent)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        version = self._meta("schema_version")
+        if version is None:
+            with self._conn:
+                self._set_meta("schema_version", str(SCHEMA_VERSION))
+        elif int(version) != SCHEMA_VERSION:
+            self._conn.close()
+            raise ContractError(f"Unsupported temporal store schema {version} in {path}")
+
+    def __enter__(self) -> TemporalStore:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _meta(self, key: str) -> str | None:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def last_run_date(self) -> str | None:
+        return self._meta("last_run_date")
+
+    def seed(self, territory_code: str, previous: Iterable[tuple[str, str, str]]) -> None:
+        """Start a new store from (postcode, first_seen, last_seen), treating every entry as present."""
+        last_run = ""
+
+        def entries():
+            nonlocal last_run
+            for postcode, first_seen, last_seen in previous:
+                last_run = max(last_run, last_seen or "")
+                start = first_seen or last_seen
+                if start:
+                    yield postcode, start, start
+
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO postcodes (postcode, first_seen, present_since) VALUES (?, ?, ?)", entries()
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO intervals (postcode, appeared) SELECT postcode, present_since FROM postcodes"
+            )
+            self._set_meta("territory", territory_code)
+            if last_run:
+                self._set_meta("last_run_date", last_run)
+
+    def iter_known(self) -> Iterator[tuple[str, str, bool]]:
+        """(postcode, first_seen, currently present) in postcode order, from a read snapshot."""
+        reader = sqlite3.connect(self.path)
+        try:
+            for postcode, first_seen, present_since in reader.execute(
+                "SELECT postcode, first_seen, present_since FROM postcodes ORDER BY postcode"
+            ):
+                yield postcode, first_seen, present_since is not None
+        finally:
+            reader.close()
+
+    @contextmanager
+    def run(self, run_date: str) -> Iterator[RunWriter]:
+        """Write one run's changes in a single transaction, committed on clean exit."""
+        writer = RunWriter(self._conn, run_date, self.last_run_date or run_date)
+        with self._conn:
+            yield writer
+            self._set_meta("last_run_date", run_date)
+
+    def history(self, postcode: str) -> list[dict[str, str | None]]:
+        """Every presence interval of ``postcode``, oldest first."""
+        last_run = self.last_run_date
+        return [
+            {"appeared": appeared, "last_seen": last_seen or last_run, "disappeared": disappeared}
+            for appeared, last_seen, disappeared in self._conn.execute(
+                "SELECT appeared, last_seen, disappeared FROM intervals WHERE postcode = ? ORDER BY appeared",
+                (postcode,),
+            )
+        ]
+
+    def disappeared_between(self, start: str, end: str) -> list[tuple[str, str]]:
+        """(postcode, disappeared) for intervals closed on run dates in ``[start, end]``."""
+        return self._conn.execute(
+            "SELECT postcode, disappeared FROM intervals WHERE disappeared BETWEEN ? AND ? "
+            "ORDER BY disappeared, postcode",
+            (start, end),
+        ).fetchall()
+
+
+class RunWriter:
+    """Applies one run's changes a postcode at a time inside ``TemporalStore.run``."""
+
+    def __init__(self, conn: sqlite3.Connection, run_date: str, last_run: str) -> None:
+        self._conn = conn
+        self.run_date = run_date
+        self._last_run = last_run
+
+    def appeared(self, postcode: str) -> None:
+        self._conn.execute(
+            "INSERT INTO postcodes (postcode, first_seen, present_since) VALUES (?, ?, ?)",
+            (postcode, self.run_date, self.run_date),
+        )
+        self._conn.execute(_OPEN_INTERVAL, (postcode, self.run_date))
+
+    def reappeared(self, postcode: str) -> None:
+        self._conn.execute("UPDATE postcodes SET present_since = ? WHERE postcode = ?", (self.run_date, postcode))
+        self._conn.execute(_OPEN_INTERVAL, (postcode, self.run_date))
+
+    def disappeared(self, postcode: str) -> None:
+        self._conn.execute(
+            """UPDATE intervals SET last_seen = ?, disappeared = ?
+            WHERE postcode = ? AND appeared = (SELECT present_since FROM postcodes WHERE postcode = ?)""",
+            (self._last_run, self.run_date, postcode, postcode),
+        )
+        self._conn.execute("UPDATE postcodes SET present_since = NULL WHERE postcode = ?", (postcode,))
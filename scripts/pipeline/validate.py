@@ -1,73 +1,115 @@
-"""Validation stage and territory quality report generation."""
+"""Validation stage and territory quality report generation.
+
+Inputs produced earlier in the same process arrive on a ``TerritoryState``;
+anything missing there is read from the stage's artefacts on disk. Each CSV
+is read in one streaming pass that gathers all of its metrics; the ONSPD pass
+also enforces the typed column contract (see ``contract_check``). Raw source
+counts come from the harvest stats sidecars, so validation time and memory
+do not grow with the raw payloads.
+"""
 
 from __future__ import annotations
 
 import csv
-from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
-from scripts.common.constants import TERRITORY_SLUG_BY_CODE
+from scripts.common.constants import RAW_SOURCES, TERRITORY_SLUG_BY_CODE
 from scripts.common.errors import ContractError, StageError
 from scripts.common.fs import read_json, write_json
+from scripts.harvest.stats import raw_source_stats, read_raw_stats
+from scripts.pipeline.context import TerritoryState
+from scripts.pipeline.contract_check import check_onspd_file
+from scripts.pipeline.export import CANONICAL_HEADERS
+from scripts.pipeline.intermediate import read_canonical_summary
 
 DEFAULT_COVERAGE_TARGETS = {
     "IM": {"target_min": 46000, "target_max": 47000, "min_expected": 45000, "fail_below": 30000},
     "JE": {"target_min": 15000, "target_max": 16000, "min_expected": 14000, "fail_below": 9000},
     "GY": {"target_min": 12000, "target_max": 13000, "min_expected": 11000, "fail_below": 7000},
 }
+CONFIDENCE_BUCKETS = ("0_24", "25_49", "50_74", "75_100")
+
 
+@dataclass
+class CanonicalStats:
+    rows: int = 0
+    duplicates: int = 0
+    with_coordinates: int = 0
+    bbox_outliers: int = 0
+    confidence_buckets: dict[str, int] = field(default_factory=lambda: dict.fromkeys(CONFIDENCE_BUCKETS, 0))
 
-def _read_csv_rows(path: Path) -> tuple[list[str], list[dict]]:
+
+@contextmanager
+def _csv_rows(path: Path) -> Iterator[tuple[list[str], Iterator[list[str]]]]:
     if not path.exists():
         raise StageError(f"Missing CSV input: {path}")
     with path.open("r", encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f)
-        return list(reader.fieldnames or []), list(reader)
+        reader = csv.reader(f)
+        yield next(reader, []), reader
 
 
-def _load_raw_rows(data_dir: Path, territory_code: str) -> list[dict]:
+def _load_raw_stats(data_dir: Path, territory_code: str, known: dict[str, dict]) -> list[dict]:
     territory = territory_code.lower()
-    paths = [
-        data_dir / "raw" / "arcgis" / f"{territory}_arcgis.json",
-        data_dir / "raw" / "osm" / "overpass" / f"{territory}_overpass.json",
-        data_dir / "raw" / "osm" / "geofabrik" / f"{territory}_geofabrik.json",
-    ]
-    rows: list[dict] = []
-    for path in paths:
+    stats = []
+    for source, template in RAW_SOURCES.items():
+        if source in known:
+            stats.append(known[source])
+            continue
+        path = data_dir / template.format(territory=territory)
         if not path.exists():
             continue
-        payload = read_json(path)
-        rows.extend(payload.get("rows", []))
-    return rows
+        # Payloads harvested before sidecars existed, or edited since, are parsed once.
+        stats.append(read_raw_stats(path) or raw_source_stats(read_json(path)))
+    return stats
+
 
+def _column(header: list[str], name: str) -> Callable[[list[str]], str]:
+    if name not in header:
+        return lambda _row: ""
+    idx = header.index(name)
+    return lambda row: row[idx] if idx < len(row) else ""
 
-def _confidence_buckets(rows: list[dict]) -> dict[str, int]:
-    buckets = {"0_24": 0, "25_49": 0, "50_74": 0, "75_100": 0}
+
+def _confidence_bucket(value: str) -> str:
+    try:
+        score = int(value or 0)
+    except ValueError:
+        score = 0
+
+    if score <= 24:
+        return "0_24"
+    if score <= 49:
+        return "25_49"
+    if score <= 74:
+        return "50_74"
+    return "75_100"
+
+
+def scan_canonical(header: list[str], rows: Iterable[list[str]]) -> CanonicalStats:
+    """Every canonical metric the report needs, in one pass over the rows."""
+    postcode_of = _column(header, "normalised_postcode")
+    coordinates_of = _column(header, "has_coordinates")
+    score_of = _column(header, "confidence_score")
+    notes_of = _column(header, "notes")
+
+    stats = CanonicalStats()
+    keyed = 0
+    seen: set[str] = set()
     for row in rows:
-        try:
-            score = int(row.get("confidence_score") or 0)
-        except ValueError:
-            score = 0
-
-        if score <= 24:
-            buckets["0_24"] += 1
-        elif score <= 49:
-            buckets["25_49"] += 1
-        elif score <= 74:
-            buckets["50_74"] += 1
-        else:
-            buckets["75_100"] += 1
-    return buckets
-
-
-def _compute_fill_rates(header: list[str], rows: list[dict]) -> list[dict]:
-    total = len(rows)
-    stats = []
-    for column in header:
-        filled = sum(1 for row in rows if row.get(column, "") not in ("", None))
-        null = total - filled
-        fill_percent = 0.0 if total == 0 else round((filled / total) * 100, 2)
-        stats.append({"column": column, "filled": filled, "null": null, "fill_percent": fill_percent})
+        stats.rows += 1
+        postcode = postcode_of(row)
+        if postcode:
+            keyed += 1
+            seen.add(postcode)
+        if coordinates_of(row).lower() == "true":
+            stats.with_coordinates += 1
+        if "COORDINATE_OUTLIER" in notes_of(row):
+            stats.bbox_outliers += 1
+        stats.confidence_buckets[_confidence_bucket(score_of(row))] += 1
+    stats.duplicates = keyed - len(seen)
     return stats
 
 
@@ -109,78 +151,97 @@ def run_validate(
     data_dir: Path,
     run_id: str,
     run_date: str,
+    state: TerritoryState | None = None,
 ) -> Path:
+    state = state or TerritoryState()
     canonical_path = data_dir / "out" / territory_config["output"]["canonical_filename"]
     onspd_path = data_dir / "out" / territory_config["output"]["onspd_filename"]
-    intermediate_path = data_dir / "intermediate" / f"{territory_code.lower()}_canonical.json"
 
-    canonical_header, canonical_rows = _read_csv_rows(canonical_path)
-    onspd_header, onspd_rows = _read_csv_rows(onspd_path)
-
-    intermediate = read_json(intermediate_path) if intermediate_path.exists() else {}
-    raw_rows = _load_raw_rows(data_dir, territory_code)
-
-    normalised_values = [row.get("normalised_postcode") for row in canonical_rows if row.get("normalised_postcode")]
-    duplicates = sum(count - 1 for count in Counter(normalised_values).values() if count > 1)
-
-    with_coordinates = sum(1 for row in canonical_rows if (row.get("has_coordinates", "").lower() == "true"))
-    without_coordinates = len(canonical_rows) - with_coordinates
+    if state.canonical_records is not None:
+        canonical_header = list(CANONICAL_HEADERS)
+        canonical = scan_canonical(canonical_header, (list(record.values()) for record in state.canonical_records))
+    else:
+        with _csv_rows(canonical_path) as (canonical_header, rows):
+            canonical = scan_canonical(canonical_header, rows)
+    contract_columns = onspd_columns.get("columns", [])
+    expected_onspd_header = [column["name"] for column in contract_columns]
+    if state.onspd is not None:
+        onspd_header, onspd_fill = state.onspd["header"], state.onspd["fill_rates"]
+        contract = state.onspd["contract"]
+    else:
+        with _csv_rows(onspd_path) as (onspd_header, _rows):
+            pass
+        header_matches = onspd_header == expected_onspd_header
+        # With the wrong header only fill rates are meaningful, so the columns are checked untyped.
+        checked = check_onspd_file(
+            onspd_path, contract_columns if header_matches else [{"name": name} for name in onspd_header]
+        )
+        onspd_fill = checked.fill_rates()
+        contract = checked.report() if header_matches else None
+
+    intermediate = state.merge_summary
+    if intermediate is None:
+        intermediate = read_canonical_summary(data_dir, territory_code)
+    raw_stats = _load_raw_stats(data_dir, territory_code, state.raw_stats)
+    geometry_stats: dict[str, dict] = {}
+    for stats in raw_stats:
+        geometry_stats.update(stats["geometry_policy"])
+    geometry_stats = dict(sorted(geometry_stats.items()))
 
     invalid_by_source = intermediate.get("invalid_postcodes", {})
     invalid_count = sum(int(v) for v in invalid_by_source.values())
 
     source_counts = {"authoritative": 0, "digimap": 0, "osm": 0}
-    for row in raw_rows:
-        source_class = row.get("source_class", "other")
-        if source_class in source_counts:
-            source_counts[source_class] += 1
-
-    bbox_outliers = 0
-    for row in canonical_rows:
-        notes = row.get("notes") or ""
-        if "COORDINATE_OUTLIER" in notes:
-            bbox_outliers += 1
-
-    expected_onspd_header = [column["name"] for column in onspd_columns.get("columns", [])]
+    for stats in raw_stats:
+        for source_class, count in stats["source_classes"].items():
+            if source_class in source_counts:
+                source_counts[source_class] += count
+
     warnings: list[str] = []
     errors: list[str] = []
 
     if onspd_header != expected_onspd_header:
         errors.append("ONSPD_HEADER_ORDER_MISMATCH")
+    if contract and contract["violation_count"]:
+        errors.append("ONSPD_CONTRACT_VIOLATIONS")
 
-    if duplicates > 0:
+    if canonical.duplicates > 0:
         warnings.append("DUPLICATE_NORMALISED_POSTCODES_PRESENT")
 
-    if errors:
-        raise ContractError(";".join(errors))
-
     report_payload = {
         "territory": territory_code,
         "run_id": run_id,
         "run_date": run_date,
         "counts": {
-            "raw_rows": int(intermediate.get("raw_row_count", len(raw_rows))),
+            "raw_rows": int(intermediate.get("raw_row_count", sum(stats["rows"] for stats in raw_stats))),
             "valid_postcodes": int(intermediate.get("valid_postcodes", 0)),
-            "unique_postcodes": len(canonical_rows),
-            "with_coordinates": with_coordinates,
-            "without_coordinates": without_coordinates,
+            "unique_postcodes": canonical.rows,
+            "with_coordinates": canonical.with_coordinates,
+            "without_coordinates": canonical.rows - canonical.with_coordinates,
             "invalid_postcodes": invalid_count,
         },
         "sources": source_counts,
+        "geometry": {
+            "bytes_saved_by_source": {name: int(stats.get("bytes_saved", 0)) for name, stats in geometry_stats.items()},
+            "policy_by_source": geometry_stats,
+        },
         "quality": {
-            "bbox_outliers": bbox_outliers,
-            "duplicate_keys": duplicates,
+            "bbox_outliers": canonical.bbox_outliers,
+            "duplicate_keys": canonical.duplicates,
+            **{name: int(count) for name, count in intermediate.get("coordinate_qa", {}).items()},
             "coordinate_coverage_percent": 0.0
-            if len(canonical_rows) == 0
-            else round((with_coordinates / len(canonical_rows)) * 100, 2),
+            if canonical.rows == 0
+            else round((canonical.with_coordinates / canonical.rows) * 100, 2),
         },
-        "confidence_buckets": _confidence_buckets(canonical_rows),
-        "coverage_targets": _coverage_target_report(territory_code, len(canonical_rows)),
-        "onspd_fill": _compute_fill_rates(onspd_header, onspd_rows),
+        "confidence_buckets": canonical.confidence_buckets,
+        "coverage_targets": _coverage_target_report(territory_code, canonical.rows),
+        "onspd_fill": onspd_fill,
+        "onspd_contract": contract,
         "warnings": warnings,
         "errors": errors,
         "diagnostics": {
             "invalid_postcodes_by_source": invalid_by_source,
+            "distinct_score_explanations": len(intermediate.get("score_explanations", {})),
             "canonical_header": canonical_header,
             "onspd_header": onspd_header,
         },
@@ -189,4 +250,7 @@ def run_validate(
     slug = TERRITORY_SLUG_BY_CODE.get(territory_code, territory_code.lower())
     report_path = data_dir / "out" / "reports" / f"{slug}_report.json"
     write_json(report_path, report_payload)
+    # Written first so the report's violation samples explain the failure.
+    if errors:
+        raise ContractError(";".join(errors))
     return report_path
@@ -190,3 +190,118 @@ def test_arcgis_harvest_respects_return_geometry_false(tmp_path: Path):
     assert fake.chunk_params
     assert fake.chunk_params[0]["returnGeometry"] == "false"
     assert result["rows"][0]["raw_geometry"] is None
+
+
+@pytest.mark.integration
+def test_arcgis_harvest_derives_point_from_parcel_rings(tmp_path: Path):
+    class FakeParcelClient:
+        def get_json(self, _url: str, **kwargs):
+            params = kwargs.get("params") or {}
+            if params.get("returnIdsOnly") == "true":
+                return {"objectIdFieldName": "OBJECTID", "objectIds": [1]}
+            return {
+                "features": [
+                    {
+                        "attributes": {"OBJECTID": 1, "postcode": "GY1 1AA"},
+                        "geometry": {
+                            "rings": [[[-2.54, 49.45], [-2.54, 49.46], [-2.52, 49.46], [-2.52, 49.45], [-2.54, 49.45]]],
+                            "spatialReference": {"wkid": 4326},
+                        },
+                    }
+                ]
+            }
+
+        def close(self):
+            return None
+
+    territory_config = {
+        "arcgis": {
+            "enabled": True,
+            "services": [
+                {
+                    "name": "guernsey_cadastre_land_parcels",
+                    "service_url": "https://example.gg/arcgis/rest/services/Parcels/MapServer",
+                    "layer_ids": [2],
+                    "source_label": "authoritative",
+                }
+            ],
+        },
+        "fields": {
+            "postcode_candidates": ["postcode"],
+            "lat_candidates": ["lat"],
+            "lon_candidates": ["lon"],
+        },
+    }
+
+    result = run_arcgis_harvest(
+        "GY",
+        territory_config,
+        tmp_path,
+        run_id="run-2d",
+        run_date="2026-02-17",
+        http_client=FakeParcelClient(),
+    )
+
+    assert abs(result["rows"][0]["raw_lat"] - 49.455) < 1e-9
+    assert abs(result["rows"][0]["raw_lon"] - (-2.53)) < 1e-9
+
+
+@pytest.mark.integration
+def test_arcgis_harvest_applies_centroid_only_policy_and_reports_bytes_saved(tmp_path: Path):
+    class FakeParcelClient:
+        def get_json(self, _url: str, **kwargs):
+            params = kwargs.get("params") or {}
+            if params.get("returnIdsOnly") == "true":
+                return {"objectIdFieldName": "OBJECTID", "objectIds": [1]}
+            return {
+                "features": [
+                    {
+                        "attributes": {"OBJECTID": 1, "postcode": "GY1 1AA"},
+                        "geometry": {
+                            "rings": [[[-2.54, 49.45], [-2.54, 49.46], [-2.52, 49.46], [-2.52, 49.45], [-2.54, 49.45]]],
+                            "spatialReference": {"wkid": 4326},
+                        },
+                    }
+                ]
+            }
+
+        def close(self):
+            return None
+
+    territory_config = {
+        "arcgis": {
+            "enabled": True,
+            "services": [
+                {
+                    "name": "guernsey_cadastre_land_parcels",
+                    "service_url": "https://example.gg/arcgis/rest/services/Parcels/MapServer",
+                    "layer_ids": [2],
+                    "source_label": "authoritative",
+                    "geometry_policy": "centroid_only",
+                }
+            ],
+        },
+        "fields": {
+            "postcode_candidates": ["postcode"],
+            "lat_candidates": ["lat"],
+            "lon_candidates": ["lon"],
+        },
+    }
+
+    result = run_arcgis_harvest(
+        "GY",
+        territory_config,
+        tmp_path,
+        run_id="run-2e",
+        run_date="2026-02-17",
+        http_client=FakeParcelClient(),
+    )
+
+    row = result["rows"][0]
+    assert set(row["raw_geometry"]) == {"x", "y", "spatialReference"}
+    assert row["source_wkid"] == 4326
+    stats = result["geometry_policy"]["guernsey_cadastre_land_parcels"]
+    assert stats["policy"] == "centroid_only"
+    assert stats["features"] == 1
+    assert stats["bytes_saved"] > 0
+    assert stats["bytes_before"] - stats["bytes_after"] == stats["bytes_saved"]
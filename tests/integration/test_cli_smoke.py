@@ -1,8 +1,11 @@
+import json
 from pathlib import Path
 
 import pytest
 
 from scripts.cli import parse_args, run_command
+from scripts.common.constants import STAGES
+from scripts.pipeline import normalise_merge
 
 
 @pytest.mark.integration
@@ -30,3 +33,85 @@ def test_cli_all_generates_expected_artifacts(tmp_path: Path):
     assert (data_dir / "out" / "isle_of_man.csv").exists()
     assert (data_dir / "out" / "jersey_onspd.csv").exists()
     assert (data_dir / "out" / "reports" / "run_summary.json").exists()
+
+
+@pytest.mark.integration
+def test_cli_all_hands_stage_results_over_in_memory(tmp_path: Path, monkeypatch):
+    def no_disk_reads(*_args, **_kwargs):
+        raise AssertionError("stage re-read an artefact written earlier in the run")
+
+    monkeypatch.setattr("scripts.pipeline.normalise_merge.iter_json_array", no_disk_reads)
+    monkeypatch.setattr("scripts.pipeline.validate._csv_rows", no_disk_reads)
+    monkeypatch.setattr("scripts.pipeline.validate.read_json", no_disk_reads)
+    monkeypatch.setattr("scripts.pipeline.validate.read_canonical_summary", no_disk_reads)
+    data_dir = tmp_path / "data"
+    args = parse_args(["all", "--config-dir", "config", "--data-dir", str(data_dir), "--run-date", "2026-02-17"])
+
+    assert run_command(args) == 0
+    assert (data_dir / "out" / "reports" / "jersey_report.json").exists()
+    assert (data_dir / "intermediate" / "je_canonical.json").exists()
+
+
+@pytest.mark.integration
+def test_cli_all_with_max_memory_merges_from_disk(tmp_path: Path, monkeypatch):
+    read_paths = []
+    original = normalise_merge.iter_json_array
+    monkeypatch.setattr(
+        normalise_merge, "iter_json_array", lambda path, *args: read_paths.append(path) or original(path, *args)
+    )
+    data_dir = tmp_path / "data"
+    args = parse_args(
+        ["all", "--config-dir", "config", "--data-dir", str(data_dir), "--run-date", "2026-02-17", "--territory", "JE"]
+        + ["--max-memory", "1M"]
+    )
+
+    assert run_command(args) == 0
+    assert {path.name for path in read_paths} >= {"je_arcgis.json", "je_overpass.json"}
+
+
+@pytest.mark.integration
+def test_cli_combine_onspd_merges_official_file(tmp_path: Path):
+    data_dir = tmp_path / "data"
+    common = ["--config-dir", "config", "--data-dir", str(data_dir), "--run-date", "2026-02-17", "--territory", "JE"]
+    assert run_command(parse_args(["all", *common])) == 0
+    official = tmp_path / "ONSPD.csv"
+    official.write_text("pcd,pcd2,lat,long,ctry\nAB1 0AA,AB1  0AA,57.1,-2.2,S92000003\n", encoding="utf-8")
+
+    exit_code = run_command(parse_args(["combine-onspd", "--onspd-file", str(official), *common]))
+
+    assert exit_code == 0
+    combined = (data_dir / "out" / "onspd_combined.csv").read_text(encoding="utf-8").splitlines()
+    jersey = (data_dir / "out" / "jersey_onspd.csv").read_text(encoding="utf-8").splitlines()
+    assert combined[0] == jersey[0]
+    assert combined[1].startswith("AB1 0AA,AB1  0AA,")
+    assert combined[2:] == jersey[1:]
+    assert (data_dir / "out" / "reports" / "onspd_combined_conflicts.csv").exists()
+
+
+@pytest.mark.integration
+def test_cli_all_with_jobs_matches_serial_run(tmp_path: Path):
+    outputs = {}
+    for name, extra in (("serial", []), ("parallel", ["--jobs", "3"])):
+        data_dir = tmp_path / name
+        args = parse_args(
+            ["all", "--config-dir", "config", "--data-dir", str(data_dir), "--run-date", "2026-02-17", *extra]
+        )
+        assert run_command(args) == 0
+        outputs[name] = {
+            path.relative_to(data_dir / "out"): path.read_bytes()
+            for path in sorted((data_dir / "out").rglob("*.csv"))
+        }
+    summary = json.loads((tmp_path / "parallel" / "out" / "reports" / "run_summary.json").read_text(encoding="utf-8"))
+
+    assert outputs["parallel"] == outputs["serial"]
+    assert summary["territories"] == ["JE", "GY", "IM"]
+    for territory in ("JE", "GY", "IM"):
+        log_path = next((tmp_path / "parallel" / "run_meta").glob(f"*.{territory.lower()}.log.jsonl"))
+        events = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+        assert [event["stage"] for event in events if event["event"] == "STAGE_START"] == list(STAGES)
+        assert {event["territory"] for event in events} == {territory}
+    assert sorted(path.name for path in (tmp_path / "parallel" / "state" / "postcode_cache").iterdir()) == [
+        "gy.json",
+        "im.json",
+        "je.json",
+    ]
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from scripts.common.boundary import BoundaryIndex, load_boundary
+from scripts.common.errors import ConfigError
+
+# 0..10 square with a 4..6 hole, plus a separate island at 20..22.
+SQUARE_WITH_HOLE = {
+    "type": "MultiPolygon",
+    "coordinates": [
+        [
+            [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]],
+            [[4, 4], [6, 4], [6, 6], [4, 6], [4, 4]],
+        ],
+        [[[20, 20], [22, 20], [22, 22], [20, 22]]],
+    ],
+}
+
+
+def _brute_force(lon: float, lat: float, rings: list) -> bool:
+    inside = False
+    for ring in rings:
+        for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+            if (y1 > lat) != (y2 > lat) and lon < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+    return inside
+
+
+def test_contains_many_handles_holes_and_islands():
+    index = load_boundary({"validation": {"boundary_wgs84": SQUARE_WITH_HOLE}})
+
+    lats = [5, 2, 5, 21, 15, -1]
+    lons = [5, 2, 12, 21, 15, 5]
+    assert index.contains_many(lats, lons).tolist() == [False, True, False, True, False, False]
+    assert index.contains(2.5, 8.0) is True
+
+
+def test_contains_many_matches_brute_force_on_irregular_polygon():
+    angles = np.linspace(0, 2 * np.pi, 400, endpoint=False)
+    radius = 1 + 0.4 * np.sin(5 * angles)
+    ring = np.c_[radius * np.cos(angles), radius * np.sin(angles)].tolist()
+    index = BoundaryIndex([ring], bands=16)
+
+    rng = np.random.default_rng(3)
+    lats = rng.uniform(-1.5, 1.5, 2000)
+    lons = rng.uniform(-1.5, 1.5, 2000)
+    expected = [_brute_force(lon, lat, [ring]) for lat, lon in zip(lats, lons)]
+    assert index.contains_many(lats, lons).tolist() == expected
+
+
+def test_load_boundary_is_optional_and_rejects_bad_geometry(tmp_path):
+    assert load_boundary({"validation": {}}) is None
+    with pytest.raises(ConfigError):
+        load_boundary({"validation": {"boundary_wgs84": {"type": "LineString", "coordinates": [[0, 0], [1, 1]]}}})
+    with pytest.raises(ConfigError):
+        load_boundary({"validation": {"boundary_wgs84": str(tmp_path / "missing.geojson")}})
+    truncated = tmp_path / "truncated.geojson"
+    truncated.write_text('{"type": "Polygon", "coordinates": [[[0, 0],', encoding="utf-8")
+    with pytest.raises(ConfigError, match="not valid GeoJSON"):
+        load_boundary({"validation": {"boundary_wgs84": str(truncated)}})
@@ -1,4 +1,12 @@
-from scripts.cli import parse_args
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from scripts.cli import main, parse_args, run_territory_pipeline
+from scripts.common.constants import EXIT_HARD_FAIL, STAGES
+from scripts.common.errors import ConfigError, ContractError, StageError
+from scripts.pipeline.normalise_merge import MergeOptions
 
 
 def test_parse_args_defaults():
@@ -7,8 +15,78 @@ def test_parse_args_defaults():
     assert args.territory == "all"
     assert args.overlay_config_dir is None
     assert args.strict is False
+    assert args.engine == "classic"
+    assert args.incremental is False
+    assert args.merge_workers == 1
+    assert args.jobs == 1
 
 
 def test_parse_args_accepts_overlay_config_dir():
     args = parse_args(["all", "--overlay-config-dir", "config/live"])
     assert args.overlay_config_dir == "config/live"
+
+
+def test_parse_args_accepts_columnar_engine():
+    args = parse_args(["merge", "--engine", "columnar"])
+    assert args.engine == "columnar"
+
+
+def test_parse_args_parses_max_memory_sizes():
+    assert parse_args(["merge"]).max_memory is None
+    assert parse_args(["merge", "--max-memory", "512M"]).max_memory == 512 * 1024**2
+    assert parse_args(["merge", "--max-memory", "1.5gb"]).max_memory == 3 * 1024**3 // 2
+    assert parse_args(["merge", "--max-memory", "4096"]).max_memory == 4096
+
+
+@pytest.mark.parametrize("size", ["lots", "inf", "1e400", "-infM", "nan", "0"])
+def test_parse_args_rejects_bad_max_memory(size: str, capsys):
+    with pytest.raises(SystemExit):
+        parse_args(["merge", "--max-memory", size])
+    assert "--max-memory" in capsys.readouterr().err
+
+
+def test_parse_args_combine_onspd_requires_onspd_file():
+    args = parse_args(["combine-onspd", "--onspd-file", "ONSPD.csv", "--prefer", "crown"])
+    assert args.onspd_file == "ONSPD.csv"
+    assert args.prefer == "crown"
+    assert args.output is None
+    with pytest.raises(SystemExit):
+        parse_args(["combine-onspd"])
+
+
+def test_parse_args_rejects_non_positive_jobs():
+    assert parse_args(["all", "--jobs", "3"]).jobs == 3
+    with pytest.raises(SystemExit):
+        parse_args(["all", "--jobs", "0"])
+
+
+def test_territory_pipeline_continues_after_soft_failure_and_stops_on_contract_error(tmp_path, monkeypatch):
+    ran = []
+
+    def fake_execute_stage(stage, territory_code, *_args):
+        ran.append(stage)
+        if stage == "harvest":
+            raise StageError("source down")
+        if stage == "map-onspd":
+            raise ContractError("bad header")
+
+    monkeypatch.setattr("scripts.cli.execute_stage", fake_execute_stage)
+    bundle = SimpleNamespace(territories={"JE": {}})
+    failures = run_territory_pipeline(
+        "JE", STAGES, bundle, tmp_path, "run-test", "2026-02-17", MergeOptions(), "INFO", strict=False
+    )
+
+    assert failures == ["STAGE_ERROR", "CONTRACT_ERROR"]
+    assert ran == ["discover", "harvest", "merge", "map-onspd"]
+    events = [json.loads(line) for line in (tmp_path / "run_meta" / "run-test.je.log.jsonl").read_text().splitlines()]
+    assert {event["territory"] for event in events} == {"JE"}
+
+
+def test_main_reports_pipeline_errors_on_stderr(monkeypatch, capsys):
+    def bad_config(_args):
+        raise ConfigError("Boundary file je.geojson is not valid GeoJSON")
+
+    monkeypatch.setattr("scripts.cli.run_command", bad_config)
+
+    assert main(["validate"]) == EXIT_HARD_FAIL
+    assert capsys.readouterr().err == "CONFIG_ERROR: Boundary file je.geojson is not valid GeoJSON\n"
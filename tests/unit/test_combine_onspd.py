@@ -0,0 +1,125 @@
+import csv
+from pathlib import Path
+
+import pytest
+
+from scripts.common.errors import ContractError
+from scripts.pipeline.combine_onspd import merge_key, run_combine_onspd
+
+COLUMNS = {"columns": [{"name": "pcd"}, {"name": "lat"}, {"name": "long"}, {"name": "ctry"}]}
+
+
+def _write(path: Path, header: list[str], rows: list[list[str]]) -> Path:
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return path
+
+
+def _read(path: Path) -> list[list[str]]:
+    with path.open("r", encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_merge_key_orders_seven_char_and_spaced_forms_alike():
+    assert merge_key("AB1 1AA") == merge_key("AB11AA") == "AB1 1AA"
+    assert merge_key("JE2 3AB") < merge_key("JE23 1AA")
+    assert sorted(["AB101AA", "AB1 1AA"]) == sorted(["AB101AA", "AB1 1AA"], key=merge_key)
+
+
+def test_combine_projects_official_columns_and_reports_conflicts(tmp_path: Path):
+    official = _write(
+        tmp_path / "ONSPD.csv",
+        ["pcd", "pcd2", "ctry", "lat", "long"],
+        [
+            ["AB1 0AA", "AB1  0AA", "S92000003", "57.1", "-2.2"],
+            ["GY1 1AA", "GY1  1AA", "L93000001", "49.45", "-2.53"],
+            ["ZE1 0AA", "ZE1  0AA", "S92000003", "60.1", "-1.1"],
+        ],
+    )
+    guernsey = _write(
+        tmp_path / "guernsey_onspd.csv",
+        ["pcd", "lat", "long", "ctry"],
+        [["GY1 1AA", "49.46", "-2.53", "L93000001"], ["GY101AA", "49.4", "-2.6", "L93000001"]],
+    )
+    jersey = _write(tmp_path / "jersey_onspd.csv", ["pcd", "lat", "long", "ctry"], [["JE2 3AB", "49.2", "-2.1", ""]])
+
+    result = run_combine_onspd(
+        COLUMNS,
+        official,
+        [("GY", guernsey), ("JE", jersey)],
+        tmp_path / "combined.csv",
+        tmp_path / "reports" / "conflicts.csv",
+    )
+
+    assert _read(tmp_path / "combined.csv") == [
+        ["pcd", "lat", "long", "ctry"],
+        ["AB1 0AA", "57.1", "-2.2", "S92000003"],
+        ["GY1 1AA", "49.45", "-2.53", "L93000001"],
+        ["GY101AA", "49.4", "-2.6", "L93000001"],
+        ["JE2 3AB", "49.2", "-2.1", ""],
+        ["ZE1 0AA", "60.1", "-1.1", "S92000003"],
+    ]
+    assert _read(tmp_path / "reports" / "conflicts.csv")[1:] == [["GY1 1AA", "official", "GY", "lat"]]
+    assert result["rows"] == 5
+    assert result["conflicts"] == 1
+    assert result["rows_by_source"] == {"GY": 1, "JE": 1, "official": 3}
+
+
+def test_combine_can_prefer_crown_rows(tmp_path: Path):
+    official = _write(tmp_path / "ONSPD.csv", ["pcd", "lat", "long", "ctry"], [["GY1 1AA", "49.45", "-2.53", "X"]])
+    guernsey = _write(tmp_path / "guernsey_onspd.csv", ["pcd", "lat", "long", "ctry"], [["GY1 1AA", "49.46", "-2.53", "Y"]])
+
+    run_combine_onspd(
+        COLUMNS, official, [("GY", guernsey)], tmp_path / "combined.csv", tmp_path / "c.csv", prefer="crown"
+    )
+
+    assert _read(tmp_path / "combined.csv")[1] == ["GY1 1AA", "49.46", "-2.53", "Y"]
+    assert _read(tmp_path / "c.csv")[1] == ["GY1 1AA", "GY", "official", "lat;ctry"]
+
+
+def test_combine_rejects_unsorted_input_and_header_drift(tmp_path: Path):
+    official = _write(tmp_path / "ONSPD.csv", ["pcd", "lat", "long", "ctry"], [["ZE1 0AA", "", "", ""], ["AB1 0AA", "", "", ""]])
+    with pytest.raises(ContractError, match="not sorted"):
+        run_combine_onspd(COLUMNS, official, [], tmp_path / "out.csv", tmp_path / "c.csv")
+
+    official = _write(tmp_path / "ONSPD.csv", ["pcd", "lat", "long", "ctry"], [])
+    drifted = _write(tmp_path / "jersey_onspd.csv", ["pcd", "long", "lat", "ctry"], [])
+    with pytest.raises(ContractError, match="header/order mismatch"):
+        run_combine_onspd(COLUMNS, official, [("JE", drifted)], tmp_path / "out.csv", tmp_path / "c.csv")
+
+    missing = _write(tmp_path / "ONSPD.csv", ["pcd", "lat"], [])
+    with pytest.raises(ContractError, match="lacks contract columns: long, ctry"):
+        run_combine_onspd(COLUMNS, missing, [], tmp_path / "out.csv", tmp_path / "c.csv")
+
+
+@pytest.mark.parametrize("prefer", ["official", "crown"])
+def test_combine_writes_crown_postcodes_in_official_fixed_width_form(tmp_path: Path, prefer: str):
+    header = ["pcd", "pcd2", "lat", "long"]
+    columns = {"columns": [{"name": name} for name in header]}
+    official = _write(
+        tmp_path / "ONSPD.csv",
+        header,
+        [["AB1 0AA", "AB1  0AA", "57.1", "-2.2"], ["GY101AA", "GY10 1AA", "49.45", "-2.53"]],
+    )
+    # The default contract maps pcd to the single-space form and pcd2 to the unspaced form.
+    guernsey = _write(tmp_path / "guernsey_onspd.csv", header, [["GY10 1AA", "GY101AA", "49.46", "-2.53"]])
+    isle_of_man = _write(tmp_path / "isle_of_man_onspd.csv", header, [["IM99 1AA", "IM991AA", "54.2", "-4.5"]])
+
+    run_combine_onspd(
+        columns,
+        official,
+        [("GY", guernsey), ("IM", isle_of_man)],
+        tmp_path / "combined.csv",
+        tmp_path / "c.csv",
+        prefer=prefer,
+    )
+
+    guernsey_lat = "49.45" if prefer == "official" else "49.46"
+    assert _read(tmp_path / "combined.csv")[1:] == [
+        ["AB1 0AA", "AB1  0AA", "57.1", "-2.2"],
+        ["GY101AA", "GY10 1AA", guernsey_lat, "-2.53"],
+        ["IM991AA", "IM99 1AA", "54.2", "-4.5"],
+    ]
+    assert [row[3] for row in _read(tmp_path / "c.csv")[1:]] == ["lat"]
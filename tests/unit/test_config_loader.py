@@ -1,9 +1,13 @@
+import json
+import shutil
 from pathlib import Path
 
 import pytest
 
+from scripts.common.boundary import load_boundary
 from scripts.common.config_loader import load_all_configs, resolve_territories
 from scripts.common.errors import ConfigError
+from scripts.pipeline.map_to_onspd import load_lookup_tables
 
 
 def test_load_all_configs_from_repo_config_dir():
@@ -228,3 +232,35 @@ columns:
     (overlay / "isle_of_man.yml").write_text("- not\n- a\n- mapping\n", encoding="utf-8")
     with pytest.raises(ConfigError):
         load_all_configs(base, overlay_config_dir=overlay)
+
+
+def test_load_all_configs_resolves_boundary_path_against_declaring_file(tmp_path: Path, monkeypatch):
+    base = tmp_path / "base"
+    overlay = tmp_path / "overlay"
+    shutil.copytree("config", base)
+    overlay.mkdir()
+    square = {"type": "Polygon", "coordinates": [[[-3, 49], [-1, 49], [-1, 50], [-3, 50], [-3, 49]]]}
+    (overlay / "je_boundary.geojson").write_text(json.dumps(square), encoding="utf-8")
+    (overlay / "jersey.yml").write_text("validation:\n  boundary_wgs84: je_boundary.geojson\n", encoding="utf-8")
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+
+    bundle = load_all_configs(base, overlay_config_dir=overlay)
+
+    assert Path(bundle.territories["JE"]["validation"]["boundary_wgs84"]) == overlay / "je_boundary.geojson"
+    assert load_boundary(bundle.territories["JE"]).contains(49.5, -2.0)
+
+
+def test_load_all_configs_resolves_lookup_paths_against_contract_file(tmp_path: Path, monkeypatch):
+    config_dir = tmp_path / "relocated"
+    shutil.copytree("config", config_dir)
+    monkeypatch.chdir(tmp_path)
+
+    bundle = load_all_configs(config_dir, overlay_config_dir=config_dir / "onspd_full")
+
+    lookups = bundle.onspd_columns["lookups"]
+    assert Path(lookups["territory_geography"]["path"]).resolve() == (
+        config_dir / "lookups" / "territory_geography.csv"
+    ).resolve()
+    assert set(load_lookup_tables(lookups)["territory_geography"]) == {"JE", "GY", "IM"}
@@ -0,0 +1,96 @@
+from pathlib import Path
+
+import pytest
+
+from scripts.common.errors import ContractError
+from scripts.pipeline import contract_check
+from scripts.pipeline.contract_check import ContractCheck, check_onspd_file
+
+COLUMNS = [
+    {"name": "pcds", "type": "string", "nullable": False, "pattern": "^[A-Z]{1,2}[0-9][A-Z0-9]? [0-9][A-Z]{2}$"},
+    {"name": "dointr", "type": "date", "nullable": True, "format": "%Y%m"},
+    {"name": "oseast1m", "type": "integer", "nullable": True},
+    {"name": "lat", "type": "float", "nullable": True},
+]
+
+
+def _violations(checker: ContractCheck) -> dict[tuple[str, str], dict]:
+    return {(entry["column"], entry["rule"]): entry for entry in checker.report()["violations"]}
+
+
+def test_contract_check_counts_violations_with_samples_across_chunks(monkeypatch):
+    monkeypatch.setattr(contract_check, "SAMPLE_LIMIT", 2)
+    checker = ContractCheck(COLUMNS)
+
+    checker.add_columns(
+        [
+            ["JE2 3AB", "", "je2 3ab", "JE23AB"],
+            ["202601", "2026-01", "", "202613"],
+            ["43210", "1.5", "", "-7"],
+            ["49.2", "nan", "north", "-2.1"],
+        ]
+    )
+    checker.add_columns([["", "JE3 1AA"], ["202602", "202602"], ["x", "5"], ["inf", "1e3"]])
+
+    violations = _violations(checker)
+    assert checker.rows == 6
+    assert violations[("pcds", "null")]["count"] == 2
+    assert violations[("pcds", "null")]["samples"] == [{"row": 2, "value": ""}, {"row": 5, "value": ""}]
+    assert violations[("pcds", "pattern")]["count"] == 2
+    assert violations[("dointr", "format")]["samples"] == [
+        {"row": 2, "value": "2026-01"},
+        {"row": 4, "value": "202613"},
+    ]
+    assert violations[("oseast1m", "type")]["count"] == 2
+    assert [sample["value"] for sample in violations[("lat", "type")]["samples"]] == ["nan", "north"]
+    assert violations[("lat", "type")]["count"] == 3
+    assert checker.report()["violation_count"] == 11
+    assert [rate["filled"] for rate in checker.fill_rates()] == [4, 5, 5, 6]
+
+
+
+@pytest.mark.parametrize(
+    ("value", "integer_ok", "float_ok"),
+    [
+        ("12", True, True),
+        ("-7", True, True),
+        (" 12", False, False),
+        ("12\n", False, False),
+        ("1_000", False, False),
+        ("+5", False, False),
+        ("1_0.5", False, False),
+        ("١٢", False, False),
+        ("9223372036854775808", False, True),
+        ("-2.5", False, True),
+        (".5", False, True),
+        ("5.", False, True),
+        ("1e3", False, True),
+        ("1E-05", False, True),
+        ("1e999", False, False),
+        ("Infinity", False, False),
+    ],
+)
+def test_numeric_types_accept_only_plain_decimal_text(value: str, integer_ok: bool, float_ok: bool):
+    checker = ContractCheck([{"name": "count", "type": "integer"}, {"name": "lat", "type": "float"}])
+    checker.add_columns([[value], [value]])
+
+    violations = _violations(checker)
+    assert (("count", "type") not in violations) == integer_ok
+    assert (("lat", "type") not in violations) == float_ok
+
+def test_check_onspd_file_reads_short_rows_as_blank(tmp_path: Path):
+    path = tmp_path / "jersey_onspd.csv"
+    path.write_text("pcds,dointr,oseast1m,lat\nJE2 3AB,202601\nJE2 4AB,202602,1,49.2\n", encoding="utf-8")
+
+    checker = check_onspd_file(path, COLUMNS)
+
+    assert checker.report() == {"rows": 2, "violation_count": 0, "violations": []}
+    assert [rate["filled"] for rate in checker.fill_rates()] == [2, 2, 1, 1]
+
+
+def test_check_onspd_file_rejects_width_mismatch(tmp_path: Path):
+    path = tmp_path / "jersey_onspd.csv"
+    path.write_text("pcds,lat\nJE2 3AB,49.2\n", encoding="utf-8")
+
+    with pytest.raises(ContractError, match="2 columns, expected 4"):
+        check_onspd_file(path, COLUMNS)
@@ -1,6 +1,7 @@
 from pyproj import Transformer
 
-from scripts.pipeline.coordinates import resolve_best_coordinate
+from scripts.common.boundary import load_boundary
+from scripts.pipeline.coordinates import resolve_best_coordinate, resolve_best_coordinates
 
 
 def _territory_config():
@@ -53,3 +54,21 @@ def test_coordinate_outlier_sets_note_and_nulls():
     result = resolve_best_coordinate(records, _territory_config())
     assert result["has_coordinates"] is False
     assert "COORDINATE_OUTLIER" in result["notes"]
+
+
+def test_boundary_rejects_candidates_inside_bbox_but_outside_polygon():
+    territory_config = _territory_config()
+    territory_config["validation"]["boundary_wgs84"] = {
+        "type": "Polygon",
+        "coordinates": [[[-2.3, 49.1], [-1.9, 49.1], [-1.9, 49.3], [-2.3, 49.3]]],
+    }
+    boundary = load_boundary(territory_config)
+    at_sea = {"raw_lat": 49.5, "raw_lon": -2.5, "source_class": "authoritative", "source_name": "auth", "source_record_id": "1", "source_wkid": 4326}
+    on_land = {"raw_lat": 49.2, "raw_lon": -2.1, "source_class": "osm", "source_name": "osm", "source_record_id": "2", "source_wkid": 4326}
+
+    results = resolve_best_coordinates([[at_sea, on_land], [at_sea]], territory_config, boundary)
+
+    assert results[0]["coordinate_source"] == "osm"
+    assert results[1]["has_coordinates"] is False
+    assert results[1]["notes"] == ["COORDINATE_OUTLIER"]
+    assert resolve_best_coordinate([at_sea], territory_config)["coordinate_source"] == "authoritative"
@@ -0,0 +1,84 @@
+import csv
+from pathlib import Path
+
+from scripts.pipeline.deltas import delta_path, write_canonical_delta
+from scripts.pipeline.export import write_canonical_csv
+
+CFG = {"output": {"canonical_filename": "jersey.csv", "delta_move_threshold_m": 10}}
+
+
+def _row(postcode: str, lat: float | None = 49.2, lon: float | None = -2.1, score: int = 75) -> dict:
+    return {
+        "territory": "JE",
+        "postcode": postcode,
+        "normalised_postcode": postcode,
+        "source_list": "arcgis_addresses",
+        "source_count": 1,
+        "has_coordinates": lat is not None,
+        "lat": lat,
+        "lon": lon,
+        "coordinate_source": "authoritative" if lat is not None else None,
+        "confidence_score": score,
+        "first_seen": "2026-01-01",
+        "last_seen": "2026-01-01",
+        "notes": None,
+    }
+
+
+def _read(path: Path) -> dict[str, dict]:
+    with path.open("r", encoding="utf-8", newline="") as f:
+        return {row["normalised_postcode"]: row for row in csv.DictReader(f)}
+
+
+def test_delta_lists_added_removed_and_material_changes(tmp_path: Path):
+    write_canonical_csv(
+        CFG,
+        tmp_path,
+        [_row("JE1 1AA"), _row("JE2 2AA"), _row("JE3 3AA"), _row("JE4 4AA"), _row("JE5 5AA", lat=None, lon=None)],
+    )
+    current = [
+        _row("JE0 1AA"),
+        _row("JE2 2AA", lat=49.20005),  # ~5.6 m: below threshold
+        _row("JE3 3AA", lat=49.201),  # ~111 m
+        _row("JE4 4AA", score=80),
+        _row("JE5 5AA"),
+    ]
+
+    path, counts = write_canonical_delta(CFG, tmp_path, current, "2026-02-17")
+
+    assert path == delta_path(CFG, tmp_path, "2026-02-17") == tmp_path / "out" / "deltas" / "jersey_2026-02-17.csv"
+    assert counts == {"added": 1, "removed": 1, "changed": 3}
+    rows = _read(path)
+    assert {key: row["change"] for key, row in rows.items()} == {
+        "JE0 1AA": "added",
+        "JE1 1AA": "removed",
+        "JE3 3AA": "changed",
+        "JE4 4AA": "changed",
+        "JE5 5AA": "changed",
+    }
+    assert rows["JE3 3AA"]["changed_fields"] == "coordinates"
+    assert 100 < float(rows["JE3 3AA"]["moved_m"]) < 120
+    assert rows["JE3 3AA"]["previous_lat"] == "49.2"
+    assert rows["JE4 4AA"]["changed_fields"] == "confidence_score"
+    assert rows["JE4 4AA"]["previous_confidence_score"] == "75"
+    assert rows["JE5 5AA"]["changed_fields"] == "coordinates"
+
+
+def test_first_run_delta_adds_every_row(tmp_path: Path):
+    path, counts = write_canonical_delta(CFG, tmp_path, [_row("JE2 2AA"), _row("JE1 1AA")], "2026-02-17")
+
+    assert counts == {"added": 2, "removed": 0, "changed": 0}
+    assert list(_read(path)) == ["JE1 1AA", "JE2 2AA"]
+
+
+def test_same_day_rerun_diffs_against_previous_day(tmp_path: Path):
+    write_canonical_delta(CFG, tmp_path, [_row("JE1 1AA")], "2026-02-16")
+    write_canonical_csv(CFG, tmp_path, [_row("JE1 1AA")])
+
+    write_canonical_delta(CFG, tmp_path, [_row("JE1 1AA"), _row("JE2 2AA")], "2026-02-17")
+    write_canonical_csv(CFG, tmp_path, [_row("JE1 1AA"), _row("JE2 2AA")])
+    path, counts = write_canonical_delta(CFG, tmp_path, [_row("JE1 1AA"), _row("JE2 2AA", score=80)], "2026-02-17")
+
+    assert counts == {"added": 1, "removed": 0, "changed": 0}
+    assert _read(path)["JE2 2AA"]["confidence_score"] == "80"
+    assert [baseline.name for baseline in (tmp_path / "state" / "delta_baseline").iterdir()] == ["jersey_2026-02-17.csv"]
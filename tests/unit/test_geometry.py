@@ -0,0 +1,91 @@
+import pytest
+
+from scripts.common.errors import ConfigError
+from scripts.common.geometry import (
+    apply_geometry_policy,
+    batch_centroids,
+    geometry_centroid,
+    parse_geometry_policy,
+    simplify_geometry,
+)
+
+
+def test_arcgis_rings_use_area_weighted_centroid_with_holes():
+    geometry = {
+        "rings": [
+            [[0, 0], [0, 10], [10, 10], [10, 0], [0, 0]],
+            [[6, 6], [9, 6], [9, 9], [6, 9], [6, 6]],
+        ]
+    }
+
+    lat, lon = geometry_centroid(geometry)
+
+    # Removing the hole in the upper-right corner pulls the centroid down-left.
+    assert abs(lat - 4.7527) < 1e-3
+    assert abs(lon - 4.7527) < 1e-3
+
+
+def test_projected_rings_keep_precision():
+    geometry = {"rings": [[[400000, 500000], [400010, 500000], [400010, 500010], [400000, 500010]]]}
+    assert geometry_centroid(geometry) == (500005.0, 400005.0)
+
+
+def test_polyline_centroid_is_length_weighted():
+    assert geometry_centroid({"paths": [[[0, 0], [10, 0], [10, 10]]]}) == (2.5, 7.5)
+    assert geometry_centroid({"type": "LineString", "coordinates": [[0, 0], [4, 0]]}) == (0.0, 2.0)
+
+
+def test_batch_centroids_handles_mixed_geojson_and_missing_geometry():
+    geometries = [
+        {"type": "Point", "coordinates": [-2.1, 49.2]},
+        None,
+        {
+            "type": "MultiPolygon",
+            "coordinates": [
+                [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+                [[[10, 0], [11, 0], [11, 1], [10, 1], [10, 0]]],
+            ],
+        },
+        {"x": -2.2, "y": 49.3},
+        {"type": "Polygon", "coordinates": [[[0, 0], [4, 0], [4, 2], [0, 2]]]},
+    ]
+
+    assert batch_centroids(geometries) == [(49.2, -2.1), (None, None), (0.5, 5.5), (49.3, -2.2), (1.0, 2.0)]
+
+
+def test_parse_geometry_policy_variants():
+    assert parse_geometry_policy(None) == ("keep", None)
+    assert parse_geometry_policy("centroid_only") == ("centroid_only", None)
+    assert parse_geometry_policy("simplify:0.5") == ("simplify", 0.5)
+    with pytest.raises(ConfigError):
+        parse_geometry_policy("simplify:abc")
+    with pytest.raises(ConfigError):
+        parse_geometry_policy("drop_everything")
+
+
+def test_simplify_geometry_removes_near_collinear_vertices():
+    geometry = {
+        "rings": [[[0, 0], [5, 0.01], [10, 0], [10, 10], [5, 10.01], [0, 10], [0, 0]]],
+        "spatialReference": {"wkid": 4326},
+    }
+
+    simplified = simplify_geometry(geometry, 0.1)
+
+    assert simplified["rings"] == [[[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]]
+    assert simplified["spatialReference"] == {"wkid": 4326}
+    assert geometry["rings"][0][1] == [5, 0.01]
+
+
+def test_simplify_geometry_keeps_rings_that_would_collapse():
+    ring = [[0, 0], [1, 0], [1, 1], [0, 0]]
+    assert simplify_geometry({"rings": [ring]}, 100.0)["rings"] == [ring]
+
+
+def test_apply_geometry_policy_centroid_only_keeps_spatial_reference():
+    geometry = {"rings": [[[0, 0], [0, 2], [2, 2], [2, 0], [0, 0]]], "spatialReference": {"wkid": 27700}}
+    policy = parse_geometry_policy("centroid_only")
+
+    reduced = apply_geometry_policy(geometry, policy, geometry_centroid(geometry))
+
+    assert reduced == {"x": 1.0, "y": 1.0, "spatialReference": {"wkid": 27700}}
+    assert apply_geometry_policy(geometry, parse_geometry_policy("keep"), (1.0, 1.0)) is geometry
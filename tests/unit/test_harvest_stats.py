@@ -0,0 +1,34 @@
+from pathlib import Path
+
+from scripts.common.fs import write_json
+from scripts.harvest.stats import read_raw_stats, stats_path, write_raw_stats
+
+
+def test_raw_stats_sidecar_round_trips_until_payload_changes(tmp_path: Path):
+    raw_path = tmp_path / "raw" / "arcgis" / "je_arcgis.json"
+    payload = {
+        "rows": [{"source_class": "authoritative"}, {"source_class": "authoritative"}, {"source_class": "osm"}, {}],
+        "geometry_policy": {"auth": {"policy": "centroid_only", "bytes_saved": 10}},
+    }
+    write_json(raw_path, payload)
+
+    stats = write_raw_stats(raw_path, payload)
+
+    assert stats_path(raw_path).name == "je_arcgis.stats.json"
+    assert stats == {
+        "rows": 4,
+        "source_classes": {"authoritative": 2, "osm": 1, "other": 1},
+        "geometry_policy": {"auth": {"policy": "centroid_only", "bytes_saved": 10}},
+    }
+    assert read_raw_stats(raw_path) == stats
+
+    write_json(raw_path, {"rows": []})
+    assert read_raw_stats(raw_path) is None
+
+
+def test_raw_stats_sidecar_skipped_without_payload_file(tmp_path: Path):
+    raw_path = tmp_path / "je_overpass.json"
+
+    assert write_raw_stats(raw_path, {"rows": []})["rows"] == 0
+    assert not stats_path(raw_path).exists()
+    assert read_raw_stats(raw_path) is None
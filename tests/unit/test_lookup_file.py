@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import pytest
+
+from scripts.common.errors import ContractError
+from scripts.pipeline.lookup_file import PostcodeLookup, lookup_path, write_lookup_file
+
+CFG = {"output": {"canonical_filename": "jersey.csv"}}
+
+
+def _row(postcode: str, **overrides) -> dict:
+    row = {
+        "normalised_postcode": postcode,
+        "has_coordinates": True,
+        "lat": 49.2,
+        "lon": -2.1,
+        "source_count": 2,
+        "confidence_score": 80,
+        "coordinate_source": "authoritative",
+        "first_seen": "2026-01-01",
+        "last_seen": "2026-02-01",
+    }
+    row.update(overrides)
+    return row
+
+
+def test_lookup_finds_every_written_postcode(tmp_path: Path):
+    postcodes = ["JE2 3AB", "JE1 1AA", "JE3 9ZZ", "GY10 1AA", "JE2 3AD"]
+    path = write_lookup_file(CFG, tmp_path, [_row(pc, confidence_score=idx) for idx, pc in enumerate(postcodes)])
+
+    assert path == lookup_path(CFG, tmp_path) == tmp_path / "out" / "jersey.lookup"
+    with PostcodeLookup(path) as lookup:
+        assert len(lookup) == len(postcodes)
+        for idx, postcode in enumerate(postcodes):
+            assert lookup.lookup(postcode)["confidence_score"] == idx
+        assert lookup.lookup("je23ab")["normalised_postcode"] == "JE2 3AB"
+        assert lookup.lookup("JE2 3AE") is None
+        assert lookup.lookup("not a postcode") is None
+        assert "JE1 1AA" in lookup
+        assert "JE1 1AB" not in lookup
+
+
+def test_lookup_round_trips_unlocated_rows(tmp_path: Path):
+    row = _row("JE2 3AB", has_coordinates=False, lat=None, lon=None, coordinate_source=None, first_seen="")
+    with PostcodeLookup(write_lookup_file(CFG, tmp_path, [row])) as lookup:
+        assert lookup.lookup("JE2 3AB") == {
+            "normalised_postcode": "JE2 3AB",
+            "has_coordinates": False,
+            "lat": None,
+            "lon": None,
+            "source_count": 2,
+            "confidence_score": 80,
+            "coordinate_source": None,
+            "first_seen": "",
+            "last_seen": "2026-02-01",
+        }
+
+
+def test_lookup_rejects_foreign_or_truncated_files(tmp_path: Path):
+    path = write_lookup_file(CFG, tmp_path, [_row("JE2 3AB")])
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ContractError):
+        PostcodeLookup(path)
+
+    path.write_bytes(b"nope" + bytes(60))
+    with pytest.raises(ContractError):
+        PostcodeLookup(path)
+
+
+def test_lookup_rejects_scores_outside_the_stored_byte(tmp_path: Path):
+    with pytest.raises(ContractError, match="confidence_score"):
+        write_lookup_file(CFG, tmp_path, [_row("JE2 3AB", confidence_score=-5)])
+    assert not (tmp_path / "out" / "jersey.lookup").exists()
@@ -3,8 +3,10 @@ from pathlib import Path
 
 import pytest
 
+from scripts.common.config_loader import load_all_configs
 from scripts.common.errors import ContractError
-from scripts.pipeline.map_to_onspd import run_map_onspd
+from scripts.pipeline.export import CANONICAL_HEADERS
+from scripts.pipeline.map_to_onspd import compile_projection, run_map_onspd
 
 
 def test_map_to_onspd_writes_contract_header_and_rows(tmp_path: Path):
@@ -53,6 +55,29 @@ def test_map_to_onspd_writes_contract_header_and_rows(tmp_path: Path):
     assert reader[1][1] == "JE23AB"
 
 
+def test_map_to_onspd_projects_in_memory_canonical_records(tmp_path: Path):
+    territory_config = {"output": {"canonical_filename": "jersey.csv", "onspd_filename": "jersey_onspd.csv"}}
+    onspd_columns = {
+        "columns": [
+            {"name": "pcd", "source_mapping": "postcode_7char"},
+            {"name": "lat", "source_mapping": "lat"},
+            {"name": "long", "source_mapping": "lon"},
+        ]
+    }
+    records = [
+        {**{name: "" for name in CANONICAL_HEADERS}, "normalised_postcode": "JE2 3AB", "lat": "49.2", "lon": "-2.1"},
+        {**{name: "" for name in CANONICAL_HEADERS}, "normalised_postcode": "JE3 1AA"},
+    ]
+
+    # No canonical CSV exists, so the records are the only possible input.
+    result = run_map_onspd("JE", territory_config, onspd_columns, tmp_path, canonical_records=records)
+
+    assert result["rows"] == 2
+    assert [rate["filled"] for rate in result["fill_rates"]] == [2, 1, 1]
+    with (tmp_path / "out" / "jersey_onspd.csv").open("r", encoding="utf-8", newline="") as f:
+        assert list(csv.reader(f)) == [["pcd", "lat", "long"], ["JE2 3AB", "49.2", "-2.1"], ["JE3 1AA", "", ""]]
+
+
 def test_map_to_onspd_fails_when_canonical_missing(tmp_path: Path):
     territory_config = {
         "output": {
@@ -68,3 +93,123 @@ def test_map_to_onspd_fails_when_canonical_missing(tmp_path: Path):
 
     with pytest.raises(ContractError):
         run_map_onspd("JE", territory_config, onspd_columns, tmp_path)
+
+
+def _write_canonical(path: Path, rows: list[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["normalised_postcode", "lat", "lon"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_map_to_onspd_counts_fill_rates_while_streaming(tmp_path: Path):
+    _write_canonical(
+        tmp_path / "out" / "jersey.csv",
+        [
+            {"normalised_postcode": "JE2 3AB", "lat": "49.2", "lon": "-2.1"},
+            {"normalised_postcode": "JE2 3AD", "lat": "", "lon": ""},
+        ],
+    )
+    territory_config = {"output": {"canonical_filename": "jersey.csv", "onspd_filename": "jersey_onspd.csv"}}
+    onspd_columns = {
+        "columns": [
+            {"name": "pcd", "source_mapping": "normalised_postcode"},
+            {"name": "lat", "source_mapping": "lat"},
+            {"name": "oa11", "source_mapping": "blank"},
+        ]
+    }
+
+    result = run_map_onspd("JE", territory_config, onspd_columns, tmp_path)
+
+    assert result["rows"] == 2
+    assert [(rate["column"], rate["filled"], rate["null"], rate["fill_percent"]) for rate in result["fill_rates"]] == [
+        ("pcd", 2, 0, 100.0),
+        ("lat", 1, 1, 50.0),
+        ("oa11", 0, 2, 0.0),
+    ]
+
+
+def test_map_to_onspd_rejects_unknown_mapping_before_writing(tmp_path: Path):
+    _write_canonical(tmp_path / "out" / "jersey.csv", [])
+    out_path = tmp_path / "out" / "jersey_onspd.csv"
+    out_path.write_text("previous\n", encoding="utf-8")
+    territory_config = {"output": {"canonical_filename": "jersey.csv", "onspd_filename": "jersey_onspd.csv"}}
+    onspd_columns = {"columns": [{"name": "pcd", "source_mapping": "nonexistent"}]}
+
+    with pytest.raises(ContractError):
+        run_map_onspd("JE", territory_config, onspd_columns, tmp_path)
+    assert out_path.read_text(encoding="utf-8") == "previous\n"
+
+
+def test_compile_projection_supports_computed_date_and_lookup_mappings():
+    header = ["territory", "normalised_postcode", "lat", "lon", "coordinate_source", "first_seen"]
+    columns = [
+        {"name": "pcd", "source_mapping": "postcode_7char"},
+        {"name": "pcd2", "source_mapping": "postcode_8char"},
+        {"name": "dointr", "source_mapping": {"date": "first_seen", "format": "%Y%m"}},
+        {"name": "oseast1m", "source_mapping": {"computed": "osgb36_easting"}},
+        {"name": "osnrth1m", "source_mapping": {"computed": "osgb36_northing"}},
+        {"name": "ctry", "source_mapping": {"lookup": "geo", "key": "territory", "value": "ctry"}},
+        {"name": "osgrdind", "source_mapping": {"lookup": "quality", "key": "coordinate_source", "value": "ind", "default": "9"}},
+        {"name": "oa21", "source_mapping": {"constant": "M99999999"}},
+    ]
+    lookups = {
+        "geo": {"IM": {"territory": "IM", "ctry": "M83000003"}, "JE": {"territory": "JE", "ctry": "L93000001"}},
+        "quality": {"authoritative": {"coordinate_source": "authoritative", "ind": "1"}},
+    }
+    project = compile_projection(columns, header, "IM", lookups)
+
+    values = project(
+        [
+            ["IM", "IM1 1AA", "54.15", "-4.48", "authoritative", "2026-02-17"],
+            ["JE", "JE2 3AB", "49.2", "-2.1", "osm", ""],
+            ["IM", "IM99 1AA", "", "", "", "2026-01-05"],
+        ]
+    )
+    rows = [list(row) for row in zip(*values)]
+
+    assert rows[0][:3] == ["IM1 1AA", "IM1  1AA", "202602"]
+    assert 230_000 < int(rows[0][3]) < 240_000 and 470_000 < int(rows[0][4]) < 480_000
+    assert rows[0][5:] == ["M83000003", "1", "M99999999"]
+    # Jersey lies south of the National Grid's false origin.
+    assert rows[1] == ["JE2 3AB", "JE2  3AB", "", "", "", "L93000001", "9", "M99999999"]
+    assert rows[2][:5] == ["IM991AA", "IM99 1AA", "202601", "", ""]
+
+
+def test_map_to_onspd_rejects_undeclared_lookup(tmp_path: Path):
+    _write_canonical(tmp_path / "out" / "jersey.csv", [])
+    territory_config = {"output": {"canonical_filename": "jersey.csv", "onspd_filename": "jersey_onspd.csv"}}
+    onspd_columns = {"columns": [{"name": "ctry", "source_mapping": {"lookup": "geo", "key": "lat", "value": "ctry"}}]}
+
+    with pytest.raises(ContractError):
+        run_map_onspd("JE", territory_config, onspd_columns, tmp_path)
+
+
+def test_full_width_overlay_maps_every_column(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    repo_root = Path(__file__).resolve().parents[2]
+    monkeypatch.chdir(repo_root)
+    bundle = load_all_configs(repo_root / "config", overlay_config_dir=repo_root / "config" / "onspd_full")
+    canonical = tmp_path / "out" / "isle_of_man.csv"
+    canonical.parent.mkdir(parents=True)
+    with canonical.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CANONICAL_HEADERS)
+        writer.writeheader()
+        writer.writerow(
+            {
+                "territory": "IM",
+                "postcode": "IM1 1AA",
+                "normalised_postcode": "IM1 1AA",
+                "has_coordinates": "true",
+                "lat": "54.15",
+                "lon": "-4.48",
+                "coordinate_source": "authoritative",
+                "first_seen": "2026-02-17",
+            }
+        )
+
+    result = run_map_onspd("IM", bundle.territories["IM"], bundle.onspd_columns, tmp_path)
+
+    filled = {rate["column"] for rate in result["fill_rates"] if rate["filled"]}
+    assert len(result["header"]) > 20
+    assert {"pcd", "pcds", "dointr", "oseast1m", "osnrth1m", "osgrdind", "ctry", "oslaua", "lat", "long"} <= filled
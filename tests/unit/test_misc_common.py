@@ -1,5 +1,6 @@
 from pathlib import Path
 
+from scripts.common import fs
 from scripts.common.deterministic import stable_sorted
 from scripts.common.geometry import extract_point_from_geometry
 from scripts.common.ids import generate_run_id
@@ -29,3 +30,11 @@ def test_generate_run_id_prefix():
 def test_parse_run_date_defaults_and_iso():
     assert parse_run_date("2026-02-17") == "2026-02-17"
     assert len(parse_run_date(None)) == len("2026-02-17")
+
+
+def test_iter_json_array_streams_rows_across_chunk_boundaries(tmp_path: Path, monkeypatch):
+    payload = {"meta": {"rows": "not this"}, "rows": [{"raw_postcode": "JE2 3AB", "lat": 49.21}, None, True, "x\\"], "n": 4}
+    fs.write_json(tmp_path / "raw.json", payload)
+    monkeypatch.setattr(fs, "_JSON_READ_CHUNK", 3)
+    assert list(fs.iter_json_array(tmp_path / "raw.json", "rows")) == payload["rows"]
+    assert list(fs.iter_json_array(tmp_path / "raw.json", "missing")) == []
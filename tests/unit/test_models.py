@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from scripts.common.models import CanonicalRow, RawRecord
+
+
+def _raw_payload(**overrides) -> dict:
+    payload = {
+        "territory": "JE",
+        "source_name": "osm_overpass",
+        "source_class": "osm",
+        "source_record_id": "node/1",
+        "raw_postcode": "JE2 3AB",
+        "raw_lat": 49.2,
+        "raw_lon": -2.1,
+        "raw_geometry": None,
+        "source_wkid": 4326,
+        "extract_date": "2026-02-17",
+        "run_id": "run-1",
+        "raw_payload_ref": None,
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_raw_record_round_trips_and_interns_repeated_strings():
+    first = RawRecord.from_dict(json.loads(json.dumps(_raw_payload())))
+    second = RawRecord.from_dict(json.loads(json.dumps(_raw_payload(source_record_id="node/2"))))
+
+    assert first.to_dict() == _raw_payload()
+    assert first.source_name is second.source_name
+    assert first.run_id is second.run_id
+    assert not hasattr(first, "__dict__")
+
+
+def test_raw_record_reads_like_a_row_dict():
+    record = RawRecord.from_dict({"raw_postcode": "JE2 3AB"})
+
+    assert record["raw_postcode"] == "JE2 3AB"
+    assert record.get("source_class", "other") == "other"
+    assert dict(record.items())["source_wkid"] is None
+    with pytest.raises(KeyError):
+        record["normalised_postcode"]
+
+
+def test_canonical_row_supports_in_place_temporal_stamps():
+    row = CanonicalRow.from_dict({"territory": "JE", "normalised_postcode": "JE2 3AB", "first_seen": ""})
+    row["first_seen"] = "2026-02-17"
+
+    assert row.first_seen == "2026-02-17"
+    assert {**row}["normalised_postcode"] == "JE2 3AB"
+    assert list(row.keys())[:3] == ["territory", "postcode", "normalised_postcode"]
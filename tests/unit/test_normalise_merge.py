@@ -1,7 +1,12 @@
 from pathlib import Path
 
-from scripts.common.fs import write_json
-from scripts.pipeline.normalise_merge import run_normalise_merge
+import pytest
+
+from scripts.common.errors import ConfigError
+from scripts.common.fs import read_json, write_json
+from scripts.pipeline import external_merge, normalise_merge
+from scripts.pipeline.intermediate import iter_canonical_rows, write_canonical_intermediate
+from scripts.pipeline.normalise_merge import MergeOptions, run_normalise_merge
 
 
 def test_normalise_merge_dedupes_and_applies_source_priority(tmp_path: Path):
@@ -79,3 +84,200 @@ def test_normalise_merge_dedupes_and_applies_source_priority(tmp_path: Path):
     assert row["source_list"] == "auth_source;osm_overpass"
     assert row["confidence_score"] == 75
     assert merged["invalid_postcodes"]["osm_overpass"] == 1
+
+
+def _engine_fixture() -> tuple[list[dict], dict, dict]:
+    rows = []
+    for idx, (source_name, source_class, raw_postcode) in enumerate(
+        [
+            ("osm_overpass", "osm", "JE2 3AB"),
+            ("auth_source", "authoritative", "je2 3ab"),
+            ("auth_source", "authoritative", "JE2 3AB"),
+            ("unlisted", "other", "je1 1aa"),
+            ("osm_overpass", "osm", "JE1 1AA"),
+            ("osm_overpass", "osm", "not a postcode"),
+            ("auth_source", "authoritative", "GY1 1AA"),
+        ]
+    ):
+        rows.append(
+            {
+                "territory": "JE",
+                "source_name": source_name,
+                "source_class": source_class,
+                "source_record_id": str(idx % 3) if idx != 4 else None,
+                "raw_postcode": raw_postcode,
+                "raw_lat": 49.2 + idx / 1000,
+                "raw_lon": -2.1,
+                "source_wkid": 4326,
+            }
+        )
+    territory_config = {
+        "source_priority": ["auth_source", "osm_overpass"],
+        "validation": {"bbox_wgs84": {"min_lat": 49.0, "max_lat": 50.0, "min_lon": -3.0, "max_lon": -1.0}},
+        "crs": {"default_epsg": 4326, "authoritative_epsg_hint_by_source": {}},
+        "scoring_profile": "default",
+    }
+    scoring_rules = {
+        "profiles": {
+            "default": {
+                "rules": [
+                    {"id": "authoritative_presence", "when": "has_source(authoritative)", "add": 50},
+                    {"id": "osm_presence", "when": "has_source(osm)", "add": 10},
+                ],
+                "clamp": {"min": 0, "max": 100},
+            }
+        }
+    }
+    return rows, territory_config, scoring_rules
+
+
+def _merge_output(tmp_path: Path, name: str, options: MergeOptions) -> bytes:
+    rows, territory_config, scoring_rules = _engine_fixture()
+    data_dir = tmp_path / name
+    write_json(data_dir / "raw" / "arcgis" / "je_arcgis.json", {"rows": rows[:4]})
+    write_json(data_dir / "raw" / "osm" / "overpass" / "je_overpass.json", {"rows": rows[4:]})
+    run_normalise_merge("JE", territory_config, scoring_rules, data_dir, "run-1", options)
+    intermediate_dir = data_dir / "intermediate"
+    return (intermediate_dir / "je_canonical.json").read_bytes() + (intermediate_dir / "je_canonical_rows.jsonl").read_bytes()
+
+
+def test_columnar_engine_matches_classic_engine(tmp_path: Path):
+    classic = _merge_output(tmp_path, "classic", MergeOptions())
+    assert classic == _merge_output(tmp_path, "columnar", MergeOptions(engine="columnar"))
+    assert read_json(tmp_path / "columnar" / "intermediate" / "je_canonical.json")["unique_postcodes"] == 3
+
+
+def test_bounded_memory_merge_matches_classic_engine(tmp_path: Path, monkeypatch):
+    classic = _merge_output(tmp_path, "classic", MergeOptions())
+    # A one-byte budget spills a run per row; a fan-in of 2 forces multi-pass merging.
+    monkeypatch.setattr(external_merge, "MAX_FAN_IN", 2)
+    assert classic == _merge_output(tmp_path, "spilled", MergeOptions(max_memory_bytes=1))
+    assert classic == _merge_output(tmp_path, "in_memory", MergeOptions(max_memory_bytes=1 << 30))
+
+
+def test_bounded_memory_merge_caps_build_batches_by_raw_records(tmp_path: Path, monkeypatch):
+    batches = []
+    original_build = normalise_merge._build_shard
+    monkeypatch.setattr(
+        normalise_merge,
+        "_build_shard",
+        lambda groups, *args, **kwargs: batches.append([len(group.records) for group in groups])
+        or original_build(groups, *args, **kwargs),
+    )
+    classic = _merge_output(tmp_path, "classic", MergeOptions())
+    assert batches == [[1, 2, 3]]
+
+    batches.clear()
+    budget = 3 * normalise_merge.BUILD_RECORD_BYTES
+    assert classic == _merge_output(tmp_path, "bounded", MergeOptions(max_memory_bytes=budget))
+    assert batches == [[1, 2], [3]]
+
+
+def test_sharded_merge_matches_sequential_merge(tmp_path: Path):
+    sequential = _merge_output(tmp_path, "sequential", MergeOptions())
+    assert sequential == _merge_output(tmp_path, "sharded", MergeOptions(workers=2))
+    assert sequential == _merge_output(tmp_path, "sharded_incremental", MergeOptions(workers=2, incremental=True))
+
+
+def test_normalise_merge_rejects_non_positive_workers(tmp_path: Path):
+    with pytest.raises(ConfigError):
+        _merge_output(tmp_path, "no_workers", MergeOptions(workers=0))
+
+
+def test_bounded_memory_merge_rejects_columnar_engine(tmp_path: Path):
+    with pytest.raises(ConfigError):
+        _merge_output(tmp_path, "columnar", MergeOptions(engine="columnar", max_memory_bytes=1 << 20))
+
+
+def test_canonical_intermediate_stores_each_explanation_once(tmp_path: Path):
+    shared = {"applied_rules": ["osm_presence"], "raw_score": 10, "clamped_score": 10}
+    rows = [{"normalised_postcode": key, "confidence_score": 10} for key in ("JE1 1AA", "JE1 1AB", "JE1 1AD")]
+    explanations = [shared, dict(shared), {"applied_rules": [], "raw_score": 0, "clamped_score": 0}]
+
+    summary = write_canonical_intermediate(tmp_path, "JE", {"territory": "JE"}, rows, explanations)
+
+    assert read_json(tmp_path / "intermediate" / "je_canonical.json") == summary
+    assert summary["rows_path"] == "je_canonical_rows.jsonl"
+    assert len(summary["score_explanations"]) == 2
+    read_back = list(iter_canonical_rows(tmp_path, "JE"))
+    assert [row for row, _ in read_back] == rows
+    ids = [explanation_id for _, explanation_id in read_back]
+    assert ids[0] == ids[1] != ids[2]
+    assert summary["score_explanations"][ids[0]] == shared
+
+
+def test_normalise_merge_rejects_unknown_engine(tmp_path: Path):
+    with pytest.raises(ConfigError):
+        run_normalise_merge("JE", {"source_priority": []}, {"profiles": {}}, tmp_path, "run-1", MergeOptions(engine="gpu"))
+
+
+def test_incremental_merge_reuses_unchanged_groups(tmp_path: Path, monkeypatch):
+    rows, territory_config, scoring_rules = _engine_fixture()
+    full = _merge_output(tmp_path, "full", MergeOptions())
+
+    data_dir = tmp_path / "incremental"
+    write_json(data_dir / "raw" / "arcgis" / "je_arcgis.json", {"rows": rows[:4]})
+    write_json(data_dir / "raw" / "osm" / "overpass" / "je_overpass.json", {"rows": rows[4:]})
+    options = MergeOptions(incremental=True)
+    out_path = data_dir / "intermediate" / "je_canonical_rows.jsonl"
+
+    built = []
+    original_build = normalise_merge._build_canonical_row
+    monkeypatch.setattr(
+        normalise_merge,
+        "_build_canonical_row",
+        lambda group, *args: built.append(group.key) or original_build(group, *args),
+    )
+
+    run_normalise_merge("JE", territory_config, scoring_rules, data_dir, "run-1", options)
+    assert full.endswith(out_path.read_bytes())
+    assert len(built) == 3
+
+    built.clear()
+    run_normalise_merge("JE", territory_config, scoring_rules, data_dir, "run-1", options)
+    assert full.endswith(out_path.read_bytes())
+    assert built == []
+
+    rows[4]["raw_lat"] = 49.25
+    write_json(data_dir / "raw" / "osm" / "overpass" / "je_overpass.json", {"rows": rows[4:]})
+    run_normalise_merge("JE", territory_config, scoring_rules, data_dir, "run-1", options)
+    assert built == ["JE1 1AA"]
+
+    built.clear()
+    territory_config["source_priority"] = ["osm_overpass", "auth_source"]
+    run_normalise_merge("JE", territory_config, scoring_rules, data_dir, "run-1", options)
+    assert len(built) == 3
+
+
+def test_incremental_merge_ignores_harvest_provenance(tmp_path: Path, monkeypatch):
+    rows, territory_config, scoring_rules = _engine_fixture()
+    data_dir = tmp_path / "provenance"
+    options = MergeOptions(incremental=True)
+
+    def harvest(run_id: str, extract_date: str) -> None:
+        stamped = [
+            {**row, "run_id": run_id, "extract_date": extract_date, "raw_payload_ref": f"{run_id}/{idx}"}
+            for idx, row in enumerate(rows)
+        ]
+        write_json(data_dir / "raw" / "arcgis" / "je_arcgis.json", {"rows": stamped[:4]})
+        write_json(data_dir / "raw" / "osm" / "overpass" / "je_overpass.json", {"rows": stamped[4:]})
+
+    built = []
+    original_build = normalise_merge._build_canonical_row
+    monkeypatch.setattr(
+        normalise_merge,
+        "_build_canonical_row",
+        lambda group, *args: built.append(group.key) or original_build(group, *args),
+    )
+
+    harvest("run-1", "2026-02-17")
+    run_normalise_merge("JE", territory_config, scoring_rules, data_dir, "run-1", options)
+    assert len(built) == 3
+    first = (data_dir / "intermediate" / "je_canonical_rows.jsonl").read_bytes()
+
+    built.clear()
+    harvest("run-2", "2026-02-18")
+    run_normalise_merge("JE", territory_config, scoring_rules, data_dir, "run-2", options)
+    assert built == []
+    assert (data_dir / "intermediate" / "je_canonical_rows.jsonl").read_bytes() == first
+    assert not (data_dir / "state" / "merge_cache" / "je.json.tmp").exists()
@@ -1,4 +1,11 @@
-from scripts.common.postcode import is_valid_uk_unit_postcode, normalise_postcode
+from pathlib import Path
+
+from scripts.common.postcode import (
+    PostcodeNormaliser,
+    is_valid_uk_unit_postcode,
+    normalise_many,
+    normalise_postcode,
+)
 
 
 def test_normalise_happy_path():
@@ -31,3 +38,58 @@ def test_normalise_extracts_embedded_postcode_from_address_text():
 def test_validator_accepts_unit_regex():
     assert is_valid_uk_unit_postcode("JE2 3AB")
     assert not is_valid_uk_unit_postcode("JE23AB")
+
+
+def test_normalise_many_matches_single_value_normaliser():
+    values = ["JE2 3AB", "je2 3ab", None, "JE2\t3AB", "55 Duke Street Douglas IM1 2AU", "bad", "JE2 3AB"]
+    assert normalise_many(values) == [normalise_postcode(value) for value in values]
+
+
+def test_normaliser_dedupes_and_bounds_cache():
+    normaliser = PostcodeNormaliser(max_entries=2)
+    assert normaliser.normalise_many(["je2 3ab", "je2 3ab", "JE1 1AA", "gy1 1aa"]) == ["JE2 3AB", "JE2 3AB", "JE1 1AA", "GY1 1AA"]
+    assert normaliser.misses == 3
+    assert list(normaliser.cache) == ["JE1 1AA", "gy1 1aa"]
+
+
+def test_normaliser_cache_persists_between_runs(tmp_path: Path):
+    cache_path = tmp_path / "state" / "postcode_cache.json"
+    first = PostcodeNormaliser()
+    first.normalise_many(["je2 3ab", "bad"])
+    first.save(cache_path)
+
+    second = PostcodeNormaliser()
+    second.load(cache_path)
+    assert second.normalise_many(["je2 3ab", "bad"]) == ["JE2 3AB", None]
+    assert second.hits == 2
+    assert second.misses == 0
+
+
+def test_normaliser_ignores_cache_written_by_other_rules(tmp_path: Path):
+    cache_path = tmp_path / "postcode_cache.json"
+    cache_path.write_text('{"rules_fingerprint": "old", "entries": {"je2 3ab": "XX1 1XX"}}', encoding="utf-8")
+
+    normaliser = PostcodeNormaliser()
+    normaliser.load(cache_path)
+    assert normaliser.normalise("je2 3ab") == "JE2 3AB"
+
+
+def test_normaliser_matches_normalise_postcode_on_whitespace_and_newlines():
+    values = ["JE2 3AB\n", "JE2 3AB ", " JE2 3AB", "JE2 3AB\r\n", "JE2\n3AB", "\n"]
+    assert PostcodeNormaliser().normalise_many(values) == [normalise_postcode(value) for value in values]
+    assert PostcodeNormaliser().normalise("JE2 3AB\n") == "JE2 3AB"
+    assert not is_valid_uk_unit_postcode("JE2 3AB\n")
+
+
+def test_normaliser_treats_truncated_cache_as_empty(tmp_path: Path):
+    cache_path = tmp_path / "postcode_cache.json"
+    first = PostcodeNormaliser()
+    first.normalise_many(["je2 3ab"])
+    first.save(cache_path)
+    assert not (tmp_path / "postcode_cache.json.tmp").exists()
+    cache_path.write_text(cache_path.read_text(encoding="utf-8")[:20], encoding="utf-8")
+
+    normaliser = PostcodeNormaliser()
+    normaliser.load(cache_path)
+    assert normaliser.cache == {}
+    assert normaliser.normalise("je2 3ab") == "JE2 3AB"
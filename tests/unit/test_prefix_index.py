@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import pytest
+
+from scripts.pipeline.lookup_file import write_lookup_file
+from scripts.pipeline.prefix_index import PrefixIndex, prefix_index_path, write_prefix_index
+
+CFG = {"output": {"canonical_filename": "guernsey.csv"}}
+
+
+def _row(postcode: str, lat: float | None = 49.45, lon: float | None = -2.55) -> dict:
+    return {
+        "normalised_postcode": postcode,
+        "has_coordinates": lat is not None,
+        "lat": lat,
+        "lon": lon,
+        "source_count": 1,
+        "confidence_score": 60,
+        "coordinate_source": "osm" if lat is not None else None,
+        "first_seen": "2026-01-01",
+        "last_seen": "2026-01-01",
+    }
+
+
+@pytest.fixture
+def index(tmp_path: Path):
+    rows = [
+        _row("GY1 1AA", 49.45, -2.54),
+        _row("GY1 1AB", 49.46, -2.53),
+        _row("GY1 2AA", 49.44, -2.55),
+        _row("GY10 1AA", 49.43, -2.36),
+        _row("GY9 3AA", None, None),
+    ]
+    write_lookup_file(CFG, tmp_path, rows)
+    path = write_prefix_index(CFG, tmp_path, rows)
+    assert path == prefix_index_path(CFG, tmp_path)
+    index = PrefixIndex.for_territory(CFG, tmp_path)
+    yield index
+    index.close()
+
+
+def test_summary_reports_counts_and_bboxes_per_level(index):
+    assert index.summary("gy1") == {"prefix": "GY1", "level": "outcode", "count": 3, "bbox": [-2.55, 49.44, -2.53, 49.46]}
+    assert index.summary("GY1 1") == {"prefix": "GY1 1", "level": "sector", "count": 2, "bbox": [-2.54, 49.45, -2.53, 49.46]}
+    assert index.summary("GY1 1A")["count"] == 2
+    assert index.summary("GY9") == {"prefix": "GY9", "level": "outcode", "count": 1, "bbox": None}
+    assert index.summary("GY5") is None
+    assert index.summary("GY1 1Z") is None
+
+
+def test_complete_descends_outcode_sector_unit(index):
+    assert [item["prefix"] for item in index.complete("")] == ["GY1", "GY10", "GY9"]
+    assert [item["prefix"] for item in index.complete("GY1")] == ["GY1", "GY10"]
+    assert [item["prefix"] for item in index.complete("gy1 ")] == ["GY1 1", "GY1 2"]
+    assert [item["prefix"] for item in index.complete("GY1  1")] == ["GY1 1"]
+    assert index.complete("GY1 1A", limit=1) == [
+        {"prefix": "GY1 1AA", "level": "unit", "count": 1, "bbox": [-2.54, 49.45, -2.54, 49.45]}
+    ]
+
+
+def test_units_keep_outcodes_distinct(index):
+    assert index.units("GY1") == ["GY1 1AA", "GY1 1AB", "GY1 2AA"]
+    assert index.units("GY10") == ["GY10 1AA"]
+    assert index.units("GY1 1", limit=1) == ["GY1 1AA"]
@@ -0,0 +1,48 @@
+from scripts.common.models import CanonicalRow
+from scripts.pipeline.qa import NOTE_DUPLICATE, NOTE_SECTOR_OUTLIER, apply_coordinate_qa
+
+
+def _row(postcode: str, lat: float | None, lon: float | None, notes: str | None = None) -> CanonicalRow:
+    return CanonicalRow(
+        territory="JE",
+        postcode=postcode,
+        normalised_postcode=postcode,
+        source_list="auth",
+        source_count=1,
+        has_coordinates=lat is not None,
+        lat=lat,
+        lon=lon,
+        coordinate_source="authoritative" if lat is not None else None,
+        confidence_score=65,
+        first_seen="",
+        last_seen="",
+        notes=notes,
+    )
+
+
+def test_flags_postcodes_sharing_one_placeholder_coordinate():
+    rows = [_row(f"JE1 {idx}AA", 49.18, -2.1) for idx in range(3)] + [_row("JE1 9ZZ", 49.181, -2.1)]
+
+    counters = apply_coordinate_qa(rows, {"validation": {"qa": {"duplicate_coordinate_min_postcodes": 3}}})
+
+    assert counters["shared_coordinate_points"] == 1
+    assert counters["shared_coordinate_postcodes"] == 3
+    assert [row.notes for row in rows] == [NOTE_DUPLICATE] * 3 + [None]
+
+
+def test_flags_postcode_far_from_its_sector_and_keeps_existing_notes():
+    rows = [
+        _row("JE2 3AB", 49.20, -2.10),
+        _row("JE2 3AD", 49.201, -2.101),
+        _row("JE2 3AE", 49.202, -2.099),
+        _row("JE2 3AF", 49.45, -2.10, notes="OSM_BASELINE_ONLY"),
+        _row("JE2 4AA", 49.45, -2.10),
+        _row("JE2 4AB", None, None, notes="COORDINATES_MISSING"),
+    ]
+
+    counters = apply_coordinate_qa(rows, {"validation": {}})
+
+    assert counters["sector_distance_outliers"] == 1
+    assert rows[3].notes == f"OSM_BASELINE_ONLY;{NOTE_SECTOR_OUTLIER}"
+    assert [row.notes for row in rows[:3]] == [None, None, None]
+    assert rows[4].notes is None
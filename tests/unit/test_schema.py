@@ -1,7 +1,7 @@
 import pytest
 
 from scripts.common.errors import ConfigError
-from scripts.common.schema import validate_onspd_columns_config, validate_territory_config
+from scripts.common.schema import validate_onspd_columns_config, validate_scoring_config, validate_territory_config
 
 
 BASE_TERRITORY = {
@@ -36,6 +36,20 @@ def test_validate_territory_config_allows_unknown_when_enabled():
     validate_territory_config(okay, allow_unknown=True)
 
 
+def test_validate_territory_config_rejects_unknown_geometry_policy():
+    bad = dict(BASE_TERRITORY)
+    bad["arcgis"] = {"enabled": True, "services": [{"name": "x", "geometry_policy": "shrink"}]}
+    with pytest.raises(ConfigError):
+        validate_territory_config(bad)
+
+
+def test_validate_territory_config_rejects_negative_delta_threshold():
+    bad = dict(BASE_TERRITORY)
+    bad["output"] = {**BASE_TERRITORY["output"], "delta_move_threshold_m": -1}
+    with pytest.raises(ConfigError):
+        validate_territory_config(bad)
+
+
 def test_validate_onspd_columns_rejects_duplicate_names():
     cfg = {
         "version": "1",
@@ -47,3 +61,51 @@ def test_validate_onspd_columns_rejects_duplicate_names():
     }
     with pytest.raises(ConfigError):
         validate_onspd_columns_config(cfg)
+
+
+def test_validate_onspd_columns_rejects_undeclared_lookup():
+    cfg = {
+        "version": "1.0",
+        "null_policy": "blank",
+        "columns": [
+            {
+                "name": "ctry",
+                "type": "string",
+                "nullable": True,
+                "source_mapping": {"lookup": "geo", "key": "territory", "value": "ctry"},
+            }
+        ],
+    }
+    with pytest.raises(ConfigError):
+        validate_onspd_columns_config(cfg)
+    validate_onspd_columns_config({**cfg, "lookups": {"geo": {"path": "geo.csv", "key": "territory"}}})
+
+
+@pytest.mark.parametrize(
+    "column, message",
+    [
+        ({"type": "decimal"}, "type must be one of"),
+        ({"nullable": "yes"}, "nullable must be true or false"),
+        ({"type": "date"}, "format is required"),
+        ({"pattern": "[A-Z"}, "not a valid regular expression"),
+    ],
+)
+def test_validate_onspd_columns_rejects_bad_column_contract(column: dict, message: str):
+    base = {"name": "dointr", "type": "string", "nullable": True, "source_mapping": "blank"}
+    cfg = {"version": "1.0", "null_policy": "blank", "columns": [{**base, **column}]}
+    with pytest.raises(ConfigError, match=message):
+        validate_onspd_columns_config(cfg)
+    valid = {**base, "type": "date", "format": "%Y%m", "pattern": "^[0-9]{6}$"}
+    validate_onspd_columns_config({**cfg, "columns": [valid]})
+
+
+def test_validate_scoring_config_rejects_unknown_predicate():
+    with pytest.raises(ConfigError, match="profiles.default"):
+        validate_scoring_config({"profiles": {"default": {"rules": [{"id": "x", "when": "has_osm", "add": 1}]}}})
+
+
+@pytest.mark.parametrize("clamp", [{"min": -10, "max": 100}, {"min": 0, "max": 300}, {"min": 50, "max": 10}])
+def test_validate_scoring_config_rejects_clamps_outside_lookup_byte(clamp):
+    with pytest.raises(ConfigError, match="clamp"):
+        validate_scoring_config({"profiles": {"default": {"rules": [], "clamp": clamp}}})
+    validate_scoring_config({"profiles": {"default": {"rules": [], "clamp": {"min": 0, "max": 255}}}})
@@ -1,4 +1,7 @@
-from scripts.common.scoring import apply_scoring_profile
+import pytest
+
+from scripts.common.errors import ConfigError
+from scripts.common.scoring import apply_scoring_profile, compile_scoring_profile
 
 
 def test_apply_scoring_profile_applies_expected_rules():
@@ -32,3 +35,30 @@ def test_apply_scoring_profile_clamps():
     }
     score, _ = apply_scoring_profile(profile, source_classes={"osm"}, coordinate_source="osm")
     assert score == 100
+
+
+def test_compiled_profile_shares_explanations_and_ignores_unreferenced_values():
+    compiled = compile_scoring_profile(
+        {
+            "rules": [
+                {"id": "osm_presence", "when": "has_source(osm)", "add": 10},
+                {"id": "osm_coords", "when": "coord_source(osm)", "add": 5},
+            ],
+            "clamp": {"min": 0, "max": 100},
+        }
+    )
+
+    first = compiled.score(source_classes={"osm"}, coordinate_source="osm")
+    second = compiled.score(source_classes={"osm", "digimap"}, coordinate_source="osm")
+    assert first == (15, {"applied_rules": ["osm_presence", "osm_coords"], "raw_score": 15, "clamped_score": 15})
+    assert second[1] is first[1]
+    assert compiled.score(source_classes={"other"}, coordinate_source="digimap") == (
+        0,
+        {"applied_rules": [], "raw_score": 0, "clamped_score": 0},
+    )
+
+
+@pytest.mark.parametrize("condition", ["has_sources(osm)", "coord_source()", "always", ""])
+def test_compile_scoring_profile_rejects_unknown_predicates(condition):
+    with pytest.raises(ConfigError):
+        compile_scoring_profile({"rules": [{"id": "bad", "when": condition, "add": 1}]})
@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import numpy as np
+
+from scripts.pipeline.spatial_index import SpatialIndex, spatial_index_path, write_spatial_index
+
+
+def _index(n: int = 500, seed: int = 1) -> SpatialIndex:
+    rng = np.random.default_rng(seed)
+    lat = 49.17 + rng.uniform(0, 0.1, n)
+    lon = -2.25 + rng.uniform(0, 0.2, n)
+    return SpatialIndex(np.asarray([f"JE{idx}" for idx in range(n)]), lat, lon)
+
+
+def _brute_distances(index: SpatialIndex, lat: float, lon: float) -> np.ndarray:
+    qx, qy = index._project([lat], [lon])
+    return np.hypot(index._x - qx[0], index._y - qy[0])
+
+
+def test_nearest_many_matches_brute_force():
+    index = _index()
+    rng = np.random.default_rng(2)
+    lats = 49.15 + rng.uniform(0, 0.14, 200)
+    lons = -2.3 + rng.uniform(0, 0.3, 200)
+
+    indices, distances = index.nearest_many(lats, lons, k=3)
+
+    for row, (lat, lon) in enumerate(zip(lats, lons)):
+        brute = _brute_distances(index, lat, lon)
+        np.testing.assert_allclose(distances[row], np.sort(brute)[:3])
+        np.testing.assert_allclose(brute[indices[row]], distances[row])
+
+
+def test_within_returns_all_points_in_radius_nearest_first():
+    index = _index()
+    brute = _brute_distances(index, 49.2, -2.15)
+
+    hits = index.within(49.2, -2.15, 500)
+
+    assert len(hits) == int((brute <= 500).sum())
+    assert [dist for _, dist in hits] == sorted(dist for _, dist in hits)
+    assert index.within_many([49.2, 10.0], [-2.15, 10.0], 500)[1] == []
+
+
+def test_nearest_handles_far_queries_and_small_indexes():
+    index = SpatialIndex(np.asarray(["JE2 3AB", "JE2 3AD"]), [49.2, 49.21], [-2.1, -2.1])
+
+    assert [postcode for postcode, _ in index.nearest(51.0, 0.0, k=5)] == ["JE2 3AD", "JE2 3AB"]
+
+
+def test_write_spatial_index_persists_next_to_canonical_csv(tmp_path: Path):
+    rows = [
+        {"normalised_postcode": "JE2 3AB", "has_coordinates": True, "lat": 49.2, "lon": -2.1},
+        {"normalised_postcode": "JE2 3AD", "has_coordinates": False, "lat": None, "lon": None},
+    ]
+    cfg = {"output": {"canonical_filename": "jersey.csv"}}
+
+    path = write_spatial_index(cfg, tmp_path, rows)
+
+    assert path == spatial_index_path(cfg, tmp_path) == tmp_path / "out" / "jersey_spatial.npz"
+    loaded = SpatialIndex.load(path)
+    assert len(loaded) == 1
+    assert loaded.nearest(49.2001, -2.1)[0][0] == "JE2 3AB"
+
+
+def test_nearest_many_candidate_lists_match_brute_force_order_with_ties():
+    rng = np.random.default_rng(3)
+    lat = np.repeat(49.17 + rng.normal(0.05, 0.01, 150), 2)
+    lon = np.repeat(-2.25 + rng.normal(0.1, 0.02, 150), 2)
+    index = SpatialIndex(np.asarray([f"JE{idx}" for idx in range(len(lat))]), lat, lon)
+    lats = np.concatenate([49.15 + rng.uniform(0, 0.14, 300), lat[:20]])
+    lons = np.concatenate([-2.3 + rng.uniform(0, 0.3, 300), lon[:20]])
+
+    for k in (1, 4):
+        indices, distances = index.nearest_many(lats, lons, k=k)
+        again, _ = index.nearest_many(lats[::-1], lons[::-1], k=k)
+
+        for row, (query_lat, query_lon) in enumerate(zip(lats, lons)):
+            brute = _brute_distances(index, query_lat, query_lon)
+            expected = np.argsort(brute, kind="stable")[:k]
+            assert indices[row].tolist() == expected.tolist()
+            np.testing.assert_array_equal(distances[row], brute[expected])
+        np.testing.assert_array_equal(again[::-1], indices)
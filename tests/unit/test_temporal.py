@@ -1,7 +1,12 @@
 import csv
 from pathlib import Path
 
+import pytest
+
+from scripts.common.errors import StageError
+from scripts.common.fs import write_json
 from scripts.pipeline.temporal import apply_temporal_tracking
+from scripts.pipeline.temporal_store import TemporalStore
 
 
 def test_temporal_preserves_first_seen_and_updates_last_seen(tmp_path: Path):
@@ -21,7 +26,7 @@ def test_temporal_preserves_first_seen_and_updates_last_seen(tmp_path: Path):
         rows,
         territory_code="JE",
         canonical_output_path=canonical_path,
-        state_path=tmp_path / "state.json",
+        state_path=tmp_path / "state.sqlite",
         run_date="2026-02-17",
     )
 
@@ -30,3 +35,58 @@ def test_temporal_preserves_first_seen_and_updates_last_seen(tmp_path: Path):
     assert by_key["JE2 3AB"]["last_seen"] == "2026-02-17"
     assert by_key["JE1 1AA"]["first_seen"] == "2026-02-17"
     assert stats["disappeared_count"] == 1
+
+
+def _run(tmp_path: Path, postcodes: list[str], run_date: str) -> tuple[list[dict], dict]:
+    return apply_temporal_tracking(
+        [{"normalised_postcode": postcode} for postcode in postcodes],
+        territory_code="JE",
+        canonical_output_path=tmp_path / "missing.csv",
+        state_path=tmp_path / "je.sqlite",
+        run_date=run_date,
+    )
+
+
+def test_temporal_store_records_disappearance_and_reappearance(tmp_path: Path):
+    _run(tmp_path, ["JE1 1AA", "JE2 3AB"], "2026-01-01")
+    _rows, stats = _run(tmp_path, ["JE1 1AA"], "2026-02-01")
+    assert stats == {"disappeared_count": 1, "appeared_count": 0, "reappeared_count": 0}
+    rows, stats = _run(tmp_path, ["JE1 1AA", "JE2 3AB"], "2026-03-01")
+    assert stats == {"disappeared_count": 0, "appeared_count": 0, "reappeared_count": 1}
+    assert [row["first_seen"] for row in rows] == ["2026-01-01", "2026-01-01"]
+
+    with TemporalStore(tmp_path / "je.sqlite") as store:
+        assert store.history("JE2 3AB") == [
+            {"appeared": "2026-01-01", "last_seen": "2026-01-01", "disappeared": "2026-02-01"},
+            {"appeared": "2026-03-01", "last_seen": "2026-03-01", "disappeared": None},
+        ]
+        assert store.history("JE1 1AA") == [{"appeared": "2026-01-01", "last_seen": "2026-03-01", "disappeared": None}]
+        assert store.disappeared_between("2026-01-15", "2026-02-15") == [("JE2 3AB", "2026-02-01")]
+
+
+def test_temporal_store_seeds_from_legacy_json_state(tmp_path: Path):
+    write_json(
+        tmp_path / "je.json",
+        {"territory": "JE", "postcodes": {"JE2 3AB": {"first_seen": "2025-06-01", "last_seen": "2026-01-01"}}},
+    )
+
+    rows, stats = _run(tmp_path, ["JE2 3AB", "JE1 1AA"], "2026-02-17")
+
+    assert [row["first_seen"] for row in rows] == ["2025-06-01", "2026-02-17"]
+    assert stats["appeared_count"] == 1
+    with TemporalStore(tmp_path / "je.sqlite") as store:
+        assert store.last_run_date == "2026-02-17"
+
+
+def test_temporal_merge_join_closes_unmatched_keys_on_both_sides(tmp_path: Path):
+    _run(tmp_path, ["JE1 1AA", "JE2 3AB", "JE5 5AA", "JE9 9ZZ"], "2026-01-01")
+
+    rows, stats = _run(tmp_path, ["JE0 1AA", "JE2 3AB", "JE6 6AA"], "2026-02-01")
+
+    assert stats == {"disappeared_count": 3, "appeared_count": 2, "reappeared_count": 0}
+    assert [row["first_seen"] for row in rows] == ["2026-02-01", "2026-01-01", "2026-02-01"]
+
+
+def test_temporal_rejects_duplicate_postcodes(tmp_path: Path):
+    with pytest.raises(StageError):
+        _run(tmp_path, ["JE2 3AB", "JE2 3AB"], "2026-01-01")
@@ -1,12 +1,14 @@
 import csv
+import json
 from pathlib import Path
 
 import pytest
 
 from scripts.common.errors import ContractError
 from scripts.common.fs import write_json
+from scripts.harvest.stats import write_raw_stats
 from scripts.pipeline.reports import write_run_summary
-from scripts.pipeline.validate import run_validate
+from scripts.pipeline.validate import run_validate, scan_canonical
 
 
 def _write_csv(path: Path, header: list[str], rows: list[dict]):
@@ -65,8 +67,23 @@ def test_validate_generates_territory_report(tmp_path: Path):
         [{"pcd": "JE2 3AB", "pcd2": "JE23AB", "lat": "49.2", "long": "-2.1", "ctry": "JE"}],
     )
 
-    write_json(intermediate_path, {"raw_row_count": 1, "valid_postcodes": 1, "invalid_postcodes": {"auth_source": 0}})
-    write_json(raw_arcgis_path, {"rows": [{"source_class": "authoritative"}]})
+    write_json(
+        intermediate_path,
+        {
+            "raw_row_count": 1,
+            "valid_postcodes": 1,
+            "invalid_postcodes": {"auth_source": 0},
+            "score_explanations": {"0f3a": {"applied_rules": ["authoritative_presence"]}},
+            "coordinate_qa": {"shared_coordinate_points": 0, "sector_distance_outliers": 2},
+        },
+    )
+    write_json(
+        raw_arcgis_path,
+        {
+            "rows": [{"source_class": "authoritative"}],
+            "geometry_policy": {"auth_source": {"policy": "centroid_only", "features": 1, "bytes_saved": 120}},
+        },
+    )
 
     territory_config = {"output": {"canonical_filename": "jersey.csv", "onspd_filename": "jersey_onspd.csv"}}
     onspd_columns = {
@@ -87,6 +104,9 @@ def test_validate_generates_territory_report(tmp_path: Path):
     assert '"75_100": 1' in report
     assert '"coverage_targets"' in report
     assert '"status": "fail_band"' in report
+    assert '"bytes_saved_by_source": {\n      "auth_source": 120' in report
+    assert '"distinct_score_explanations": 1' in report
+    assert '"sector_distance_outliers": 2' in report
 
 
 def test_validate_raises_on_onspd_header_mismatch(tmp_path: Path):
@@ -153,3 +173,66 @@ def test_run_summary_aggregates_reports(tmp_path: Path):
 
     assert '"status": "partial"' in payload
     assert '"raw_rows": 5' in payload
+
+
+def test_scan_canonical_gathers_metrics_in_one_pass():
+    header = ["normalised_postcode", "has_coordinates", "confidence_score", "notes"]
+    rows = iter(
+        [
+            ["JE2 3AB", "true", "80", ""],
+            ["JE2 3AB", "false", "30", "COORDINATE_OUTLIER"],
+            ["JE2 4AB", "TRUE", "bad", ""],
+            ["", "false", "60"],
+        ]
+    )
+
+    stats = scan_canonical(header, rows)
+
+    assert (stats.rows, stats.duplicates, stats.with_coordinates, stats.bbox_outliers) == (4, 1, 2, 1)
+    assert stats.confidence_buckets == {"0_24": 1, "25_49": 1, "50_74": 1, "75_100": 1}
+
+
+def test_validate_reads_source_counts_from_harvest_sidecar(tmp_path: Path, monkeypatch):
+    canonical_header = ["normalised_postcode", "has_coordinates", "confidence_score", "notes"]
+    _write_csv(tmp_path / "out" / "jersey.csv", canonical_header, [])
+    _write_csv(tmp_path / "out" / "jersey_onspd.csv", ["pcd"], [])
+    raw_path = tmp_path / "raw" / "arcgis" / "je_arcgis.json"
+    payload = {"rows": [{"source_class": "authoritative"}, {"source_class": "osm"}]}
+    write_json(raw_path, payload)
+    write_raw_stats(raw_path, payload)
+    monkeypatch.setattr("scripts.pipeline.validate.read_json", lambda *_args: pytest.fail("raw payload parsed"))
+
+    territory_config = {"output": {"canonical_filename": "jersey.csv", "onspd_filename": "jersey_onspd.csv"}}
+    report_path = run_validate(
+        "JE", territory_config, {"columns": [{"name": "pcd"}]}, tmp_path, run_id="run-1", run_date="2026-02-17"
+    )
+
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert report["sources"] == {"authoritative": 1, "digimap": 0, "osm": 1}
+    assert report["counts"]["raw_rows"] == 2
+
+
+def test_validate_writes_report_then_fails_on_contract_violations(tmp_path: Path):
+    _write_csv(tmp_path / "out" / "jersey.csv", ["normalised_postcode"], [{"normalised_postcode": "JE2 3AB"}])
+    _write_csv(
+        tmp_path / "out" / "jersey_onspd.csv",
+        ["pcd", "lat"],
+        [{"pcd": "", "lat": "49.2"}, {"pcd": "JE2 3AB", "lat": "north"}],
+    )
+    territory_config = {"output": {"canonical_filename": "jersey.csv", "onspd_filename": "jersey_onspd.csv"}}
+    onspd_columns = {
+        "columns": [
+            {"name": "pcd", "type": "string", "nullable": False},
+            {"name": "lat", "type": "float", "nullable": True},
+        ]
+    }
+
+    with pytest.raises(ContractError, match="ONSPD_CONTRACT_VIOLATIONS"):
+        run_validate("JE", territory_config, onspd_columns, tmp_path, run_id="run-1", run_date="2026-02-17")
+
+    report = json.loads((tmp_path / "out" / "reports" / "jersey_report.json").read_text(encoding="utf-8"))
+    assert report["errors"] == ["ONSPD_CONTRACT_VIOLATIONS"]
+    assert report["onspd_contract"]["violations"] == [
+        {"column": "pcd", "rule": "null", "count": 1, "samples": [{"row": 1, "value": ""}]},
+        {"column": "lat", "rule": "type", "count": 1, "samples": [{"row": 2, "value": "north"}]},
+    ]